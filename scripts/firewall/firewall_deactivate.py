@@ -1,6 +1,7 @@
 import os
 import json
 import time
+import shutil
 import argparse
 import subprocess
 import bittensor.core.config as btcc
@@ -113,11 +114,17 @@ def main(config):
     btul.logging.debug(f"Flush the INPUT chain")
     tool.flush_input_chain()
 
-    # Remove the firewall events nsjon file
+    # Remove the firewall events nsjon file and event log
     btul.logging.debug(f"Removing events file")
     if os.path.exists("firewall-events.json"):
         os.remove("firewall-events.json")
 
+    if os.path.exists("firewall-events"):
+        shutil.rmtree("firewall-events")
+
+    if os.path.exists("firewall-snapshot.json"):
+        os.remove("firewall-snapshot.json")
+
     btul.logging.debug(f"Updating process arguments")
     process_path, process_interpreter, process_args = get_pm2_process_args(process_name)
     process_args = update_firewall_args(process_args)
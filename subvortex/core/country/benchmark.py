@@ -0,0 +1,238 @@
+# The MIT License (MIT)
+# Copyright © 2024 Eclipse Vortex
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+"""
+Offline micro-benchmark of the geolocation lookup.
+
+Generates a synthetic GeoLite2-shaped dataset and measures the CSV load,
+the precompiled index load, the index memory, the single lookup latency
+and the batch lookup throughput of UltraFastGeoLookup.
+
+Usage:
+    python -m subvortex.core.country.benchmark --output geo-benchmark.json
+"""
+import os
+import json
+import time
+import string
+import asyncio
+import argparse
+import tempfile
+import ipaddress
+import numpy as np
+from typing import Dict, List
+
+from subvortex.core.country.geolookup import UltraFastGeoLookup
+
+LOCATIONS_HEADER = "geoname_id,locale_code,continent_code,continent_name,country_iso_code,country_name,is_in_european_union"
+BLOCKS_HEADER = "network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,is_anonymous_proxy,is_satellite_provider,is_anycast"
+
+
+def generate_dataset(
+    output_dir: str,
+    ipv4_ranges: int = 300_000,
+    ipv6_ranges: int = 100_000,
+    countries: int = 250,
+    seed: int = 42,
+):
+    """
+    Write GeoLite2-shaped CSV files with disjoint random /24 (IPv4) and /48 (IPv6) networks.
+    The same seed always produces the same files.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    letters = string.ascii_uppercase
+    codes = [a + b for a in letters for b in letters][:countries]
+    geoname_ids = list(range(1_000_000, 1_000_000 + len(codes)))
+
+    with open(os.path.join(output_dir, "GeoLite2-Country-Locations-en.csv"), "w") as f:
+        f.write(LOCATIONS_HEADER + "\n")
+        for geoname_id, code in zip(geoname_ids, codes):
+            f.write(f"{geoname_id},en,EU,Europe,{code},Country {code},0\n")
+
+    # IPv4: distinct /24 networks
+    networks = np.sort(rng.choice(1 << 24, size=ipv4_ranges, replace=False))
+    owners = rng.integers(0, len(geoname_ids), size=ipv4_ranges)
+    with open(os.path.join(output_dir, "GeoLite2-Country-Blocks-IPv4.csv"), "w") as f:
+        f.write(BLOCKS_HEADER + "\n")
+        for network, owner in zip(networks.tolist(), owners.tolist()):
+            ip = ipaddress.IPv4Address(network << 8)
+            geoname_id = geoname_ids[owner]
+            f.write(f"{ip}/24,{geoname_id},{geoname_id},,0,0,\n")
+
+    # IPv6: distinct /48 networks in 2000::/3
+    networks = np.sort(rng.choice(1 << 45, size=ipv6_ranges, replace=False))
+    owners = rng.integers(0, len(geoname_ids), size=ipv6_ranges)
+    with open(os.path.join(output_dir, "GeoLite2-Country-Blocks-IPv6.csv"), "w") as f:
+        f.write(BLOCKS_HEADER + "\n")
+        for network, owner in zip(networks.tolist(), owners.tolist()):
+            ip = ipaddress.IPv6Address(((0b001 << 45) | network) << 80)
+            geoname_id = geoname_ids[owner]
+            f.write(f"{ip}/48,{geoname_id},{geoname_id},,0,0,\n")
+
+
+def _random_ips(count: int, seed: int) -> List[str]:
+    """
+    Return random IPv4 addresses spread over the whole address space.
+    """
+    rng = np.random.default_rng(seed)
+    return [str(ipaddress.IPv4Address(x)) for x in rng.integers(0, 1 << 32, size=count).tolist()]
+
+
+def _random_ipv6s(count: int, seed: int) -> List[str]:
+    """
+    Return random IPv6 addresses in the synthetic 2000::/3 networks space.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        str(ipaddress.IPv6Address(((0b001 << 45) | x) << 80 | 1))
+        for x in rng.integers(0, 1 << 45, size=count).tolist()
+    ]
+
+
+def _latencies(func, values: List[str]) -> Dict[str, float]:
+    """
+    Call func on each value and return the latency distribution in microseconds.
+    """
+    durations = np.empty(len(values), dtype=np.float64)
+    for i, value in enumerate(values):
+        start = time.perf_counter()
+        func(value)
+        durations[i] = time.perf_counter() - start
+
+    durations *= 1_000_000
+    return {
+        "mean_us": float(durations.mean()),
+        "p50_us": float(np.percentile(durations, 50)),
+        "p99_us": float(np.percentile(durations, 99)),
+    }
+
+
+async def _start(data_dir: str, cache_size: int) -> tuple:
+    lookup = UltraFastGeoLookup(output_dir=data_dir, cache_size=cache_size)
+
+    start = time.perf_counter()
+    await lookup.start()
+    duration = time.perf_counter() - start
+
+    return lookup, duration
+
+
+async def run_benchmark(
+    data_dir: str, lookups: int = 100_000, batch_size: int = 256, seed: int = 42
+) -> Dict[str, float]:
+    """
+    Measure UltraFastGeoLookup on the dataset of data_dir and return the results.
+    """
+    results = {}
+
+    # Cold start: parse the CSV files and compile the index files
+    for name in ("GeoLite2-Country-IPv4.idx", "GeoLite2-Country-IPv6.idx"):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            os.unlink(path)
+
+    lookup, duration = await _start(data_dir, cache_size=0)
+    results["csv_load_s"] = duration
+    await lookup.stop()
+
+    # Warm start: memory-map the precompiled index files
+    lookup, duration = await _start(data_dir, cache_size=0)
+    results["index_load_s"] = duration
+
+    stats = lookup.get_stats()
+    results["ipv4_ranges"] = stats["ip_ranges"]
+    results["ipv6_ranges"] = stats["ipv6_ranges"]
+    results["index_bytes"] = stats["index_bytes"]
+
+    ips = _random_ips(lookups, seed)
+    ipv6s = _random_ipv6s(max(lookups // 10, 1), seed)
+
+    # Single lookups without cache
+    for key, value in _latencies(lookup.lookup_country, ips).items():
+        results[f"lookup_ipv4_{key}"] = value
+
+    for key, value in _latencies(lookup.lookup_country, ipv6s).items():
+        results[f"lookup_ipv6_{key}"] = value
+
+    # Batch lookups without cache
+    start = time.perf_counter()
+    for i in range(0, len(ips), batch_size):
+        lookup.lookup_countries(ips[i : i + batch_size])
+    results["batch_lookups_per_s"] = len(ips) / (time.perf_counter() - start)
+
+    await lookup.stop()
+
+    # Single lookups served by the cache
+    lookup, _ = await _start(data_dir, cache_size=lookups)
+    hot_ips = ips[: max(lookups // 10, 1)]
+    for ip in hot_ips:
+        lookup.lookup_country(ip)
+
+    for key, value in _latencies(lookup.lookup_country, hot_ips).items():
+        results[f"lookup_cached_{key}"] = value
+
+    await lookup.stop()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geolocation lookup micro-benchmark")
+    parser.add_argument("--data-dir", type=str, default=None, help="Directory of the synthetic dataset, temporary if not set")
+    parser.add_argument("--ipv4-ranges", type=int, default=300_000)
+    parser.add_argument("--ipv6-ranges", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None, help="File the results are appended to, as one json line")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or tmp_dir
+
+        generate_dataset(
+            data_dir,
+            ipv4_ranges=args.ipv4_ranges,
+            ipv6_ranges=args.ipv6_ranges,
+            seed=args.seed,
+        )
+
+        results = asyncio.run(
+            run_benchmark(
+                data_dir,
+                lookups=args.lookups,
+                batch_size=args.batch_size,
+                seed=args.seed,
+            )
+        )
+
+    record = {
+        "timestamp": time.time(),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("data_dir", "output")},
+        "results": results,
+    }
+
+    print(json.dumps(record, indent=2))
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
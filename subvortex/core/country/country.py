@@ -17,9 +17,13 @@
 import requests
 import ipaddress
 import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 import bittensor.utils.btlogging as btul
 
+from subvortex.core.country.country_constants import COUNTRY_BATCH_MAX_WORKERS
+
 SV_API_BASE_URL = "http://geo.subvortex.info"
 MY_API_BASE_URL = "http://api.ip-from.com"
 COUNTRY_IS_BASE_URL = "https://api.country.is"
@@ -35,10 +39,37 @@ API_RATE_LIMITS = {
     "my_api": 0,  # Custom API - Down!
 }
 
+# Timeout of an API call in seconds
+API_TIMEOUT = 5
+
+# Seconds to wait for an API before starting the next one in parallel
+API_HEDGE_DELAY = 0.5
+
+# Consecutive failures opening the circuit of an API
+API_FAILURE_THRESHOLD = 3
+
+# Seconds before an open circuit lets a probe call through
+API_RESET_TIMEOUT = 60
+
+# Per-API maximum number of concurrent calls when resolving a batch of ips
+API_MAX_CONCURRENCY = {
+    "subvortex": 4,
+    "ipinfo": 2,
+    "ip_api": 2,
+    "country_is": 2,
+    "my_api": 4,
+}
+
 
 # Per-IP per-API rate limit tracking: {ip: {api_name: last_call_time}}
 _per_ip_rate_limits = {}
 
+# Per-API semaphores bounding the concurrent calls
+_api_semaphores = {
+    name: threading.BoundedSemaphore(value)
+    for name, value in API_MAX_CONCURRENCY.items()
+}
+
 countries = {}
 
 
@@ -50,15 +81,106 @@ class CountryApiException(Exception):
         self.rate_limited = rate_limited or {}
 
 
-def get_country(ip: str):
+class CircuitBreaker:
     """
-    Get the country code of the ip with aggressive API calling until rate limited.
-    Single pass through APIs - infinite retry is handled by caller.
+    Circuit breaker of a country API.
+    Opens after `failure_threshold` consecutive failures, then lets a single probe
+    through once `reset_timeout` seconds have passed (half-open). It also keeps an
+    exponential moving average of the API latency to rank the healthy APIs.
     """
-    ip_ipv4 = get_ipv4(ip)
 
-    # APIs ordered by accuracy (highest to lowest)
-    apis = [
+    def __init__(
+        self,
+        failure_threshold: int = API_FAILURE_THRESHOLD,
+        reset_timeout: float = API_RESET_TIMEOUT,
+        latency_smoothing: float = 0.3,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_smoothing = latency_smoothing
+        self.failures = 0
+        self.opened_at = None
+        self.latency = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+
+            if self._probing or time.time() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+
+            return "open"
+
+    def allow(self) -> tuple[bool, bool]:
+        """
+        Return a tuple (allowed, probe), allowed being False if the circuit is open or already probing
+        and probe True if the call took the probe of the half-open circuit.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return (True, False)
+
+            if self._probing or time.time() - self.opened_at < self.reset_timeout:
+                return (False, False)
+
+            # Half-open: let one call probe the API
+            self._probing = True
+            return (True, True)
+
+    def release(self):
+        """
+        End the probe taken by a call without result, e.g. rate limited, so the next call can probe the API.
+        """
+        with self._lock:
+            self._probing = False
+
+    def remaining(self) -> float:
+        """Seconds before the circuit lets a probe through."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+
+            return max(self.reset_timeout - (time.time() - self.opened_at), 0)
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+            self.latency = (
+                latency
+                if self.latency is None
+                else self.latency
+                + self.latency_smoothing * (latency - self.latency)
+            )
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+
+            self._probing = False
+
+
+# Per-API circuit breakers
+_circuit_breakers = {name: CircuitBreaker() for name in API_RATE_LIMITS}
+
+# Threads running the API calls, shared by every lookup
+_api_executor = ThreadPoolExecutor(
+    max_workers=sum(API_MAX_CONCURRENCY.values()), thread_name_prefix="country-api"
+)
+
+
+def _get_apis():
+    """
+    Return the APIs to use, ordered by accuracy (highest to lowest)
+    """
+    return [
         (_get_country_by_ipinfo_io, "ipinfo"),  # Highest accuracy (~99%)
         (_get_country_by_ip_api, "ip_api"),  # Very high accuracy (~98%)
         (_get_country_by_country_is, "country_is"),  # Good accuracy (~95%)
@@ -66,66 +188,149 @@ def get_country(ip: str):
         # (_get_country_by_my_api, "my_api"),         # Down
     ]
 
+
+def _get_api_function(api_name: str):
+    """
+    Return the function calling the API
+    """
+    return {
+        "subvortex": _get_country_by_subvortex_api,
+        "ipinfo": _get_country_by_ipinfo_io,
+        "ip_api": _get_country_by_ip_api,
+        "country_is": _get_country_by_country_is,
+        "my_api": _get_country_by_my_api,
+    }[api_name]
+
+
+def call_api(api_name: str, ip: str, rate_limited: dict = None):
+    """
+    Get the country code of the ip from a single API, called on the shared API threads.
+    The call is bounded by the concurrency of the API and skipped while the API is in cooldown
+    for the ip, in `rate_limited` or while its circuit is open.
+    The APIs rate limiting the call are added to `rate_limited`.
+    Returns a tuple (country, reason), reason explaining why there is no country.
+    """
+    rate_limited = {} if rate_limited is None else rate_limited
+    ip_ipv4 = get_ipv4(ip)
+
+    if api_name in rate_limited:
+        return None, "rate limited"
+
+    rate_limit_end = _per_ip_rate_limits.get(ip_ipv4, {}).get(api_name)
+    if rate_limit_end is not None and time.time() < rate_limit_end:
+        return None, f"{rate_limit_end - time.time():.0f}s cooldown"
+
+    breaker = _circuit_breakers[api_name]
+    allowed, probe = breaker.allow()
+    if not allowed:
+        return None, f"circuit open for {breaker.remaining():.0f}s"
+
+    errors = []
+    try:
+        future = _api_executor.submit(
+            _call_api,
+            _get_api_function(api_name),
+            api_name,
+            ip_ipv4,
+            errors,
+            rate_limited,
+            probe,
+        )
+    except Exception:
+        if probe:
+            breaker.release()
+        raise
+
+    country = future.result()
+    if country:
+        return country, None
+
+    return None, "; ".join(errors) or "rate limited"
+
+
+def get_country(ip: str):
+    """
+    Get the country code of the ip by racing the APIs.
+    The fastest healthy API is called first. If it has not answered after
+    API_HEDGE_DELAY seconds, the next one is started, and so on; a failure starts
+    the next one right away. The first country returned wins.
+    Single pass through APIs - infinite retry is handled by caller.
+    """
+    ip_ipv4 = get_ipv4(ip)
+
     # Initialize per-IP tracking if not exists
-    if ip_ipv4 not in _per_ip_rate_limits:
-        _per_ip_rate_limits[ip_ipv4] = {}
+    per_ip_rate_limits = _per_ip_rate_limits.setdefault(ip_ipv4, {})
 
     errors = []
     rate_limited = {}
-    
-    for api_func, api_name in apis:
+
+    candidates = []
+    for api_func, api_name in _get_apis():
         # Check if this API is still in rate limit cooldown for this specific IP
-        now = time.time()
-        if api_name in _per_ip_rate_limits[ip_ipv4]:
-            rate_limit_end = _per_ip_rate_limits[ip_ipv4][api_name]
-            if now < rate_limit_end:
-                remaining = rate_limit_end - now
-                rate_limited[api_name] = remaining
+        rate_limit_end = per_ip_rate_limits.get(api_name)
+        if rate_limit_end is not None and time.time() < rate_limit_end:
+            rate_limited[api_name] = rate_limit_end - time.time()
+            continue
+
+        # Check if the API is considered down, the probe is only taken when the API is called
+        breaker = _circuit_breakers[api_name]
+        if breaker.state == "open":
+            rate_limited[api_name] = breaker.remaining()
+            continue
+
+        candidates.append((api_func, api_name))
+
+    # Fastest APIs first, the ones never measured keep their accuracy order
+    candidates.sort(
+        key=lambda x: (
+            _circuit_breakers[x[1]].latency is None,
+            _circuit_breakers[x[1]].latency or 0,
+        )
+    )
+
+    pending = set()
+    next_candidate = 0
+    while next_candidate < len(candidates) or pending:
+        # Start the next API, either the first one, or because the ones started
+        # have not answered before the hedge delay or have failed
+        if next_candidate < len(candidates):
+            api_func, api_name = candidates[next_candidate]
+            next_candidate += 1
+
+            # Another call may be probing the API since the candidates were selected
+            breaker = _circuit_breakers[api_name]
+            allowed, probe = breaker.allow()
+            if not allowed:
+                rate_limited[api_name] = breaker.remaining()
                 continue
 
-        try:
-            country, reason = api_func(ip_ipv4)
-            if country:
-                return country
-            
-            if reason:
-                errors.append(f"{api_name}: {reason}")
-
-        except requests.HTTPError as e:
-            status_code = getattr(e.response, "status_code", "unknown")
-            
-            # Check for rate limit status codes
-            if status_code in [429, 403]:  # Common rate limit codes
-                rate_limit_duration = _extract_rate_limit_from_response(e.response, api_name)
-                rate_limit_end = now + rate_limit_duration
-                _per_ip_rate_limits[ip_ipv4][api_name] = rate_limit_end
-                
-                btul.logging.warning(
-                    f"🚫 {api_name} rate limited for {ip_ipv4} (HTTP {status_code}). "
-                    f"Will retry after {rate_limit_duration}s"
-                )
-                rate_limited[api_name] = rate_limit_duration
-                
-            else:
-                errors.append(f"{api_name} ({status_code}): {e}")
-
-        except Exception as e:
-            # Check if error message indicates rate limiting
-            error_msg = str(e).lower()
-            if any(phrase in error_msg for phrase in ['rate limit', 'too many requests', 'quota exceeded']):
-                # Apply default rate limit if we detect rate limiting but no HTTP status
-                rate_limit_duration = API_RATE_LIMITS.get(api_name, 60)  # Default to 60s
-                rate_limit_end = now + rate_limit_duration
-                _per_ip_rate_limits[ip_ipv4][api_name] = rate_limit_end
-                
-                btul.logging.warning(
-                    f"🚫 {api_name} rate limited for {ip_ipv4} (detected from error). "
-                    f"Will retry after {rate_limit_duration}s"
+            try:
+                pending.add(
+                    _api_executor.submit(
+                        _call_api,
+                        api_func,
+                        api_name,
+                        ip_ipv4,
+                        errors,
+                        rate_limited,
+                        probe,
+                    )
                 )
-                rate_limited[api_name] = rate_limit_duration
+            except Exception:
+                if probe:
+                    breaker.release()
+                raise
+
+        done, pending = wait(
+            pending,
+            timeout=API_HEDGE_DELAY if next_candidate < len(candidates) else None,
+            return_when=FIRST_COMPLETED,
+        )
 
-            else:
-                errors.append(f"{api_name}: {e}")
+        for future in done:
+            country = future.result()
+            if country:
+                return country
 
     # Combine all errors and rate limits
     all_errors = errors + [
@@ -136,13 +341,151 @@ def get_country(ip: str):
         raise CountryApiException(
             f"All APIs failed for {ip_ipv4} - {'; '.join(all_errors)}", rate_limited
         )
-    
+
     # This should not happen, but safety fallback
     raise CountryApiException(
         f"No APIs available for {ip_ipv4}", rate_limited
     )
 
 
+def _call_api(
+    api_func,
+    api_name: str,
+    ip_ipv4: str,
+    errors: list,
+    rate_limited: dict,
+    probe: bool = False,
+):
+    """
+    Call the API and record its health, probe being True if the call took the probe of the circuit.
+    Returns the country, None if the API did not return one.
+    """
+    breaker = _circuit_breakers[api_name]
+    now = time.time()
+
+    try:
+        with _api_semaphores[api_name]:
+            start = time.perf_counter()
+            country, reason = api_func(ip_ipv4)
+            breaker.record_success(time.perf_counter() - start)
+
+        if country:
+            return country
+
+        if reason:
+            errors.append(f"{api_name}: {reason}")
+
+    except requests.HTTPError as e:
+        status_code = getattr(e.response, "status_code", "unknown")
+
+        # Check for rate limit status codes
+        if status_code in [429, 403]:  # Common rate limit codes
+            rate_limit_duration = _extract_rate_limit_from_response(e.response, api_name)
+            _per_ip_rate_limits.setdefault(ip_ipv4, {})[api_name] = (
+                now + rate_limit_duration
+            )
+
+            btul.logging.warning(
+                f"🚫 {api_name} rate limited for {ip_ipv4} (HTTP {status_code}). "
+                f"Will retry after {rate_limit_duration}s"
+            )
+            rate_limited[api_name] = rate_limit_duration
+
+        else:
+            breaker.record_failure()
+            errors.append(f"{api_name} ({status_code}): {e}")
+
+    except Exception as e:
+        # Check if error message indicates rate limiting
+        error_msg = str(e).lower()
+        if any(phrase in error_msg for phrase in ['rate limit', 'too many requests', 'quota exceeded']):
+            # Apply default rate limit if we detect rate limiting but no HTTP status
+            rate_limit_duration = API_RATE_LIMITS.get(api_name, 60)  # Default to 60s
+            _per_ip_rate_limits.setdefault(ip_ipv4, {})[api_name] = (
+                now + rate_limit_duration
+            )
+
+            btul.logging.warning(
+                f"🚫 {api_name} rate limited for {ip_ipv4} (detected from error). "
+                f"Will retry after {rate_limit_duration}s"
+            )
+            rate_limited[api_name] = rate_limit_duration
+
+        else:
+            breaker.record_failure()
+            errors.append(f"{api_name}: {e}")
+
+    finally:
+        # End the probe of a call neither succeeding nor failing, e.g. rate limited
+        if probe:
+            breaker.release()
+
+    return None
+
+
+def get_api_stats():
+    """
+    Return the state, consecutive failures and average latency of each API.
+    """
+    return {
+        name: {
+            "state": breaker.state,
+            "failures": breaker.failures,
+            "latency": breaker.latency,
+        }
+        for name, breaker in _circuit_breakers.items()
+    }
+
+
+def reset_circuit_breakers():
+    """
+    Close all the circuit breakers and forget the latencies measured.
+    """
+    for name in _circuit_breakers:
+        _circuit_breakers[name] = CircuitBreaker()
+
+
+def get_countries(ips: list[str], max_workers: int = COUNTRY_BATCH_MAX_WORKERS):
+    """
+    Get the country code of each ip, resolving the distinct ips concurrently.
+    Each API keeps its per-ip cooldowns and is called by at most API_MAX_CONCURRENCY threads at once.
+
+    Returns a tuple (countries, errors) where countries maps each resolved ip to its
+    country (or None) and errors maps each ip no API could resolve to its CountryApiException.
+    """
+    # Deduplicate on the ipv4 form so the same address is only resolved once
+    ips_by_ipv4 = {}
+    for ip in ips:
+        ips_by_ipv4.setdefault(get_ipv4(ip), set()).add(ip)
+
+    countries = {}
+    errors = {}
+    if not ips_by_ipv4:
+        return countries, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ips_by_ipv4))) as executor:
+        futures = {executor.submit(get_country, ip): ip for ip in ips_by_ipv4}
+
+        for future in as_completed(futures):
+            ip_ipv4 = futures[future]
+            try:
+                country = future.result()
+                countries.update({ip: country for ip in ips_by_ipv4[ip_ipv4]})
+
+            except CountryApiException as e:
+                errors.update({ip: e for ip in ips_by_ipv4[ip_ipv4]})
+
+            except Exception as e:
+                error = CountryApiException(f"Country lookup failed for {ip_ipv4}: {e}")
+                errors.update({ip: error for ip in ips_by_ipv4[ip_ipv4]})
+
+    btul.logging.debug(
+        f"🌍 Resolved {len(countries)} ips through the APIs, {len(errors)} failed"
+    )
+
+    return countries, errors
+
+
 def _extract_rate_limit_from_response(response, api_name: str) -> float:
     """
     Extract rate limit duration from HTTP response headers.
@@ -198,7 +541,7 @@ def _get_country_by_subvortex_api(ip: str):
     Reference: http://geo.subvortex.info
     """
     url = f"{SV_API_BASE_URL}/country/{ip}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=API_TIMEOUT)
     response.raise_for_status()
 
     data = response.json()
@@ -213,7 +556,7 @@ def _get_country_by_my_api(ip: str):
     Reference: http://api.ip-from.com
     """
     url = f"{MY_API_BASE_URL}/{ip}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=API_TIMEOUT)
     response.raise_for_status()
 
     data = response.json()
@@ -230,7 +573,7 @@ def _get_country_by_country_is(ip: str):
     Reference: https://country.is/
     """
     url = f"{COUNTRY_IS_BASE_URL}/{ip}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=API_TIMEOUT)
     response.raise_for_status()
 
     data = response.json()
@@ -245,7 +588,7 @@ def _get_country_by_ip_api(ip: str):
     Reference: https://ip-api.com/
     """
     url = f"{IP_API_BASE_URL}/{ip}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=API_TIMEOUT)
     response.raise_for_status()
 
     data = response.json()
@@ -260,7 +603,7 @@ def _get_country_by_ipinfo_io(ip: str):
     Reference: https://ipinfo.io/
     """
     url = f"{IPINFO_IO_BASE_URL}/{ip}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=API_TIMEOUT)
     response.raise_for_status()
 
     data = response.json()
@@ -19,6 +19,7 @@ COUNTRY_LOGGING_NAME = "Country"
 
 # Monitor
 COUNTRY_ATTEMPTS = 5
+COUNTRY_BATCH_MAX_WORKERS = 8
 COUNTRY_SLEEP = 5 * 60  # Every 5 minutes
 COUNTRY_URL = {
     7: "http://drive.google.com/uc?id=14RkFaEuwfc8lnJghNc3oKLT32kqcdjTd&export=download",
@@ -14,32 +14,99 @@
 # THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
-import copy
 import time
-import threading
-import ipaddress
 import bittensor.utils.btlogging as btul
-from typing import List
+from types import MappingProxyType
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 
 from subvortex.core.country.country_constants import (
     COUNTRY_URL,
     COUNTRY_LOGGING_NAME,
     COUNTRY_SLEEP,
-    COUNTRY_ATTEMPTS
+    COUNTRY_ATTEMPTS,
+    COUNTRY_BATCH_MAX_WORKERS,
 )
+from subvortex.core.country.country import call_api, get_ipv4
 from subvortex.core.file.file_google_drive_monitor import FileGoogleDriveMonitor
-from subvortex.core.localisation import (
-    get_country_by_country_is,
-    get_country_by_ip_api,
-    get_country_by_ipinfo_io,
-    get_country_by_my_api,
-)
+
+
+def _freeze(value: Any):
+    """
+    Return a read-only view of the value, nested dictionaries and lists included.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+
+    if isinstance(value, list):
+        return tuple(_freeze(x) for x in value)
+
+    return value
+
+
+@dataclass(frozen=True)
+class CountrySnapshot:
+    """
+    Immutable view of the country file, with the indexes readers need.
+    A refresh builds a new snapshot and swaps the reference, so readers never
+    lock nor copy.
+    """
+
+    locations: Mapping[str, Mapping[str, Any]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    """
+    Localisation of each country
+    """
+
+    coordinates: Mapping[str, Tuple[float, float]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    """
+    Latitude and longitude of each country
+    """
+
+    overrides: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    """
+    Country of each overridden ip, keyed by ipv4
+    """
+
+    enable_custom_api: bool = True
+    last_modified: Optional[str] = None
+
+    @classmethod
+    def from_data(cls, data: dict) -> "CountrySnapshot":
+        localisations = data.get("localisations") or {}
+
+        coordinates = {}
+        for country, localisation in localisations.items():
+            try:
+                coordinates[country] = (
+                    float(localisation["latitude"]),
+                    float(localisation["longitude"]),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        overrides = {
+            get_ipv4(ip): country
+            for ip, country in (data.get("overrides") or {}).items()
+            if country
+        }
+
+        return cls(
+            locations=_freeze(localisations),
+            coordinates=MappingProxyType(coordinates),
+            overrides=MappingProxyType(overrides),
+            enable_custom_api=data.get("enable_custom_api", True),
+            last_modified=data.get("last-modified"),
+        )
 
 
 class CountryService:
     def __init__(self, netuid: int):
-        self._lock = threading.Lock()
-        self._data = {}
+        self._snapshot = CountrySnapshot()
         self.first_try = True
 
         self.provider = FileGoogleDriveMonitor(
@@ -50,75 +117,96 @@ class CountryService:
         )
 
     def _is_custom_api_enabled(self):
-        with self._lock:
-            return self._data.get("enable_custom_api", True)
+        return self._snapshot.enable_custom_api
+
+    def get_snapshot(self) -> CountrySnapshot:
+        return self._snapshot
 
     def get_last_modified(self):
-        with self._lock:
-            return self._data.get("last-modified")
+        return self._snapshot.last_modified
 
-    def get_locations(self) -> List[str]:
-        with self._lock:
-            localisations = self._data.get("localisations", {})
-            return copy.deepcopy(localisations)
+    def get_locations(self) -> Mapping[str, Mapping[str, Any]]:
+        """
+        Return the read-only localisation of each country
+        """
+        return self._snapshot.locations
 
-    def get_ipv4(self, ip):
-        try:
-            # First, try to interpret the input as an IPv4 address
-            ipv4 = ipaddress.IPv4Address(ip)
-            return str(ipv4)
-        except ipaddress.AddressValueError:
-            pass
-
-        try:
-            # Next, try to interpret the input as an IPv6 address
-            ipv6 = ipaddress.IPv6Address(ip)
-            if ipv6.ipv4_mapped:
-                return str(ipv6.ipv4_mapped)
-        except ipaddress.AddressValueError:
-            pass
-
-        return ip
-
-    def get_country(self, ip: str):
+    def get_coordinates(self, country: str) -> Optional[Tuple[float, float]]:
         """
-        Get the country code of the ip
+        Return the latitude and longitude of the country, None if unknown
         """
-        ip_ipv4 = self.get_ipv4(ip)
+        return self._snapshot.coordinates.get(country)
 
-        country = None
-        with self._lock:
-            overrides = self._data.get("overrides") or {}
-            country = overrides.get(ip_ipv4)
+    def get_ipv4(self, ip):
+        return get_ipv4(ip)
 
-        if country:
-            return country
+    def get_country(self, ip: str, rate_limited: dict = None):
+        """
+        Get the country code of the ip.
+        The APIs are called one after the other with their concurrency, rate limits and circuit breakers,
+        the ones in `rate_limited` are skipped and the ones rate limiting the calls are added to it.
+        """
+        ip_ipv4 = get_ipv4(ip)
 
-        country, reason1 = (
-            get_country_by_my_api(ip_ipv4)
-            if self._is_custom_api_enabled()
-            else (None, None)
-        )
+        country = self._snapshot.overrides.get(ip_ipv4)
         if country:
             return country
 
-        country, reason2 = get_country_by_country_is(ip_ipv4)
-        if country:
-            return country
+        apis = ["country_is", "ip_api", "ipinfo"]
+        if self._is_custom_api_enabled():
+            apis.insert(0, "my_api")
 
-        country, reason3 = get_country_by_ip_api(ip_ipv4)
-        if country:
-            return country
+        reasons = []
+        for api_name in apis:
+            country, reason = call_api(api_name, ip_ipv4, rate_limited)
+            if country:
+                return country
 
-        country, reason4 = get_country_by_ipinfo_io(ip_ipv4)
-        if country:
-            return country
+            reasons.append(f"{api_name}: {reason}")
 
         btul.logging.warning(
-            f"Could not get the country of the ip {ip_ipv4}: Api 1: {reason1} / Api 2: {reason2} / Api 3: {reason3} / Api 4: {reason4}"
+            f"Could not get the country of the ip {ip_ipv4}: {' / '.join(reasons)}"
         )
         return None
 
+    def get_countries(self, ips: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Get the country code of each ip.
+        Overrides are served in a single pass, the remaining distinct ips are
+        resolved concurrently through the APIs. An API rate limiting a call is
+        not called again for the rest of the batch.
+        """
+        ips_by_ipv4 = {}
+        for ip in ips:
+            ips_by_ipv4.setdefault(get_ipv4(ip), []).append(ip)
+
+        overrides = self._snapshot.overrides
+        countries = {
+            ip_ipv4: overrides[ip_ipv4]
+            for ip_ipv4 in ips_by_ipv4
+            if ip_ipv4 in overrides
+        }
+
+        misses = [x for x in ips_by_ipv4 if x not in countries]
+        if misses:
+            rate_limited = {}
+            max_workers = min(COUNTRY_BATCH_MAX_WORKERS, len(misses))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                countries.update(
+                    zip(
+                        misses,
+                        executor.map(
+                            lambda x: self.get_country(x, rate_limited), misses
+                        ),
+                    )
+                )
+
+        return {
+            ip: countries[ip_ipv4]
+            for ip_ipv4, originals in ips_by_ipv4.items()
+            for ip in originals
+        }
+
     def wait(self):
         """
         Wait until we have execute the run method at least one
@@ -130,8 +218,8 @@ class CountryService:
             attempt += 1
 
     def run(self, data):
-        with self._lock:
-            self._data = data
+        # Build the new snapshot aside, then publish it in a single reference swap
+        self._snapshot = CountrySnapshot.from_data(data or {})
 
         self.first_try = False
 
@@ -1,13 +1,18 @@
 import os
 import csv
 import time
+import struct
+import hashlib
 import asyncio
 import requests
 import zipfile
 import tempfile
 import ipaddress
-from threading import RLock
-from typing import Dict, Optional
+import numpy as np
+from threading import Lock, RLock
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 import bittensor.utils.btlogging as btul
 
@@ -15,6 +20,30 @@ import bittensor.utils.btlogging as btul
 # MaxMind GeoLite2 Download URLs
 GEOLITE2_DOWNLOAD_BASE = "https://download.maxmind.com/app/geoip_download"
 
+# Precompiled index file format
+# Header: magic, version, country count, range count, source digest, payload digest
+# Payload: country codes (S2), padding to 8 bytes, then the arrays of the index
+GEO_INDEX_VERSION = 2
+GEO_INDEX_HEADER = struct.Struct("<8sIIQ32s32s")
+
+
+def compute_files_digest(paths: List[str]) -> bytes:
+    """
+    Return the sha256 digest of the content of the files, in order.
+    Missing files are hashed as empty ones.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        if not os.path.exists(path):
+            continue
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+    return digest.digest()
+
 
 class GeoLite2Updater:
     """
@@ -30,11 +59,17 @@ class GeoLite2Updater:
             output_dir, "GeoLite2-Country-Locations-en.csv"
         )
         self.blocks_file = os.path.join(output_dir, "GeoLite2-Country-Blocks-IPv4.csv")
+        self.blocks6_file = os.path.join(
+            output_dir, "GeoLite2-Country-Blocks-IPv6.csv"
+        )
 
         # Update settings
         self.update_interval_hours = 24  # Check daily
         self.last_check_file = os.path.join(output_dir, "last_update_check.txt")
 
+        # Held while the CSV files are replaced, so they are never read half updated
+        self.lock = Lock()
+
         # Ensure output directory exists
         os.makedirs(output_dir, exist_ok=True)
 
@@ -112,8 +147,10 @@ class GeoLite2Updater:
                 self._mark_check_time()
                 return False
 
-            if not os.path.exists(self.locations_file) or not os.path.exists(
-                self.blocks_file
+            if (
+                not os.path.exists(self.locations_file)
+                or not os.path.exists(self.blocks_file)
+                or not os.path.exists(self.blocks6_file)
             ):
                 btul.logging.info(
                     "📥 GeoLite2 CSV files missing, attempting download..."
@@ -207,107 +244,381 @@ class GeoLite2Updater:
     def _extract_csv_files(self, zip_path: str) -> bool:
         """Extract CSV files from downloaded zip."""
         try:
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            with self.lock, zipfile.ZipFile(zip_path, "r") as zip_ref:
                 # Find the CSV files in the zip
-                locations_found = False
-                blocks_found = False
+                targets = {
+                    os.path.basename(self.locations_file): self.locations_file,
+                    os.path.basename(self.blocks_file): self.blocks_file,
+                    os.path.basename(self.blocks6_file): self.blocks6_file,
+                }
+                found = set()
 
                 for file_info in zip_ref.filelist:
                     filename = os.path.basename(file_info.filename)
+                    target = targets.get(filename)
+                    if target is None:
+                        continue
 
-                    if filename == "GeoLite2-Country-Locations-en.csv":
-                        zip_ref.extract(file_info, self.output_dir)
-                        # Move to correct location
-                        extracted_path = os.path.join(
-                            self.output_dir, file_info.filename
-                        )
-                        if extracted_path != self.locations_file:
-                            os.makedirs(
-                                os.path.dirname(self.locations_file), exist_ok=True
-                            )
-                            os.rename(extracted_path, self.locations_file)
-                        locations_found = True
-
-                    elif filename == "GeoLite2-Country-Blocks-IPv4.csv":
-                        zip_ref.extract(file_info, self.output_dir)
-                        # Move to correct location
-                        extracted_path = os.path.join(
-                            self.output_dir, file_info.filename
-                        )
-                        if extracted_path != self.blocks_file:
-                            os.makedirs(
-                                os.path.dirname(self.blocks_file), exist_ok=True
-                            )
-                            os.rename(extracted_path, self.blocks_file)
-                        blocks_found = True
+                    zip_ref.extract(file_info, self.output_dir)
+                    # Move to correct location
+                    extracted_path = os.path.join(self.output_dir, file_info.filename)
+                    if extracted_path != target:
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.rename(extracted_path, target)
+                    found.add(filename)
 
-                return locations_found and blocks_found
+                return len(found) == len(targets)
 
         except Exception as e:
             btul.logging.error(f"Failed to extract CSV files: {e}")
             return False
 
 
-class IntervalTreeNode:
-    """Optimized interval tree node for IP range lookups."""
+class GeoRangeIndex:
+    """
+    Immutable IPv4 range table held in contiguous NumPy arrays.
+    Ranges are sorted by start so a lookup is a single searchsorted call,
+    for one IP as well as for a whole batch.
+    """
+
+    MAGIC = b"SVGEOIDX"
+
+    # Arrays of the index, in the order they are stored in the index file
+    FIELDS = (("starts", "<u4"), ("ends", "<u4"), ("country_ids", "<u2"))
+
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        country_ids: np.ndarray,
+        countries: List[Optional[str]],
+    ):
+        self.starts = starts
+        self.ends = ends
+        self.country_ids = country_ids
+        # Index 0 is reserved for "no country"
+        self.countries = countries
+
+    def __len__(self):
+        return len(self.country_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name, _ in self.FIELDS)
+
+    @property
+    def country_count(self) -> int:
+        return len(self.countries) - 1
+
+    @classmethod
+    def empty(cls) -> "GeoRangeIndex":
+        return cls(
+            **{name: np.empty(0, dtype=dtype) for name, dtype in cls.FIELDS},
+            countries=[None],
+        )
 
-    def __init__(self, start: int, end: int, geoname_id: int):
-        self.start = start
-        self.end = end
-        self.geoname_id = geoname_id
-        self.max_end = end
-        self.left: IntervalTreeNode = None
-        self.right: IntervalTreeNode = None
+    @staticmethod
+    def _map_countries(geoname_ids: List[int], country_map: Dict[int, str]):
+        """
+        Return the country index of each geoname id and the list of countries.
+        """
+        countries: List[Optional[str]] = [None]
+        country_index = {}
+        country_ids = []
+        for geoname_id in geoname_ids:
+            country = country_map.get(geoname_id)
+            if country is None:
+                country_ids.append(0)
+                continue
+
+            index = country_index.get(country)
+            if index is None:
+                index = country_index[country] = len(countries)
+                countries.append(country)
+
+            country_ids.append(index)
+
+        return np.asarray(country_ids, dtype=np.uint16), countries
+
+    @classmethod
+    def from_ranges(
+        cls,
+        starts: List[int],
+        ends: List[int],
+        geoname_ids: List[int],
+        country_map: Dict[int, str],
+    ) -> "GeoRangeIndex":
+        """
+        Build the index from unsorted ranges and the geoname id to country code mapping.
+        """
+        country_ids, countries = cls._map_countries(geoname_ids, country_map)
 
+        starts_array = np.asarray(starts, dtype=np.uint32)
+        order = np.argsort(starts_array, kind="stable")
 
-class IntervalTree:
-    """Ultra-fast interval tree for O(log n) IP range lookups."""
+        return cls(
+            starts=starts_array[order],
+            ends=np.asarray(ends, dtype=np.uint32)[order],
+            country_ids=country_ids[order],
+            countries=countries,
+        )
 
-    def __init__(self):
-        self.root = None
+    def save(self, path: str, source_digest: bytes):
+        """
+        Write the index to a binary file that can be memory-mapped by any process.
+        The file is written next to its destination and atomically renamed.
+        """
+        codes = np.array(
+            [(x or "").encode("ascii") for x in self.countries], dtype="S2"
+        ).tobytes()
+        padding = b"\0" * (-len(codes) % 8)
+        payload = b"".join(
+            [codes, padding]
+            + [
+                np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes()
+                for name, dtype in self.FIELDS
+            ]
+        )
+        header = GEO_INDEX_HEADER.pack(
+            self.MAGIC,
+            GEO_INDEX_VERSION,
+            len(self.countries),
+            len(self),
+            source_digest,
+            hashlib.sha256(payload).digest(),
+        )
 
-    def insert(self, start: int, end: int, geoname_id: int):
-        """Insert an IP range into the tree."""
-        self.root = self._insert(self.root, start, end, geoname_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    @classmethod
+    def load(
+        cls, path: str, source_digest: Optional[bytes] = None
+    ) -> Optional["GeoRangeIndex"]:
+        """
+        Memory-map an index file written by save.
+        Returns None if the file is missing, has another version, was built from
+        other source files or does not match its checksum.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) < GEO_INDEX_HEADER.size:
+            return None
 
-    def _insert(self, node: IntervalTreeNode, start: int, end: int, geoname_id):
-        if not node:
-            return IntervalTreeNode(start, end, geoname_id)
+        # Plain ndarray views of the mapping, without the memmap subclass overhead
+        buffer = np.memmap(path, dtype=np.uint8, mode="r").view(np.ndarray)
+        magic, version, country_count, range_count, source, checksum = (
+            GEO_INDEX_HEADER.unpack(buffer[: GEO_INDEX_HEADER.size].tobytes())
+        )
 
-        if start <= node.start:
-            node.left = self._insert(node.left, start, end, geoname_id)
-        else:
-            node.right = self._insert(node.right, start, end, geoname_id)
+        if magic != cls.MAGIC or version != GEO_INDEX_VERSION:
+            btul.logging.debug(f"Geo index {path} has an unsupported format")
+            return None
 
-        # Update max_end
-        node.max_end = max(node.max_end, end)
-        if node.left:
-            node.max_end = max(node.max_end, node.left.max_end)
-        if node.right:
-            node.max_end = max(node.max_end, node.right.max_end)
+        if source_digest is not None and source != source_digest:
+            btul.logging.debug(f"Geo index {path} is outdated")
+            return None
 
-        return node
+        codes_size = country_count * 2
+        offset = GEO_INDEX_HEADER.size + codes_size + (-codes_size % 8)
+        arrays = {}
+        for name, dtype in cls.FIELDS:
+            size = range_count * np.dtype(dtype).itemsize
+            arrays[name] = (offset, offset + size, dtype)
+            offset += size
+
+        payload = buffer[GEO_INDEX_HEADER.size :]
+        if len(buffer) != offset or hashlib.sha256(payload).digest() != checksum:
+            btul.logging.warning(f"⚠️ Geo index {path} is corrupted")
+            return None
 
-    def search(self, ip: int) -> Optional[int]:
-        """Find geoname_id for IP address."""
-        return self._search(self.root, ip)
+        codes = buffer[GEO_INDEX_HEADER.size : GEO_INDEX_HEADER.size + codes_size]
+        countries = [
+            x.decode("ascii") or None for x in codes.view("S2").tolist()
+        ]
+
+        return cls(
+            **{
+                name: buffer[start:end].view(dtype)
+                for name, (start, end, dtype) in arrays.items()
+            },
+            countries=countries,
+        )
 
-    def _search(self, node: IntervalTreeNode, ip: int):
-        if not node:
+    def lookup(self, ip: int) -> Optional[str]:
+        """
+        Return the country code of the IP (as integer) or None if not found.
+        """
+        # Search with a uint32 scalar, a python int would convert the whole array
+        ip = np.uint32(ip)
+        index = int(np.searchsorted(self.starts, ip, side="right")) - 1
+        if index < 0 or ip > self.ends[index]:
             return None
 
-        # Check if IP is in current node's range
-        if node.start <= ip <= node.end:
-            return node.geoname_id
+        return self.countries[self.country_ids[index]]
+
+    def lookup_many(self, ips: List[int]) -> List[Optional[str]]:
+        """
+        Return the country code of each IP (as integer), None for the ones not found.
+        """
+        ips = np.asarray(ips, dtype=np.uint32)
+        if len(self.starts) == 0:
+            return [None] * len(ips)
+
+        indexes = np.searchsorted(self.starts, ips, side="right") - 1
+        found = indexes >= 0
+        safe_indexes = np.where(found, indexes, 0)
+        found &= ips <= self.ends[safe_indexes]
+
+        country_ids = np.where(found, self.country_ids[safe_indexes], 0)
+        return [self.countries[x] for x in country_ids.tolist()]
+
+
+class GeoRange6Index(GeoRangeIndex):
+    """
+    Immutable IPv6 range table held in contiguous NumPy arrays.
+    NumPy has no 128-bit integers, so each address is split into its high and
+    low 64 bits and ranges are sorted on (high, low). A lookup searches the high
+    part first and only the ranges sharing it on the low part.
+    """
 
-        # Search left subtree if it might contain the IP
-        if node.left and node.left.max_end >= ip:
-            result = self._search(node.left, ip)
-            if result is not None:
-                return result
+    MAGIC = b"SVGEO6IX"
+
+    FIELDS = (
+        ("starts_hi", "<u8"),
+        ("starts_lo", "<u8"),
+        ("ends_hi", "<u8"),
+        ("ends_lo", "<u8"),
+        ("country_ids", "<u2"),
+    )
+
+    _LOW_MASK = (1 << 64) - 1
+
+    def __init__(
+        self,
+        starts_hi: np.ndarray,
+        starts_lo: np.ndarray,
+        ends_hi: np.ndarray,
+        ends_lo: np.ndarray,
+        country_ids: np.ndarray,
+        countries: List[Optional[str]],
+    ):
+        self.starts_hi = starts_hi
+        self.starts_lo = starts_lo
+        self.ends_hi = ends_hi
+        self.ends_lo = ends_lo
+        self.country_ids = country_ids
+        # Index 0 is reserved for "no country"
+        self.countries = countries
+
+    @classmethod
+    def from_ranges(
+        cls,
+        starts: List[int],
+        ends: List[int],
+        geoname_ids: List[int],
+        country_map: Dict[int, str],
+    ) -> "GeoRange6Index":
+        """
+        Build the index from unsorted ranges and the geoname id to country code mapping.
+        """
+        country_ids, countries = cls._map_countries(geoname_ids, country_map)
+
+        starts_hi = np.asarray([x >> 64 for x in starts], dtype=np.uint64)
+        starts_lo = np.asarray([x & cls._LOW_MASK for x in starts], dtype=np.uint64)
+        order = np.lexsort((starts_lo, starts_hi))
+
+        return cls(
+            starts_hi=starts_hi[order],
+            starts_lo=starts_lo[order],
+            ends_hi=np.asarray([x >> 64 for x in ends], dtype=np.uint64)[order],
+            ends_lo=np.asarray([x & cls._LOW_MASK for x in ends], dtype=np.uint64)[
+                order
+            ],
+            country_ids=country_ids[order],
+            countries=countries,
+        )
 
-        # Search right subtree
-        return self._search(node.right, ip)
+    def lookup(self, ip: int) -> Optional[str]:
+        """
+        Return the country code of the IP (as integer) or None if not found.
+        """
+        hi = np.uint64(ip >> 64)
+        lo = np.uint64(ip & self._LOW_MASK)
+
+        # Ranges starting with the same high part are ordered on the low part
+        left = int(np.searchsorted(self.starts_hi, hi, side="left"))
+        right = int(np.searchsorted(self.starts_hi, hi, side="right"))
+        index = left + int(np.searchsorted(self.starts_lo[left:right], lo, side="right")) - 1
+        if index < 0:
+            return None
+
+        end_hi = self.ends_hi[index]
+        if hi > end_hi or (hi == end_hi and lo > self.ends_lo[index]):
+            return None
+
+        return self.countries[self.country_ids[index]]
+
+    def lookup_many(self, ips: List[int]) -> List[Optional[str]]:
+        """
+        Return the country code of each IP (as integer), None for the ones not found.
+        """
+        hi = np.fromiter((ip >> 64 for ip in ips), dtype=np.uint64, count=len(ips))
+        lo = np.fromiter(
+            (ip & self._LOW_MASK for ip in ips), dtype=np.uint64, count=len(ips)
+        )
+        if len(self.starts_hi) == 0:
+            return [None] * len(ips)
+
+        # Bounds of the ranges starting with the same high part as each IP
+        left = np.searchsorted(self.starts_hi, hi, side="left")
+        right = np.searchsorted(self.starts_hi, hi, side="right")
+
+        # Binary search of the low part within those bounds, all IPs at once
+        last = len(self.starts_lo) - 1
+        active = left < right
+        while np.any(active):
+            middle = (left + right) // 2
+            after = self.starts_lo[np.minimum(middle, last)] > lo
+            right = np.where(active & after, middle, right)
+            left = np.where(active & ~after, middle + 1, left)
+            active = left < right
+
+        indexes = left - 1
+        found = indexes >= 0
+        safe_indexes = np.where(found, indexes, 0)
+        ends_hi = self.ends_hi[safe_indexes]
+        found &= (hi < ends_hi) | ((hi == ends_hi) & (lo <= self.ends_lo[safe_indexes]))
+
+        country_ids = np.where(found, self.country_ids[safe_indexes], 0)
+        return [self.countries[x] for x in country_ids.tolist()]
+
+
+@dataclass(frozen=True)
+class GeoSnapshot:
+    """
+    Indexes published together by a (re)load, with the cache of the lookups resolved from them.
+    A lookup reads the snapshot once, so a reload swapping it never exposes a half-built
+    index and the previous indexes stay alive until the lookups using them finish.
+    """
+
+    ipv4: GeoRangeIndex
+    ipv6: GeoRange6Index
+    cache: "OrderedDict[str, str]" = field(default_factory=OrderedDict)
+
+    @classmethod
+    def empty(cls) -> "GeoSnapshot":
+        return cls(ipv4=GeoRangeIndex.empty(), ipv6=GeoRange6Index.empty())
+
+    def index_for(self, version: int) -> GeoRangeIndex:
+        return self.ipv4 if version == 4 else self.ipv6
 
 
 class UltraFastGeoLookup:
@@ -315,16 +626,25 @@ class UltraFastGeoLookup:
     Ultra-high performance IP to country lookup optimized for metagraph usage.
     Features:
     - Startup preloading with progress indication
-    - File change detection and hot reloading
-    - Interval tree for O(log n) lookups
-    - Memory-mapped file access
+    - File change detection and hot reloading on a timer
+    - Reloads built in a worker thread and published with an atomic snapshot swap
+    - Bounded LRU cache with hit, miss and eviction counters
+    - NumPy range index with vectorised searchsorted lookups
+    - Precompiled index file memory-mapped and shared across processes
     - Thread-safe operations
     - Zero-copy where possible
     """
 
-    def __init__(self, output_dir: str = "/var/tmp", license_key: Optional[str] = None):
+    def __init__(
+        self,
+        output_dir: str = "/var/tmp",
+        license_key: Optional[str] = None,
+        cache_size: int = 10000,
+        reload_check_interval: float = 60,
+    ):
         self.output_dir = output_dir
         self.license_key = license_key
+        self.reload_check_interval = reload_check_interval
         
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
@@ -334,27 +654,33 @@ class UltraFastGeoLookup:
         self.blocks_file = os.path.join(
             self.output_dir, "GeoLite2-Country-Blocks-IPv4.csv"
         )
+        self.blocks6_file = os.path.join(
+            self.output_dir, "GeoLite2-Country-Blocks-IPv6.csv"
+        )
+        self.index_file = os.path.join(self.output_dir, "GeoLite2-Country-IPv4.idx")
+        self.index6_file = os.path.join(self.output_dir, "GeoLite2-Country-IPv6.idx")
 
         # Thread-safe data structures
         self._lock = RLock()
-        self._country_map: Dict[int, str] = {}
-        self._ip_ranges = []  # Sorted list of (start_ip, end_ip, geoname_id)
+        self._snapshot = GeoSnapshot.empty()
 
         # File monitoring
-        self._locations_mtime = 0
-        self._blocks_mtime = 0
+        self._files_mtime = ()
         self._loaded = False
         self._load_start_time = 0
         self._ready = None  # Will be created in start()
         self._initial_load_complete = False
 
-        # Performance cache - much larger for metagraph use
-        self._cache: Dict[str, str] = {}
-        self._cache_max_size = 10000
+        # LRU cache (held by the snapshot), least recently used entries first
+        self._cache_max_size = cache_size
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
 
         # CSV updater for automated downloads
         self._updater = GeoLite2Updater(self.output_dir, license_key)
         self._background_task = None
+        self._reload_task = None
         self._running = False
 
     async def start(self):
@@ -398,12 +724,15 @@ class UltraFastGeoLookup:
 
             # Load the data
             btul.logging.debug("Loading data internal...")
-            self._load_data_internal()
+            await asyncio.to_thread(self._load_data_internal)
 
+            snapshot = self._snapshot
             load_time = time.time() - start_time
             btul.logging.info(
                 f"✅ GeoLite2 data preloaded in {load_time:.2f}s: "
-                f"{len(self._country_map)} countries, interval tree ready"
+                f"{snapshot.ipv4.country_count} countries, {len(snapshot.ipv4):,} IPv4 ranges, "
+                f"{len(snapshot.ipv6):,} IPv6 ranges "
+                f"({(snapshot.ipv4.nbytes + snapshot.ipv6.nbytes) / 1024 / 1024:.1f} MiB)"
             )
             
             # Mark as ready for consumers
@@ -429,6 +758,7 @@ class UltraFastGeoLookup:
             # Create background task for updates (fire and forget)
             loop = asyncio.get_event_loop()
             self._background_task = loop.create_task(self._background_update_loop())
+            self._reload_task = loop.create_task(self._reload_check_loop())
         except RuntimeError:
             # No event loop running, updates will be manual
             btul.logging.debug(
@@ -445,19 +775,11 @@ class UltraFastGeoLookup:
                 if updated:
                     btul.logging.info("🔄 GeoLite2 files updated, reloading data...")
                     try:
-                        # Temporarily mark as not ready during reload to prevent exceptions
-                        if self._ready:
-                            self._ready.clear()
-                        self._load_data_internal()
-                        # Mark as ready again after successful reload
-                        if self._ready:
-                            self._ready.set()
+                        # Lookups keep using the current snapshot until the new one is published
+                        await asyncio.to_thread(self._load_data_internal)
                         btul.logging.info("✅ GeoLite2 data reloaded successfully")
                     except Exception as e:
                         btul.logging.error(f"❌ Failed to reload GeoLite2 data: {e}")
-                        # Re-mark as ready to continue operations (will use cache or fallback)
-                        if self._ready:
-                            self._ready.set()
 
                 # Sleep for 6 hours before next check
                 await asyncio.sleep(6 * 3600)
@@ -470,86 +792,140 @@ class UltraFastGeoLookup:
                 # Sleep shorter on error, then retry
                 await asyncio.sleep(30 * 60)  # 30 minutes
 
+    async def _reload_check_loop(self):
+        """Background loop that hot reloads the data when the CSV files change."""
+        while self._running:
+            try:
+                await asyncio.sleep(self.reload_check_interval)
+                await asyncio.to_thread(self._reload_if_changed)
+
+            except asyncio.CancelledError:
+                btul.logging.debug("Reload check task cancelled")
+                break
+            except Exception as e:
+                btul.logging.warning(f"Reload check error: {e}")
+
     def stop_background_updates(self):
-        """Stop background update task."""
-        if self._background_task and not self._background_task.done():
-            self._background_task.cancel()
+        """Stop background update tasks."""
+        for task in (self._background_task, self._reload_task):
+            if task and not task.done():
+                task.cancel()
+
+    def _get_files_mtime(self) -> tuple:
+        """Return the modification time of each CSV file, 0 for the missing ones."""
+        return tuple(
+            os.path.getmtime(x) if os.path.exists(x) else 0
+            for x in (self.locations_file, self.blocks_file, self.blocks6_file)
+        )
 
     def _check_file_changes(self) -> bool:
         """Check if CSV files have been modified."""
         try:
-            locations_mtime = (
-                os.path.getmtime(self.locations_file)
-                if os.path.exists(self.locations_file)
-                else 0
-            )
-            blocks_mtime = (
-                os.path.getmtime(self.blocks_file)
-                if os.path.exists(self.blocks_file)
-                else 0
-            )
-
-            if (
-                locations_mtime != self._locations_mtime
-                or blocks_mtime != self._blocks_mtime
-            ):
-                self._locations_mtime = locations_mtime
-                self._blocks_mtime = blocks_mtime
+            files_mtime = self._get_files_mtime()
+            if files_mtime != self._files_mtime:
+                self._files_mtime = files_mtime
                 return True
             return False
         except OSError:
             return False
 
     def _load_data_internal(self):
-        """Internal data loading with maximum performance."""
+        """
+        Build the indexes and publish them in a new snapshot.
+        Safe to run in a worker thread: lookups keep using the previous snapshot
+        until the reference is swapped.
+        """
         with self._lock:
             # Always update file times first to prevent infinite recursion
-            self._locations_mtime = (
-                os.path.getmtime(self.locations_file)
-                if os.path.exists(self.locations_file)
-                else 0
-            )
-            self._blocks_mtime = (
-                os.path.getmtime(self.blocks_file)
-                if os.path.exists(self.blocks_file)
-                else 0
-            )
+            self._files_mtime = self._get_files_mtime()
 
             btul.logging.debug("📊 Loading GeoLite2 data...")
+            index, index6 = self._build_indexes()
 
-            # Clear previous data
-            self._country_map.clear()
-            self._ip_ranges.clear()
-            self._cache.clear()
+            # Publish the new indexes with an empty cache in a single reference swap
+            self._snapshot = GeoSnapshot(ipv4=index, ipv6=index6)
+            self._loaded = True
 
-            # Load country mappings with memory-mapped file for large files
-            if os.path.exists(self.locations_file):
-                self._load_locations_optimized()
+    def _build_indexes(self):
+        """Return the IPv4 and IPv6 range indexes of the current CSV files."""
+        # Use the precompiled indexes if they have been built from the current CSV files
+        source_digest = compute_files_digest(
+            [self.locations_file, self.blocks_file, self.blocks6_file]
+        )
+        index = GeoRangeIndex.load(self.index_file, source_digest)
+        index6 = GeoRange6Index.load(self.index6_file, source_digest)
+        if index is not None and index6 is not None:
+            btul.logging.debug(
+                f"Loaded precompiled indexes {self.index_file} and {self.index6_file}"
+            )
+            return index, index6
 
-            # Load IP blocks and build interval tree
-            if os.path.exists(self.blocks_file):
-                btul.logging.debug("Loading blocks file...")
-                self._load_blocks_optimized()
+        if os.path.exists(self.blocks_file) or os.path.exists(self.blocks6_file):
+            return self._compile_indexes(source_digest)
 
-            self._loaded = True
+        return GeoRangeIndex.empty(), GeoRange6Index.empty()
+
+    def _compile_indexes(self, source_digest: bytes):
+        """
+        Build the IPv4 and IPv6 range indexes from the CSV files and write them
+        as precompiled index files.
+        """
+        country_map = (
+            self._load_locations_optimized()
+            if os.path.exists(self.locations_file)
+            else {}
+        )
+
+        indexes = []
+        for index_class, blocks_file, index_file in (
+            (GeoRangeIndex, self.blocks_file, self.index_file),
+            (GeoRange6Index, self.blocks6_file, self.index6_file),
+        ):
+            if os.path.exists(blocks_file):
+                btul.logging.debug(f"Loading blocks file {blocks_file}...")
+                index = self._load_blocks_optimized(
+                    country_map, blocks_file, index_class
+                )
+            else:
+                index = index_class.empty()
+
+            try:
+                index.save(index_file, source_digest)
+                btul.logging.debug(f"Compiled geo index {index_file}")
+            except OSError as e:
+                btul.logging.warning(f"Could not write geo index {index_file}: {e}")
+
+            indexes.append(index)
 
-    def _load_locations_optimized(self):
-        """Load country locations with memory-mapped access."""
+        return tuple(indexes)
+
+    def _load_locations_optimized(self) -> Dict[int, str]:
+        """Load the geoname id to country code mapping."""
+        country_map: Dict[int, str] = {}
         with open(self.locations_file, "r", encoding="utf-8") as f:
             reader = csv.DictReader(f)
             for row in reader:
                 geoname_id = row.get("geoname_id")
                 country_code = row.get("country_iso_code")
                 if geoname_id and country_code:
-                    self._country_map[int(geoname_id)] = country_code
+                    country_map[int(geoname_id)] = country_code
+
+        return country_map
 
-    def _load_blocks_optimized(self):
-        """Load IP blocks and build interval tree with progress."""
+    def _load_blocks_optimized(
+        self,
+        country_map: Dict[int, str],
+        blocks_file: str,
+        index_class=GeoRangeIndex,
+    ) -> GeoRangeIndex:
+        """Load IP blocks and build the range index with progress."""
         processed = 0
-        blocks_data = []
+        starts = []
+        ends = []
+        geoname_ids = []
 
         # First pass: collect all data
-        with open(self.blocks_file, "r", encoding="utf-8") as f:
+        with open(blocks_file, "r", encoding="utf-8") as f:
             reader = csv.DictReader(f)
 
             for row in reader:
@@ -559,11 +935,10 @@ class UltraFastGeoLookup:
                 if network and geoname_id:
                     try:
                         # Parse CIDR network to start/end IPs
-                        net = ipaddress.IPv4Network(network, strict=False)
-                        start_ip = int(net.network_address)
-                        end_ip = int(net.broadcast_address)
-
-                        blocks_data.append((start_ip, end_ip, int(geoname_id)))
+                        net = ipaddress.ip_network(network, strict=False)
+                        starts.append(int(net.network_address))
+                        ends.append(int(net.broadcast_address))
+                        geoname_ids.append(int(geoname_id))
                         processed += 1
 
                         # Progress indicator for large datasets
@@ -573,16 +948,19 @@ class UltraFastGeoLookup:
                                 f"📈 Collected {processed:,} IP ranges in {elapsed:.1f}s"
                             )
 
-                    except (ValueError, ipaddress.AddressValueError):
+                    except ValueError:
                         continue
 
-        # Sort IP ranges for binary search
-        btul.logging.debug(f"Sorting {len(blocks_data)} IP blocks for binary search...")
-        blocks_data.sort(key=lambda x: x[0])  # Sort by start IP
-        
-        # Store sorted ranges
-        self._ip_ranges = blocks_data
-        btul.logging.debug(f"✅ Stored {len(self._ip_ranges)} IP ranges for ultra-fast lookups")
+        # Build the sorted range index
+        btul.logging.debug(f"Indexing {len(starts)} IP blocks...")
+        index = index_class.from_ranges(
+            starts=starts,
+            ends=ends,
+            geoname_ids=geoname_ids,
+            country_map=country_map,
+        )
+        btul.logging.debug(f"✅ Stored {len(index)} IP ranges for ultra-fast lookups")
+        return index
 
     async def wait_for_ready(self, timeout: Optional[float] = 30.0):
         """Wait for the geo lookup service to be ready for use."""
@@ -612,85 +990,140 @@ class UltraFastGeoLookup:
             btul.logging.debug(f"GeoLite2 data not ready yet for {ip_str} - will use API fallback")
             return None
             
+        # Read the snapshot once so a concurrent reload cannot change it under us
+        snapshot = self._snapshot
+
         # Check cache first (fastest path)
-        cached = self._cache.get(ip_str)
+        cached = self._cache_get(snapshot.cache, ip_str)
         if cached is not None:
             return cached if cached != "__NOT_FOUND__" else None
 
-        # Hot reload if files changed
-        if self._check_file_changes():
+        try:
+            ip = self._parse_ip(ip_str)
+        except ValueError:
+            self._cache_result(snapshot.cache, ip_str, None)
+            return None
+
+        # Search through sorted IP ranges - O(log n)
+        country = snapshot.index_for(ip.version).lookup(int(ip))
+        self._cache_result(snapshot.cache, ip_str, country)
+        return country
+
+    def lookup_countries(self, ips: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Batch IP to country lookup, resolving every cache miss in one vectorised search.
+        Returns a mapping ip -> country code (or None if not found).
+        """
+        if self._ready is None or not self._ready.is_set():
+            return {ip: None for ip in ips}
+
+        # Read the snapshot once so a concurrent reload cannot change it under us
+        snapshot = self._snapshot
+
+        results: Dict[str, Optional[str]] = {}
+        misses: List[str] = []
+        for ip_str in dict.fromkeys(ips):
+            cached = self._cache_get(snapshot.cache, ip_str)
+            if cached is not None:
+                results[ip_str] = cached if cached != "__NOT_FOUND__" else None
+            else:
+                misses.append(ip_str)
+
+        if not misses:
+            return results
+
+        # Split the misses per address family, each one having its own index
+        families = {4: ([], []), 6: ([], [])}
+        for ip_str in misses:
             try:
-                # Temporarily mark as not ready during reload to prevent race conditions
-                if self._ready:
-                    self._ready.clear()
+                ip = self._parse_ip(ip_str)
+            except ValueError:
+                results[ip_str] = None
+                self._cache_result(snapshot.cache, ip_str, None)
+                continue
+
+            valid_ips, ip_ints = families[ip.version]
+            valid_ips.append(ip_str)
+            ip_ints.append(int(ip))
+
+        for version, (valid_ips, ip_ints) in families.items():
+            if not valid_ips:
+                continue
+
+            countries = snapshot.index_for(version).lookup_many(ip_ints)
+            for ip_str, country in zip(valid_ips, countries):
+                results[ip_str] = country
+                self._cache_result(snapshot.cache, ip_str, country)
+
+        return results
+
+    @staticmethod
+    def _parse_ip(ip_str: str):
+        """
+        Parse an IPv4 or IPv6 address, IPv4-mapped IPv6 addresses being returned as IPv4.
+        Raises ValueError if the address is invalid.
+        """
+        ip = ipaddress.ip_address(ip_str)
+        if ip.version == 6 and ip.ipv4_mapped:
+            return ip.ipv4_mapped
+
+        return ip
+
+    def _reload_if_changed(self) -> bool:
+        """
+        Reload the data if the CSV files changed, once the updater has replaced all of them.
+        Returns False if the reload failed, True otherwise.
+        """
+        with self._updater.lock:
+            if not self._check_file_changes():
+                return True
+
+            try:
+                # Lookups keep using the current snapshot until the new one is published
                 self._load_data_internal()
-                # Mark as ready again after successful reload
-                if self._ready:
-                    self._ready.set()
+                return True
             except Exception as e:
                 btul.logging.error(f"❌ Failed to hot reload GeoLite2 data: {e}")
-                # Re-mark as ready to continue operations
-                if self._ready:
-                    self._ready.set()
-                # Return None to trigger API fallback for this lookup
-                return None
+                return False
 
-        try:
-            # Convert IP to integer for binary search
-            ip_int = int(ipaddress.IPv4Address(ip_str))
-
-            # Binary search through sorted IP ranges - O(log n)
-            geoname_id = self._binary_search_ip_ranges(ip_int)
-            if geoname_id is None:
-                # Cache negative result
-                self._cache_result(ip_str, None)
-                return None
-
-            # Get country code
-            country = self._country_map.get(geoname_id)
-            self._cache_result(ip_str, country)
-            return country
-
-        except (ValueError, ipaddress.AddressValueError):
-            self._cache_result(ip_str, None)
+    def _cache_get(self, cache: OrderedDict, ip_str: str) -> Optional[str]:
+        """Return the cached value and mark it as most recently used, None on a miss."""
+        cached = cache.get(ip_str)
+        if cached is None:
+            self._cache_misses += 1
             return None
 
-    def _binary_search_ip_ranges(self, ip_int: int) -> Optional[int]:
-        """Binary search to find the geoname_id for an IP address."""
-        if not self._ip_ranges:
-            return None
-        
-        left, right = 0, len(self._ip_ranges) - 1
-        
-        while left <= right:
-            mid = (left + right) // 2
-            start_ip, end_ip, geoname_id = self._ip_ranges[mid]
-            
-            if start_ip <= ip_int <= end_ip:
-                return geoname_id
-            elif ip_int < start_ip:
-                right = mid - 1
-            else:
-                left = mid + 1
-        
-        return None
+        self._cache_hits += 1
+        cache.move_to_end(ip_str)
+        return cached
 
-    def _cache_result(self, ip_str: str, country: Optional[str]):
-        """Cache result with LRU-style eviction."""
-        if len(self._cache) >= self._cache_max_size:
-            # Simple eviction - remove first 1000 entries
-            keys_to_remove = list(self._cache.keys())[:1000]
-            for key in keys_to_remove:
-                del self._cache[key]
+    def _cache_result(self, cache: OrderedDict, ip_str: str, country: Optional[str]):
+        """Cache result, evicting the least recently used entries when full."""
+        if self._cache_max_size <= 0:
+            return
 
         # Cache result (use special marker for None to distinguish from cache miss)
-        self._cache[ip_str] = country if country is not None else "__NOT_FOUND__"
+        cache[ip_str] = country if country is not None else "__NOT_FOUND__"
+        cache.move_to_end(ip_str)
+
+        while len(cache) > self._cache_max_size:
+            cache.popitem(last=False)
+            self._cache_evictions += 1
 
     def get_stats(self) -> Dict[str, int]:
         """Get performance statistics."""
+        snapshot = self._snapshot
+        lookups = self._cache_hits + self._cache_misses
         return {
-            "countries": len(self._country_map),
-            "cached_lookups": len(self._cache),
-            "cache_hit_potential": min(len(self._cache), self._cache_max_size),
+            "countries": snapshot.ipv4.country_count,
+            "ip_ranges": len(snapshot.ipv4),
+            "ipv6_ranges": len(snapshot.ipv6),
+            "index_bytes": snapshot.ipv4.nbytes + snapshot.ipv6.nbytes,
+            "cached_lookups": len(snapshot.cache),
+            "cache_max_size": self._cache_max_size,
+            "cache_hits": self._cache_hits,
+            "cache_misses": self._cache_misses,
+            "cache_evictions": self._cache_evictions,
+            "cache_hit_rate": self._cache_hits / lookups if lookups else 0.0,
             "running": self._running,
         }
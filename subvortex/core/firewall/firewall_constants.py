@@ -21,3 +21,33 @@ FIREWALL_LOGGING_NAME = "Firewall"
 FIREWALL_ATTEMPTS = 5
 FIREWALL_SLEEP = 60  # Every minute
 FIREWALL_REQUEST_HISTORY_DURATION = 60  # Keep history for 60 seconds
+FIREWALL_COUNTER_BUCKETS = 60  # Number of buckets of the sliding window counters
+FIREWALL_SKETCH_EXACT_VALUES = 128  # Request rates counted exactly by the quantile sketches
+FIREWALL_SKETCH_RELATIVE_ACCURACY = 0.02  # Relative error of the greater request rates
+FIREWALL_SIGNATURE_CACHE_SIZE = 10000  # Number of verified signatures kept
+FIREWALL_NONCE_WINDOW = 60 * 1_000_000_000  # Nonces older than 60 seconds than the newest one of the hotkey are replays
+FIREWALL_HEADERS_MAX_SIZE = 16384  # Bytes of a payload searched for the headers of a synapse
+FIREWALL_SOURCE_RETENTION = 3600  # Remember the last state of an inactive source for an hour
+FIREWALL_SWEEP_INTERVAL = 1  # Sweep the expired requests every second
+FIREWALL_SWEEP_BATCH = 1000  # Number of sources cleaned per queue and sweep at most
+FIREWALL_DROP_SET = "subvortex-drop"  # Ip set of the sources dropped by the kernel
+FIREWALL_DROP_THRESHOLD = 5  # Denied connections of a source before it is dropped by the kernel
+FIREWALL_DROP_WINDOW = 60  # Count the denied connections of a source over the last minute
+FIREWALL_DROP_TIMEOUT = 300  # Drop a source in the kernel for 5 minutes
+FIREWALL_EVENTS_DIRECTORY = "firewall-events"  # Directory of the segments of the event log
+FIREWALL_EVENTS_SEGMENT_SIZE = 4 * 1024 * 1024  # Bytes of a segment before starting a new one
+FIREWALL_EVENTS_COMPACTION_RATIO = 0.5  # Rewrite a segment once half of its events are removed
+FIREWALL_EVENTS_COMPACTION_INTERVAL = 60  # Compact the event log every minute
+FIREWALL_EVENTS_REPLAY_SIZE = 10000  # Recent events sent to the new subscribers of the event stream
+FIREWALL_SNAPSHOT_FILE = "firewall-snapshot.json"  # File of the snapshot of the firewall state
+FIREWALL_SNAPSHOT_INTERVAL = 60  # Snapshot the firewall state every minute
+FIREWALL_EVENTS_PAYLOAD_SIZE = 1024  # Bytes of a payload kept in an event, 0 to omit the payloads
+
+# Ports processed by the firewall with the name of their queues and
+# true if their payloads can contain synapses, false otherwise
+FIREWALL_QUEUED_PORTS = [
+    ("Miner", 8091, True),
+    ("SubtensorWS", 9944, False),
+    ("SubtensorRPC", 9933, False),
+    ("SubtensorP2P", 30333, False),
+]
@@ -0,0 +1,235 @@
+# The MIT License (MIT)
+# Copyright © 2024 Eclipse Vortex
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+import math
+
+from subvortex.core.firewall.firewall_constants import (
+    FIREWALL_COUNTER_BUCKETS,
+    FIREWALL_SKETCH_EXACT_VALUES,
+    FIREWALL_SKETCH_RELATIVE_ACCURACY,
+)
+
+
+class SlidingWindowCounter:
+    """
+    Count events over a sliding time window with a ring of fixed size buckets.
+    Adding an event and counting the events of the window are O(1) amortised,
+    whatever the number of events received.
+    The window slides by one bucket (window / buckets seconds) at a time.
+    """
+
+    def __init__(self, window, buckets: int = FIREWALL_COUNTER_BUCKETS):
+        self.window = window
+        self.resolution = float(window) / buckets
+        self._counts = [0] * buckets
+        self._head = None
+        self._total = 0
+
+    def add(self, current_time, count: int = 1):
+        """
+        Add count events received at current_time
+        Events older than the newest bucket are accounted in the newest bucket
+        """
+        self._advance(current_time)
+
+        self._counts[self._head % len(self._counts)] += count
+        self._total += count
+
+    def count(self, current_time):
+        """
+        Number of events received in the window ending at current_time
+        """
+        self._advance(current_time)
+        return self._total
+
+    def to_state(self):
+        """
+        Compact state of the counter, to be restored by from_state
+        """
+        return [self.window, self._head, self._counts]
+
+    @classmethod
+    def from_state(cls, state):
+        window, head, counts = state
+        instance = cls(window=window, buckets=len(counts))
+        instance._head = head
+        instance._counts = list(counts)
+        instance._total = sum(counts)
+        return instance
+
+    def _advance(self, current_time):
+        index = int(current_time // self.resolution)
+
+        if self._head is None:
+            self._head = index
+            return
+
+        if index <= self._head:
+            return
+
+        size = len(self._counts)
+        if index - self._head >= size:
+            # The whole window has expired
+            self._counts = [0] * size
+            self._total = 0
+        else:
+            # Expire the buckets the window slid over
+            for i in range(self._head + 1, index + 1):
+                slot = i % size
+                self._total -= self._counts[slot]
+                self._counts[slot] = 0
+
+        self._head = index
+
+
+class QuantileSketch:
+    """
+    Streaming histogram of non negative values supporting insertions and deletions.
+    Values lower than exact_values are counted exactly, greater values are counted in
+    logarithmic buckets with a bounded relative error.
+    The memory and the cost of a query only depend on the number of buckets,
+    not on the number of values inserted.
+    """
+
+    def __init__(
+        self,
+        exact_values: int = FIREWALL_SKETCH_EXACT_VALUES,
+        relative_accuracy: float = FIREWALL_SKETCH_RELATIVE_ACCURACY,
+        max_value: int = 2**32,
+    ):
+        self.exact_values = exact_values
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+        size = exact_values + int(math.log(max_value / exact_values) / self._log_gamma) + 1
+        self._counts = [0] * size
+        self._sums = [0] * size
+        self.total = 0
+
+    def __len__(self):
+        return self.total
+
+    def add(self, value):
+        index = self._index(value)
+        self._counts[index] += 1
+        self._sums[index] += value
+        self.total += 1
+
+    def remove(self, value):
+        index = self._index(value)
+        if self._counts[index] == 0:
+            return
+
+        self._counts[index] -= 1
+        self._sums[index] -= value
+        self.total -= 1
+
+    def quantile(self, q: float):
+        """
+        Value at the quantile q, linearly interpolated between the closest ranks like numpy.percentile
+        """
+        if self.total == 0:
+            return 0
+
+        rank = q * (self.total - 1)
+        lower_rank = int(rank)
+        upper_rank = min(lower_rank + 1, self.total - 1)
+
+        lower = upper = None
+        seen = 0
+        for index, count in enumerate(self._counts):
+            if count == 0:
+                continue
+
+            seen += count
+            if lower is None and seen > lower_rank:
+                lower = self._value(index)
+
+            if seen > upper_rank:
+                upper = self._value(index)
+                break
+
+        return lower + (upper - lower) * (rank - lower_rank)
+
+    def summary(self, upper):
+        """
+        Number, sum and maximum of the values lower or equal to upper
+        """
+        count, total, maximum = 0, 0, 0
+        for index, bucket_count in enumerate(self._counts):
+            if bucket_count == 0:
+                continue
+
+            value = self._value(index)
+            if value > upper:
+                break
+
+            count += bucket_count
+            total += self._sums[index]
+            maximum = value
+
+        return count, total, maximum
+
+    def _index(self, value):
+        if value < self.exact_values:
+            return int(value)
+
+        index = self.exact_values + int(
+            math.log(value / self.exact_values) / self._log_gamma
+        )
+        return min(index, len(self._counts) - 1)
+
+    def _value(self, index):
+        if index < self.exact_values:
+            return index
+
+        # Mean of the values of the bucket
+        return self._sums[index] / self._counts[index]
+
+
+class RateStatistics:
+    """
+    Streaming statistics of the requests received by a port over a sliding time window:
+    the total number of requests and the distribution of the number of requests per source.
+    Updating and querying them does not depend on the number of sources.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.requests = SlidingWindowCounter(window=window)
+        self.rates = QuantileSketch()
+        self._rates = {}
+
+    def __contains__(self, id):
+        return id in self._rates
+
+    def update(self, id, rate):
+        """
+        Record the number of requests of the source in the window
+        """
+        previous = self._rates.get(id)
+        if previous is not None:
+            self.rates.remove(previous)
+
+        self.rates.add(rate)
+        self._rates[id] = rate
+
+    def remove(self, id):
+        """
+        Forget the source
+        """
+        previous = self._rates.pop(id, None)
+        if previous is not None:
+            self.rates.remove(previous)
@@ -0,0 +1,361 @@
+# The MIT License (MIT)
+# Copyright © 2024 Eclipse Vortex
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+import os
+import json
+import threading
+from typing import Dict, List, Set, Tuple
+
+from subvortex.core.firewall.firewall_constants import (
+    FIREWALL_EVENTS_DIRECTORY,
+    FIREWALL_EVENTS_SEGMENT_SIZE,
+    FIREWALL_EVENTS_COMPACTION_RATIO,
+)
+
+TOMBSTONES = "tombstones.json"
+
+
+class FirewallEventLog:
+    """
+    Append-only log of the firewall events, stored as size-bounded NDJSON segments.
+    Each event is stored, as serialised by the caller, with its sequence number and a segment is named
+    after the sequence number of its first event.
+    Removing the events of a request appends the request id to a tombstone file, the removed events are skipped
+    when reading and dropped from the disk by the compaction.
+    Appending and removing are O(1) amortised, whatever the size of the history.
+    """
+
+    def __init__(
+        self,
+        directory: str = FIREWALL_EVENTS_DIRECTORY,
+        segment_size: int = FIREWALL_EVENTS_SEGMENT_SIZE,
+        compaction_ratio: float = FIREWALL_EVENTS_COMPACTION_RATIO,
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.compaction_ratio = compaction_ratio
+
+        self._lock = threading.RLock()
+        self._file = None
+        self._tombstones = None
+
+        self._seq = 0
+        """
+        Sequence number of the next event
+        """
+
+        self._active = 0
+        """
+        Segment the events are appended to, the only one never compacted
+        """
+
+        self._segments: Dict[int, List[int]] = {}
+        """
+        Number of events and number of events not removed of each segment
+        """
+
+        self._requests: Dict[str, Dict[int, int]] = {}
+        """
+        Number of events of each request not removed, by segment
+        """
+
+        self._removed: Dict[str, Set[int]] = {}
+        """
+        Segments still storing events of each removed request
+        """
+
+    @property
+    def is_open(self):
+        return self._file is not None
+
+    @property
+    def cursor(self):
+        """
+        Cursor of the next event appended
+        """
+        with self._lock:
+            return self._seq
+
+    def open(self):
+        """
+        Open the log and rebuild its index from the segments and the tombstones
+        """
+        with self._lock:
+            if self._file is not None:
+                return
+
+            os.makedirs(self.directory, exist_ok=True)
+
+            removed = set()
+            path = os.path.join(self.directory, TOMBSTONES)
+            if os.path.exists(path):
+                with open(path, "r") as file:
+                    removed = {line.strip() for line in file if line.strip()}
+
+            for segment in self._list_segments():
+                total, live = 0, 0
+                with open(self._get_path(segment), "r") as file:
+                    for line in file:
+                        record = self._decode(line)
+                        if record is None:
+                            continue
+
+                        id = record["event"]["request_id"]
+                        total += 1
+                        self._seq = max(self._seq, record["seq"] + 1)
+
+                        if id in removed:
+                            self._removed.setdefault(id, set()).add(segment)
+                            continue
+
+                        live += 1
+                        segments = self._requests.setdefault(id, {})
+                        segments[segment] = segments.get(segment, 0) + 1
+
+                self._segments[segment] = [total, live]
+
+            # Keep the tombstones of the requests without events on disk until the next compaction
+            for id in removed:
+                self._removed.setdefault(id, set())
+
+            self._active = max(self._segments, default=self._seq)
+            self._segments.setdefault(self._active, [0, 0])
+
+            self._terminate_line(self._get_path(self._active))
+            self._terminate_line(path)
+            self._file = open(self._get_path(self._active), "a")
+            self._tombstones = open(path, "a")
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._file.close()
+            self._tombstones.close()
+            self._file = None
+            self._tombstones = None
+
+    def append(self, events: List[Tuple[str, str]]):
+        """
+        Append the events, given as their request id and their json, the ones of removed requests are ignored
+        """
+        if len(events) == 0:
+            return
+
+        with self._lock:
+            lines = []
+            for id, event in events:
+                if id in self._removed:
+                    continue
+
+                lines.append(f'{{"seq": {self._seq}, "event": {event}}}')
+                self._seq += 1
+
+                segments = self._requests.setdefault(id, {})
+                segments[self._active] = segments.get(self._active, 0) + 1
+
+            if len(lines) == 0:
+                return
+
+            counts = self._segments[self._active]
+            counts[0] += len(lines)
+            counts[1] += len(lines)
+
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+            if self._file.tell() >= self.segment_size:
+                self._rotate()
+
+    def remove(self, request_ids: List[str]):
+        """
+        Remove the events of the requests
+        """
+        with self._lock:
+            ids = [x for x in request_ids if x not in self._removed]
+            if len(ids) == 0:
+                return
+
+            for id in ids:
+                segments = self._requests.pop(id, {})
+                for segment, count in segments.items():
+                    self._segments[segment][1] -= count
+
+                self._removed[id] = set(segments)
+
+            self._tombstones.write("\n".join(ids) + "\n")
+            self._tombstones.flush()
+
+    def read(self, cursor: int = 0):
+        """
+        Return the events not removed from the cursor, and the cursor of the next event
+        """
+        with self._lock:
+            self._file.flush()
+            segments = sorted(self._segments)
+            end = self._seq
+
+        events = []
+        for i, segment in enumerate(segments):
+            # Skip the segments before the one of the cursor
+            if i + 1 < len(segments) and segments[i + 1] <= cursor:
+                continue
+
+            try:
+                file = open(self._get_path(segment), "r")
+            except FileNotFoundError:
+                # The segment has been compacted away
+                continue
+
+            with file:
+                for line in file:
+                    record = self._decode(line)
+                    if record is None:
+                        continue
+
+                    seq, event = record["seq"], record["event"]
+                    if seq < cursor or seq >= end:
+                        continue
+
+                    if event["request_id"] in self._removed:
+                        continue
+
+                    events.append(event)
+
+        return events, end
+
+    def compact(self):
+        """
+        Delete the segments without events left, rewrite the ones mostly removed and trim the tombstones
+        """
+        if not self.is_open:
+            return
+
+        with self._lock:
+            candidates = [
+                (segment, live)
+                for segment, (total, live) in self._segments.items()
+                if segment != self._active
+                and (live == 0 or live < total * self.compaction_ratio)
+            ]
+
+        compacted = set()
+        dropped = {}
+        for segment, live in candidates:
+            path = self._get_path(segment)
+
+            if live == 0:
+                # The events of a closed segment can only be removed, so it stays empty
+                with self._lock:
+                    os.remove(path)
+                    del self._segments[segment]
+                    compacted.add(segment)
+                continue
+
+            # Rewrite the segment without the removed events
+            lines, ids = [], set()
+            with open(path, "r") as file:
+                for line in file:
+                    record = self._decode(line)
+                    if record is None:
+                        continue
+
+                    id = record["event"]["request_id"]
+                    if id in self._removed:
+                        ids.add(id)
+                        continue
+
+                    lines.append(line)
+
+            with open(f"{path}.tmp", "w") as file:
+                file.writelines(lines)
+
+            with self._lock:
+                os.replace(f"{path}.tmp", path)
+
+                # Requests removed during the rewrite are dropped at the next compaction
+                self._segments[segment][0] = len(lines)
+                dropped[segment] = ids
+
+        with self._lock:
+            count = len(self._removed)
+            for id, segments in list(self._removed.items()):
+                segments -= compacted
+                segments -= {x for x in segments if id in dropped.get(x, ())}
+                if len(segments) == 0:
+                    del self._removed[id]
+
+            if len(self._removed) == count or not self.is_open:
+                return
+
+            # Keep the tombstones of the requests still stored
+            path = os.path.join(self.directory, TOMBSTONES)
+            with open(f"{path}.tmp", "w") as file:
+                file.writelines(f"{id}\n" for id in self._removed)
+
+            self._tombstones.close()
+            os.replace(f"{path}.tmp", path)
+            self._tombstones = open(path, "a")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "events": sum(x[0] for x in self._segments.values()),
+                "live_events": sum(x[1] for x in self._segments.values()),
+                "removed_requests": len(self._removed),
+            }
+
+    def _rotate(self):
+        self._file.close()
+
+        self._active = self._seq
+        self._segments[self._active] = [0, 0]
+        self._file = open(self._get_path(self._active), "a")
+
+    def _list_segments(self):
+        segments = []
+        for name in os.listdir(self.directory):
+            base, ext = os.path.splitext(name)
+            if ext == ".json" and base.isdigit():
+                segments.append(int(base))
+
+        return sorted(segments)
+
+    def _get_path(self, segment: int):
+        return os.path.join(self.directory, f"{segment:020d}.json")
+
+    @staticmethod
+    def _decode(line: str):
+        try:
+            return json.loads(line) if line.strip() else None
+        except ValueError:
+            # Last line partially written when the process stopped
+            return None
+
+    @staticmethod
+    def _terminate_line(path: str):
+        """
+        Make sure the next line appended does not extend a partially written one
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        with open(path, "rb+") as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b"\n":
+                file.write(b"\n")
@@ -30,6 +30,7 @@ class FirewallLinuxObserver(FirewallObserver):
         self._threads = []
         self._queues = []
         self._callbacks = {}
+        self._parse_headers = {}
 
     def subscribe(self, *args, **kwargs):
         name = kwargs.get("name", None)
@@ -48,6 +49,9 @@ class FirewallLinuxObserver(FirewallObserver):
         self._queues.append((name, queue))
         self._callbacks[queue_num] = callback
 
+        # Only the queues receiving synapses need to parse the headers of the payload
+        self._parse_headers[queue_num] = kwargs.get("parse_headers", True)
+
     def start(self):
         """
         Start all queue in a thread
@@ -80,7 +84,10 @@ class FirewallLinuxObserver(FirewallObserver):
 
                 # Create a packet instance
                 instance = FirewallPacket.from_packet(
-                    packet=packet, current_time=current_time, queue_num=queue_num
+                    packet=packet,
+                    current_time=current_time,
+                    queue_num=queue_num,
+                    parse_headers=self._parse_headers.get(queue_num, True),
                 )
 
                 callback = self._callbacks.get(queue_num)
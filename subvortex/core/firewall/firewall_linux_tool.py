@@ -16,10 +16,147 @@
 # DEALINGS IN THE SOFTWARE.
 import subprocess
 
+import bittensor.utils.btlogging as btul
+
 from subvortex.core.firewall.firewall_tool import FirewallTool
 
 
+def get_rule_spec(
+    ip=None,
+    sport=None,
+    dport=None,
+    protocol="tcp",
+    allow=True,
+    queue=None,
+    interface=None,
+    match_set=None,
+    match_set_flags="src",
+):
+    """
+    Specification of an INPUT rule as listed by iptables -S, so it can be compared with the current ruleset
+    """
+    spec = []
+
+    if ip is not None:
+        spec += ["-s", ip if "/" in ip else f"{ip}/32"]
+
+    if interface is not None:
+        spec += ["-i", interface]
+
+    if dport is not None:
+        spec += ["-p", protocol, "-m", protocol, "--dport", str(dport)]
+    elif sport is not None:
+        spec += ["-p", protocol, "-m", protocol, "--sport", str(sport)]
+
+    if match_set is not None:
+        spec += ["-m", "set", "--match-set", match_set, match_set_flags]
+
+    if queue is not None:
+        spec += ["-j", "NFQUEUE", "--queue-num", str(queue)]
+    else:
+        spec += ["-j", "ACCEPT" if allow else "DROP"]
+
+    return " ".join(spec)
+
+
 class FirewallLinuxTool(FirewallTool):
+    def __init__(self):
+        # Specifications of the rules set by the last apply_rules
+        self._applied = []
+
+    def get_rules(self):
+        """
+        Return the policy and the rule specifications of the INPUT chain
+        """
+        result = subprocess.run(
+            ["iptables", "-S", "INPUT"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None, []
+
+        policy, rules = None, []
+        for line in result.stdout.splitlines():
+            if line.startswith("-P INPUT "):
+                policy = line[len("-P INPUT ") :].strip()
+            elif line.startswith("-A INPUT "):
+                rules.append(line[len("-A INPUT ") :].strip())
+
+        return policy, rules
+
+    def apply_rules(self, rules, policy=None):
+        """
+        Bring the INPUT chain to the rules and the policy in one iptables-restore transaction.
+        Only the missing rules are added and the previously applied ones no more wanted are removed,
+        as well as any queue rule no more wanted, as the ones of a previous run are not known.
+        Deny rules are inserted first so they are matched before any accept or queue rule.
+        """
+        current_policy, current_rules = self.get_rules()
+        current = set(current_rules)
+
+        desired = {}
+        for rule in rules:
+            desired.setdefault(get_rule_spec(**rule), rule.get("allow", True))
+
+        lines = []
+        if policy is not None and policy != current_policy:
+            lines.append(f":INPUT {policy} [0:0]")
+
+        for spec in current_rules:
+            if spec in desired:
+                continue
+
+            if spec in self._applied or "-j NFQUEUE" in spec:
+                lines.append(f"-D INPUT {spec}")
+
+        for spec, allow in desired.items():
+            if spec not in current:
+                lines.append(f"{'-A' if allow else '-I'} INPUT {spec}")
+
+        if not lines:
+            self._applied = list(desired)
+            return False
+
+        result = subprocess.run(
+            ["iptables-restore", "--noflush"],
+            input="\n".join(["*filter", *lines, "COMMIT", ""]),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode != 0:
+            btul.logging.error(f"Could not apply the firewall rules: {result.stderr}")
+            return False
+
+        self._applied = list(desired)
+        return True
+
+    def update_set(self, name, add=None, remove=None, timeout=None, type="hash:ip"):
+        """
+        Create the ip set if needed, then add and remove entries in one ipset restore transaction.
+        The entries added expire after timeout seconds when the set is created with a timeout.
+        """
+        option = f" timeout {int(timeout)}" if timeout is not None else ""
+
+        lines = [f"create {name} {type}{option}"]
+        lines += [f"add {name} {ip}{option}" for ip in add or []]
+        lines += [f"del {name} {ip}" for ip in remove or []]
+
+        result = subprocess.run(
+            ["ipset", "-exist", "restore"],
+            input="\n".join(lines + [""]),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode != 0:
+            btul.logging.error(f"Could not update the ip set {name}: {result.stderr}")
+            return False
+
+        return True
+
     def rule_exists(
         self, ip=None, sport=None, dport=None, protocol="tcp", allow=True, queue=None
     ):
@@ -18,6 +18,11 @@ import re
 from enum import Enum
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+NUMBER_PATTERN = re.compile(r"^[1-9]\d*$")
+PORT_PATTERN = re.compile(r"^\d{1,5}$")
+IP_PATTERN = re.compile(r"^(\d{1,3}\.){3}\d{1,3}$")
 
 
 def is_valid_number(value):
@@ -25,7 +30,7 @@ def is_valid_number(value):
     True if the value is a valid number, false otherwise
     """
     data = str(value) if value else ""
-    return bool(re.match(r"^[1-9]\d*$", data))
+    return bool(NUMBER_PATTERN.match(data))
 
 
 # We authorise only TCP as it is the only protocol used in the bittensor world
@@ -42,8 +47,7 @@ def is_valid_port(port):
     True if the port is valid, false otherwise
     Match 1 to 5 digits
     """
-    port_pattern = re.compile(r"^\d{1,5}$")
-    return bool(port_pattern.match(str(port))) and 1 <= int(port) <= 65535
+    return bool(PORT_PATTERN.match(str(port))) and 1 <= int(port) <= 65535
 
 
 def is_valid_ip(ip):
@@ -51,8 +55,7 @@ def is_valid_ip(ip):
     True if the ip is valid, false otherwise
     Match xxx.xxx.xxx.xxx format
     """
-    ip_pattern = re.compile(r"^(\d{1,3}\.){3}\d{1,3}$")
-    if ip_pattern.match(ip):
+    if IP_PATTERN.match(ip):
         parts = ip.split(".")
         if all(0 <= int(part) <= 255 for part in parts):
             return True
@@ -318,3 +321,42 @@ def create_rule(config={}) -> Rule:
 
     if config.get("type") == "detect-ddos":
         return DetectDDoSRule.create(config)
+
+
+class RuleIndex:
+    """
+    Rules indexed by rule type, ip, port and protocol.
+    Finding the rule matching a packet costs a few dict lookups whatever the number of rules.
+    """
+
+    def __init__(self, rules: List[Rule] = None):
+        self._rules = list(rules or [])
+        self._index: Dict[Tuple, Rule] = {}
+
+        for rule in self._rules:
+            # Keep the first rule defined for a key
+            key = (rule.rule_type, rule.ip, rule.dport, rule.protocol)
+            self._index.setdefault(key, rule)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __iter__(self):
+        return iter(self._rules)
+
+    def get(self, type: RuleType, ip, port, protocol):
+        """
+        Get the rule of the type matching the ip/port, by priority
+        - the ip/port/protocol rule
+        - the ip rule
+        - the port/protocol rule
+        """
+        rule = self._index.get((type, ip, port, protocol))
+
+        if rule is None and ip is not None:
+            rule = self._index.get((type, ip, None, None))
+
+        if rule is None and port is not None:
+            rule = self._index.get((type, None, port, protocol))
+
+        return rule
@@ -22,10 +22,16 @@ import threading
 import traceback
 import bittensor.utils.btlogging as btuli
 from typing import Dict, List
+from collections import deque
 from datetime import timedelta
 
 from subvortex.core.shared.queue import DynamicQueueManager
 from subvortex.core.sse.sse_server import SSEServer
+from subvortex.core.firewall.firewall_event_log import FirewallEventLog
+from subvortex.core.firewall.firewall_constants import (
+    FIREWALL_EVENTS_COMPACTION_INTERVAL,
+    FIREWALL_EVENTS_REPLAY_SIZE,
+)
 
 FILENAME = "firewall-events.json"
 
@@ -49,6 +55,20 @@ def load_events():
     return events
 
 
+def encode_event(event: dict):
+    """
+    Serialise the event once for the event stream, the ring buffer and the event log
+    The json of a log event is embedded as is in the message of the event stream
+    """
+    if event.get("type") == "log":
+        event["json"] = json.dumps(event["data"])
+        event["message"] = f'{{"type": "log", "data": {event["json"]}}}'
+    else:
+        event["message"] = json.dumps(event)
+
+    return event
+
+
 class FirewallMonitor(threading.Thread):
     def __init__(self, sse: SSEServer = None, batch_size=500, poll_interval=1) -> None:
         super().__init__(daemon=True)
@@ -57,6 +77,28 @@ class FirewallMonitor(threading.Thread):
 
         self._queue_manager = DynamicQueueManager()
         self._sse = sse
+        self._log = FirewallEventLog()
+        self._log_lock = threading.Lock()
+        self._compactor = threading.Thread(
+            target=self._compact_loop, name="FirewallCompactor", daemon=True
+        )
+
+        self._recent = deque()
+        """
+        Ring buffer of the recent events, sent to the new subscribers without reading the event log
+        """
+
+        self._recent_counts = {}
+        """
+        Number of events of each request in the ring buffer
+        """
+
+        self._recent_removed = set()
+        """
+        Requests cleaned while some of their events are still in the ring buffer
+        """
+
+        self.replay_size = FIREWALL_EVENTS_REPLAY_SIZE
 
         self.batch_size = batch_size
         self.poll_interval = poll_interval
@@ -76,16 +118,19 @@ class FirewallMonitor(threading.Thread):
         self._sse.shutdown_server()
         # Wait for the thread to complete
         self.join()
+        # Wait for the compaction to complete before closing the event log
+        if self._compactor.is_alive():
+            self._compactor.join()
+        self._log.close()
 
     def run(self):
         """
         Process all events received in the queue and handle them appropriately.
         """
         try:
-            # Ensure the file exists
-            if not os.path.exists(FILENAME):
-                with open(FILENAME, "a"):
-                    pass
+            # Ensure the event log is open and compacted in the background
+            self.open()
+            self._compactor.start()
 
             # Initialise the timers
             self.packet_consume_start = time.time()
@@ -101,6 +146,9 @@ class FirewallMonitor(threading.Thread):
                         if event is None:
                             break
 
+                        # Serialise the event once
+                        encode_event(event)
+
                         # Send the event to the streamed queue
                         self._broadcast(event)
 
@@ -124,6 +172,40 @@ class FirewallMonitor(threading.Thread):
             btuli.logging.error(f"[Firewall] Error in FirewallMonitor thread: {e}")
             btuli.logging.error(traceback.format_exc())
 
+    def open(self):
+        """
+        Open the event log, importing the events of the previous NDJSON file if any
+        """
+        with self._log_lock:
+            if self._log.is_open:
+                return
+
+            self._log.open()
+
+            if os.path.exists(FILENAME):
+                events = [(x["request_id"], json.dumps(x)) for x in load_events()]
+                self._log.append(events)
+                os.remove(FILENAME)
+
+            # Seed the ring buffer with the most recent events stored
+            events, _ = self._log.read()
+            for event in events[-self.replay_size :]:
+                self._remember(event["request_id"], json.dumps(event))
+
+    def read_events(self, cursor: int = 0):
+        """
+        Return the events stored from the cursor, and the cursor of the next event
+        """
+        self.open()
+        return self._log.read(cursor)
+
+    def get_cursor(self):
+        """
+        Return the cursor of the next event stored
+        """
+        self.open()
+        return self._log.cursor
+
     def emit(self, event: dict):
         self._log_packets_emitted()
         self._queue_manager.put({"type": "log", "data": event})
@@ -132,77 +214,73 @@ class FirewallMonitor(threading.Thread):
         self._log_packets_emitted()
         self._queue_manager.put({"type": "clean", "data": sources})
 
+    def get_recent_events(self):
+        """
+        Return the json of the events of the ring buffer that belong to requests not cleaned
+        """
+        return [data for id, data in self._recent if id not in self._recent_removed]
+
     def _broadcast(self, event):
         try:
-            # Send the stored events when new client
+            # Send the recent events when new client
             if self._sse.has_new_subscribers("firewall"):
-                events = load_events()
-                self._sse.broadcast("firewall", {"type": "log", "data": events}, True)
+                events = ", ".join(self.get_recent_events())
+                message = f'{{"type": "log", "data": [{events}]}}'
+                self._sse.broadcast("firewall", message, True)
 
             # Broadcast the event to the firewall stream
-            self._sse.broadcast("firewall", event)
+            self._sse.broadcast("firewall", event["message"])
         except Exception as err:
             btuli.logging.error(f"[Firewall] Broadcasting failed {err}")
             btuli.logging.error(traceback.format_exc())
             pass
+        finally:
+            self._remember_event(event)
+
+    def _remember_event(self, event):
+        if event.get("type") == "log":
+            self._remember(event["data"]["request_id"], event["json"])
+        elif event.get("type") == "clean":
+            self._recent_removed.update(
+                x for x in event["data"] if x in self._recent_counts
+            )
+
+    def _remember(self, id: str, data: str):
+        self._recent.append((id, data))
+        self._recent_counts[id] = self._recent_counts.get(id, 0) + 1
+
+        if len(self._recent) <= self.replay_size:
+            return
+
+        # Evict the oldest event
+        id, _ = self._recent.popleft()
+        self._recent_counts[id] -= 1
+        if self._recent_counts[id] == 0:
+            del self._recent_counts[id]
+            self._recent_removed.discard(id)
 
     def _process_events(self, events: List[dict]):
         """
-        Process multiple log and clean events in one file operation.
+        Append the log events and remove the events of the cleaned requests, in the order received.
         """
-        log_events = [e["data"] for e in events if e.get("type") == "log"]
-        request_ids = [x for e in events for x in e["data"] if e.get("type") == "clean"]
-
-        with open(FILENAME, "a+") as file:
+        log_events = []
+        for event in events:
+            if event.get("type") == "log":
+                log_events.append((event["data"]["request_id"], event["json"]))
+            elif event.get("type") == "clean":
+                self._log.append(log_events)
+                self._log.remove(event["data"])
+                log_events = []
+
+        self._log.append(log_events)
+
+    def _compact_loop(self):
+        while not self._stop.wait(FIREWALL_EVENTS_COMPACTION_INTERVAL):
             try:
-                content = None
-
-                if len(request_ids) > 0:
-                    # Read current file content
-                    file.seek(0)
-                    lines = file.readlines()
-
-                    # Filter out lines with request IDs to be cleaned
-                    filtered_lines = [
-                        line
-                        for line in lines
-                        if self._should_keep_line(line, request_ids)
-                    ]
-
-                    # Convert filtered lines back to a single string
-                    content = "".join(filtered_lines)
-
-                    # Convert log_events to NDJSON format if there are any
-                    if len(log_events) > 0:
-                        filtered_log_events = [
-                            x for x in log_events if x["request_id"] not in request_ids
-                        ]
-                        data = json.dumps(filtered_log_events)
-                        ndjson_data = data[1:-1].replace("}, {", "}\n{") + "\n"
-                        content += ndjson_data
-
-                    # Move the file pointer to the beginning and truncate the file
-                    file.seek(0)
-                    file.truncate()
-                elif len(log_events) > 0:
-                    data = json.dumps(log_events)
-                    content = data[1:-1].replace("}, {", "}\n{") + "\n"
-
-                if not content:
-                    return
-
-                # Write the filtered lines back to the file
-                file.write(content)
-
-                # Flush the buffer
-                file.flush()
-            finally:
-                pass
-
-    def _should_keep_line(self, line, request_ids):
-        return not any(
-            f'"request_id": "{request_id}"' in line for request_id in request_ids
-        )
+                self._log.compact()
+            except Exception as err:
+                btuli.logging.error(f"[Firewall] Compacting the events failed {err}")
+                btuli.logging.error(traceback.format_exc())
 
     def _is_difference_one_hour(self, time1=0):
         time_difference = time.time() - time1
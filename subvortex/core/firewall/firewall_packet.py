@@ -22,6 +22,7 @@ import bittensor.utils.btlogging as btul
 from subvortex.core.shared.type import get_key_from_value, get_enum_name_from_value
 from subvortex.core.shared.encoder import encodeBase64, decodeBase64
 from subvortex.core.firewall.firewall_model import RuleType
+from subvortex.core.firewall.firewall_constants import FIREWALL_HEADERS_MAX_SIZE
 from subvortex.core.firewall.firewall_utils import extract_and_transform_headers, get
 
 PROTOCOLS = {
@@ -41,6 +42,47 @@ TCP_FLAG_LABELS = {
     0x80: "C",  # CWR
 }
 
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_PSH = 0x08
+TCP_ACK = 0x10
+
+# Only the FIN to URG flags are kept, like the labels of the packets already stored
+TCP_FLAG_MASK = 0x3F
+
+# Label of each combination of flags, e.g. 0x18 => "PA"
+TCP_FLAGS = tuple(
+    "".join(label for bit, label in TCP_FLAG_LABELS.items() if mask & bit)
+    for mask in range(TCP_FLAG_MASK + 1)
+)
+
+# Combination of flags of each label, e.g. "PA" => 0x18
+TCP_FLAG_BITS = {label: mask for mask, label in enumerate(TCP_FLAGS)}
+
+# Version/IHL, protocol, source and destination addresses of the IP header
+IP_HEADER = struct.Struct("!B8xB2x4s4s")
+
+# Ports, sequence, acknowledgment, data offset and flags of the TCP header
+TCP_HEADER = struct.Struct("!HHLLBB")
+
+
+# Headers used by the firewall, the parsing stops once they are all found
+HEADER_KEYS = (
+    "name",
+    "axon_ip",
+    "axon_port",
+    "axon_hotkey",
+    "dendrite_ip",
+    "dendrite_port",
+    "dendrite_version",
+    "dendrite_neuron_version",
+    "dendrite_nonce",
+    "dendrite_uuid",
+    "dendrite_hotkey",
+    "dendrite_signature",
+    "computed_body_hash",
+)
+
 
 class FirewallHeaders:
     def __init__(self):
@@ -60,15 +102,19 @@ class FirewallHeaders:
 
     @classmethod
     def from_payload(cls, payload):
-        # Decode the payload
+        # Decode the payload, only the first bytes can contain the headers
         content = ""
         try:
-            content = payload.decode("utf-8") if isinstance(payload, bytes) else payload
+            content = (
+                payload[:FIREWALL_HEADERS_MAX_SIZE].decode("utf-8", "ignore")
+                if isinstance(payload, bytes)
+                else payload
+            )
         except:
             pass
 
-        if payload is None or content == "":
-            return FirewallHeaders.from_dict({})
+        if payload is None or not content:
+            return cls()
 
         # The content is a json
         try:
@@ -85,9 +131,9 @@ class FirewallHeaders:
             if "Content-Type: application/json" in headers_content:
                 data = json.loads(body_content)
             else:
-                data = extract_and_transform_headers(content)
+                data = extract_and_transform_headers(content, HEADER_KEYS)
         except ValueError as e:
-            data = extract_and_transform_headers(content)
+            data = extract_and_transform_headers(content, HEADER_KEYS)
 
         return FirewallHeaders.from_dict(data)
 
@@ -125,6 +171,39 @@ class FirewallHeaders:
 
 
 class FirewallPacket:
+    """
+    Packet received by the firewall.
+    The headers are decoded once from the raw packet, the payload and its headers are only
+    decoded when accessed and the identifiers are computed once.
+    """
+
+    __slots__ = (
+        "queue_num",
+        "_current_time",
+        "process_time",
+        "_packet",
+        "_raw_packet",
+        "notified",
+        "max_time",
+        "status",
+        "type",
+        "reason",
+        "_src_ip",
+        "_src_port",
+        "_dst_ip",
+        "_dst_port",
+        "_ip_protocol",
+        "_seq",
+        "_ack",
+        "_flag_bits",
+        "_payload_offset",
+        "_payload",
+        "_headers",
+        "_parse_headers",
+        "_id",
+        "_internal_id",
+    )
+
     def __init__(self):
         self.queue_num = 1
         self._current_time = None
@@ -147,17 +226,29 @@ class FirewallPacket:
         self._ip_protocol = None
         self._seq = 0
         self._ack = 0
-        self._flags = None
+        self._flag_bits = None
+        self._payload_offset = None
         self._payload = None
         self._headers: FirewallHeaders = None
+        self._parse_headers = True
+        self._id = None
+        self._internal_id = None
 
     @property
     def internal_id(self):
-        return f"{self.sip}:{self.dport}:{self.seq}:{self.ack}:{self.flags}"
+        if self._internal_id is None:
+            self._internal_id = (
+                f"{self.sip}:{self.dport}:{self.seq}:{self.ack}:{self.flags}"
+            )
+
+        return self._internal_id
 
     @property
     def id(self):
-        return f"{self.sip}:{self.dport}:{self.protocol}"
+        if self._id is None:
+            self._id = f"{self.sip}:{self.dport}:{self.protocol}"
+
+        return self._id
 
     @property
     def current_time(self):
@@ -183,9 +274,16 @@ class FirewallPacket:
     def sport(self):
         return self._src_port
 
+    @property
+    def flag_bits(self):
+        """
+        TCP flags as a bitmask
+        """
+        return self._flag_bits or 0
+
     @property
     def flags(self):
-        return self._flags
+        return TCP_FLAGS[self._flag_bits] if self._flag_bits is not None else None
 
     @property
     def seq(self):
@@ -197,10 +295,26 @@ class FirewallPacket:
 
     @property
     def payload(self):
+        if self._payload is None and self._payload_offset is not None:
+            self._payload = self._raw_packet[self._payload_offset :]
+
         return self._payload
 
+    @property
+    def can_carry_headers(self):
+        """
+        True if the payload can contain the headers of a synapse, false otherwise
+        Only packets pushing data on a queue parsing headers can
+        """
+        return self._parse_headers and bool(self.flag_bits & TCP_PSH)
+
     @property
     def headers(self):
+        if self._headers is None:
+            self._headers = FirewallHeaders.from_payload(
+                self.payload if self.can_carry_headers else None
+            )
+
         return self._headers
 
     def accept(self):
@@ -222,7 +336,16 @@ class FirewallPacket:
             btul.logging.error(err)
             return False
 
-    def to_dict(self):
+    def to_dict(self, payload_size=None):
+        """
+        Fields of the packet, always the same and in the same order
+        The payload is truncated to payload_size bytes if set, and omitted if 0
+        """
+        headers = self.headers
+        payload = self.payload if payload_size != 0 else None
+        if payload and payload_size is not None:
+            payload = payload[:payload_size]
+
         return {
             "current_time": self.current_time,
             "process_time": self.process_time,
@@ -237,26 +360,26 @@ class FirewallPacket:
             "flags": self.flags,
             "seq": self.seq,
             "ack": self.ack,
-            "payload": encodeBase64(self.payload),
+            "payload": encodeBase64(payload),
             "status": self.status,
             "type": self.type.value if self.type else "",
             "reason": self.reason,
             "max_time": self.max_time,
-            "synapse": self.headers.synapse_name,
+            "synapse": headers.synapse_name,
             "axon": {
-                "ip": self._headers.axon_ip,
-                "port": self._headers.axon_port,
-                "hotkey": self._headers.axon_hotkey,
+                "ip": headers.axon_ip,
+                "port": headers.axon_port,
+                "hotkey": headers.axon_hotkey,
             },
             "dendrite": {
-                "ip": self._headers.dendrite_ip,
-                "port": self._headers.dendrite_port,
-                "hotkey": self._headers.dendrite_hotkey,
-                "signature": self._headers.dendrite_signature,
-                "nonce": self._headers.dendrite_nonce,
-                "uuid": self._headers.dendrite_uuid,
-                "version": self._headers.dendrite_version,
-                "neuron_version": self._headers.dendrite_neuron_version,
+                "ip": headers.dendrite_ip,
+                "port": headers.dendrite_port,
+                "hotkey": headers.dendrite_hotkey,
+                "signature": headers.dendrite_signature,
+                "nonce": headers.dendrite_nonce,
+                "uuid": headers.dendrite_uuid,
+                "version": headers.dendrite_version,
+                "neuron_version": headers.dendrite_neuron_version,
             },
         }
 
@@ -270,55 +393,92 @@ class FirewallPacket:
         instance._dst_port = int(dict_.get("dport", 0))
         instance._src_port = int(dict_.get("sport", 0))
         instance.max_time = int(dict_.get("max_time", 0))
-        instance._flags = dict_.get("flags")
+        instance._flag_bits = TCP_FLAG_BITS.get(dict_.get("flags"))
         instance._seq = int(dict_.get("seq", 0))
         instance._ack = int(dict_.get("ack", 0))
         payload = dict_.get("payload")
         instance._payload = decodeBase64(payload) if payload else None
-        instance._headers = FirewallHeaders.from_payload(instance._payload)
         instance.status = dict_.get("status")
         instance.type = get_enum_name_from_value(dict_.get("type"), RuleType)
         instance.reason = dict_.get("reason")
         instance.queue_num = int(dict_.get("queue_num", 1))
         return instance
 
+    def to_state(self):
+        """
+        Compact state of the packet needed to take the next decisions, without the payload
+        The fields are encoded in a fixed order to be restored by from_state
+        """
+        return [
+            self.current_time,
+            self.queue_num,
+            self._src_ip,
+            self._dst_ip,
+            self._src_port,
+            self._dst_port,
+            self._ip_protocol,
+            self._flag_bits,
+            self._seq,
+            self._ack,
+            self.status,
+            self.type.value if self.type else None,
+            self.reason,
+            self.max_time,
+            self.notified,
+        ]
+
     @classmethod
-    def from_packet(cls, packet, current_time, queue_num=1):
+    def from_state(cls, state):
+        instance = cls()
+        (
+            instance._current_time,
+            instance.queue_num,
+            instance._src_ip,
+            instance._dst_ip,
+            instance._src_port,
+            instance._dst_port,
+            instance._ip_protocol,
+            instance._flag_bits,
+            instance._seq,
+            instance._ack,
+            instance.status,
+            type,
+            instance.reason,
+            instance.max_time,
+            instance.notified,
+        ) = state
+        instance.type = RuleType(type) if type else None
+        return instance
+
+    @classmethod
+    def from_packet(cls, packet, current_time, queue_num=1, parse_headers=True):
         instance = cls()
         instance.queue_num = queue_num
+        instance._parse_headers = parse_headers
         instance._current_time = current_time
         instance._packet = packet
-        instance._raw_packet = packet.get_payload()
+        instance._raw_packet = raw = packet.get_payload()
 
         # Parse IP header (first 20 bytes)
-        ip_header = instance._raw_packet[:20]
-        ip_data = struct.unpack("!BBHHHBBH4s4s", ip_header)
-        instance._ip_protocol = ip_data[6]
-        instance._src_ip = socket.inet_ntoa(ip_data[8])
-        instance._dst_ip = socket.inet_ntoa(ip_data[9])
+        version_ihl, protocol, src_ip, dst_ip = IP_HEADER.unpack_from(raw)
+        instance._ip_protocol = protocol
+        instance._src_ip = socket.inet_ntoa(src_ip)
+        instance._dst_ip = socket.inet_ntoa(dst_ip)
 
         # Parse TCP header if the protocol is TCP (protocol number 6)
-        if instance._ip_protocol == 6:
-            ip_header_length = (ip_data[0] & 0x0F) * 4
-            tcp_header_offset = ip_header_length
-            tcp_header = instance._raw_packet[
-                tcp_header_offset : tcp_header_offset + 20
-            ]
-            tcp_data = struct.unpack("!HHLLBBHHH", tcp_header)
-            tcp_header_length = ((tcp_data[4] >> 4) & 0xF) * 4
-            instance._src_port = tcp_data[0]
-            instance._dst_port = tcp_data[1]
-            instance._seq = tcp_data[2]
-            instance._ack = tcp_data[3]
-            instance._flags = "".join(
-                label
-                for bit, label in TCP_FLAG_LABELS.items()
-                if tcp_data[5] & 0x3F & bit
-            )
-
-            # Calculate payload offset and extract payload
-            payload_offset = tcp_header_offset + tcp_header_length
-            instance._payload = instance._raw_packet[payload_offset:]
-            instance._headers = FirewallHeaders.from_payload(instance._payload)
+        if protocol == 6:
+            tcp_header_offset = (version_ihl & 0x0F) * 4
+            (
+                instance._src_port,
+                instance._dst_port,
+                instance._seq,
+                instance._ack,
+                data_offset,
+                flags,
+            ) = TCP_HEADER.unpack_from(raw, tcp_header_offset)
+            instance._flag_bits = flags & TCP_FLAG_MASK
+
+            # Payload is extracted when accessed
+            instance._payload_offset = tcp_header_offset + ((data_offset >> 4) & 0xF) * 4
 
         return instance
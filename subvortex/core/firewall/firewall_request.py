@@ -15,6 +15,8 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 import uuid
+from collections import defaultdict
+
 from subvortex.core.firewall.firewall_packet import FirewallPacket
 
 seq_space = 2**32  # 32-bit sequence space
@@ -29,11 +31,26 @@ window_size = transaction_packet_size * transaction_length
 
 
 class FirewallRequest:
+    """
+    Request made of the packets of a TCP connection.
+    The request keeps running aggregates of its packets (times, verdicts) and an index of
+    its packets by internal id, so querying it does not depend on the number of packets.
+    The verdict of a packet is set after it is added, so the aggregates cover all the packets
+    but the last one, which is checked on its own.
+    """
+
     def __init__(self, previous_id=None):
         self.id = str(uuid.uuid1())
         self.previous_id = previous_id
         self.notified = False
         self._packets: list[FirewallPacket] = []
+        self._packets_by_internal_id = {}
+        self._sync_packet = None
+        self._data_packet = None
+        self._max_time = 0
+        self._has_denied = False
+        self._has_sync_allowed = False
+        self._has_data_allowed = False
 
     @property
     def group_id(self):
@@ -45,7 +62,7 @@ class FirewallRequest:
 
     @property
     def current_time(self):
-        packet = next((x for x in self._packets if x.flags == "S"), None)
+        packet = self._sync_packet
         return packet.current_time if packet else 0
 
     @property
@@ -54,14 +71,14 @@ class FirewallRequest:
 
     @property
     def max_time(self):
-        return max([x.max_time for x in self._packets])
+        return max(self._max_time, self._packets[-1].max_time)
 
     def get_sync_packet(self):
         packet = self._packets[0] if len(self._packets) > 0 else None
         return packet if packet is not None and packet.flags == "S" else None
 
     def get_packet_by_internal_id(self, internal_id: str):
-        return next((x for x in self._packets if x.internal_id == internal_id), None)
+        return self._packets_by_internal_id.get(internal_id)
 
     def is_part_of(self, seq):
         """
@@ -90,48 +107,39 @@ class FirewallRequest:
         """
         True if you have at least a S with (PA or FA) allowed, false otherwise
         """
-        has_S_allowed = False
-        has_PA_or_FA_allowed = False
+        has_S_allowed = self._has_sync_allowed
+        has_PA_or_FA_allowed = self._has_data_allowed
 
-        for packet in self._packets:
-            if packet.status == "allow":
-                if packet.flags == "S":
+        if len(self._packets) > 0:
+            last = self._packets[-1]
+            if last.status == "allow":
+                if last.flags == "S":
                     has_S_allowed = True
-                elif packet.flags == "PA" or packet.flags == "FA":
+                elif last.flags == "PA" or last.flags == "FA":
                     has_PA_or_FA_allowed = True
 
-            # Early exit if both conditions are met
-            if has_S_allowed and has_PA_or_FA_allowed:
-                return True
-
         return has_S_allowed and has_PA_or_FA_allowed
 
     def is_denied(self):
         """
         True if at least one packet is denied, false otherwise
         """
-        return any(
-            x.status == "deny" for x in reversed(self._packets) if x.status is not None
-        )
+        return self._has_denied or self.is_last_packet_denied()
 
     def is_sync_denied(self):
-        packets = [x for x in self._packets if x.flags == "S"]
-        packet = packets[0] if len(packets) > 0 else None
+        packet = self._sync_packet
         return packet.status == "deny" if packet else False
 
     def is_sync_allowed(self):
-        packets = [x for x in self._packets if x.flags == "S"]
-        packet = packets[0] if len(packets) > 0 else None
+        packet = self._sync_packet
         return packet.status == "allow" if packet else True
 
     def is_data_denied(self):
-        packets = [x for x in self._packets[::-1] if x.flags == "PA"]
-        packet = packets[-1] if len(packets) > 0 else None
+        packet = self._data_packet
         return packet.status == "deny" if packet else False
 
     def is_data_allowed(self):
-        packets = [x for x in self._packets[::-1] if x.flags == "PA"]
-        packet = packets[-1] if len(packets) > 0 else None
+        packet = self._data_packet
         return packet.status == "allow" if packet else True
 
     def get_last_packet(self, index=-1, flags=None) -> FirewallPacket | None:
@@ -143,7 +151,50 @@ class FirewallRequest:
         return packets[index] if len(packets) > (index * -1) else FirewallPacket()
 
     def add_packet(self, packet: FirewallPacket):
+        if len(self._packets) > 0:
+            # The previous packet has its verdict now
+            self._aggregate(self._packets[-1])
+
         self._packets.append(packet)
+        self._packets_by_internal_id.setdefault(packet.internal_id, packet)
+
+        if packet.flags == "S" and self._sync_packet is None:
+            self._sync_packet = packet
+
+        if packet.flags == "PA" and self._data_packet is None:
+            self._data_packet = packet
+
+    def _aggregate(self, packet: FirewallPacket):
+        self._max_time = max(self._max_time, packet.max_time)
+
+        if packet.status == "deny":
+            self._has_denied = True
+        elif packet.status == "allow":
+            if packet.flags == "S":
+                self._has_sync_allowed = True
+            elif packet.flags == "PA" or packet.flags == "FA":
+                self._has_data_allowed = True
+
+    def to_state(self):
+        """
+        Compact state of the request, to be restored by from_state
+        """
+        return [
+            self.id,
+            self.previous_id,
+            self.notified,
+            [x.to_state() for x in self._packets],
+        ]
+
+    @classmethod
+    def from_state(cls, state):
+        instance = cls()
+        instance.id, instance.previous_id, instance.notified, packets = state
+
+        for packet in packets:
+            instance.add_packet(FirewallPacket.from_state(packet))
+
+        return instance
 
     @classmethod
     def from_dict(cls, dict_):
@@ -152,6 +203,78 @@ class FirewallRequest:
         instance.previous_id = dict_.get("previous_id")
 
         packets = dict_.get("packets")
-        instance._packets = [FirewallPacket.from_dict(x) for x in packets]
+        for packet in packets:
+            instance.add_packet(FirewallPacket.from_dict(packet))
 
         return instance
+
+
+class FirewallRequestIndex:
+    """
+    Requests of a source indexed by id and by the window of sequence numbers they cover.
+    Finding the request of a packet costs a dict lookup whatever the number of requests.
+    """
+
+    def __init__(self, requests: list[FirewallRequest] = None):
+        self._requests = {}
+        self._seqs = {}
+        self._buckets = defaultdict(list)
+
+        for request in requests or []:
+            self.add(request)
+
+    def __len__(self):
+        return len(self._requests)
+
+    def get(self, request_id) -> FirewallRequest | None:
+        return self._requests.get(request_id)
+
+    def add(self, request: FirewallRequest, seq=None):
+        """
+        Index the request, seq is the sequence number of its sync packet, when not added yet
+        """
+        self._requests[request.id] = request
+
+        if seq is None:
+            sync_packet = request.get_sync_packet()
+            seq = sync_packet.seq if sync_packet else None
+
+        if seq is None:
+            return
+
+        self._seqs[request.id] = seq
+        for bucket in self._get_buckets(seq):
+            self._buckets[bucket].append(request)
+
+    def remove(self, request: FirewallRequest):
+        self._requests.pop(request.id, None)
+
+        seq = self._seqs.pop(request.id, None)
+        if seq is None:
+            return
+
+        for bucket in self._get_buckets(seq):
+            requests = self._buckets[bucket]
+            requests.remove(request)
+            if len(requests) == 0:
+                del self._buckets[bucket]
+
+    def find(self, seq) -> list[FirewallRequest]:
+        """
+        Requests the sequence number is part of, from the most recent one
+        """
+        requests = self._buckets.get(seq // window_size)
+        if not requests:
+            return []
+
+        return [x for x in reversed(requests) if x.is_part_of(seq)]
+
+    def _get_buckets(self, seq):
+        end = seq + window_size - 1
+
+        buckets = {seq // window_size, min(end, seq_space - 1) // window_size}
+        if end >= seq_space:
+            # The window wraps around the sequence space
+            buckets.update({0, (end - seq_space) // window_size})
+
+        return buckets
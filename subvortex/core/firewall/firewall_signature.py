@@ -0,0 +1,108 @@
+# The MIT License (MIT)
+# Copyright © 2024 Eclipse Vortex
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from subvortex.core.firewall.firewall_constants import (
+    FIREWALL_SIGNATURE_CACHE_SIZE,
+    FIREWALL_NONCE_WINDOW,
+)
+
+
+class SignatureCache:
+    """
+    LRU cache of the verified signatures with replay protection.
+    A signature already verified for a request is answered without crypto, the same signature
+    coming from another request or a nonce too old for the hotkey is a replay.
+    Nonces are expected to be nanosecond timestamps, like the ones of the dendrite.
+    """
+
+    def __init__(
+        self,
+        size: int = FIREWALL_SIGNATURE_CACHE_SIZE,
+        nonce_window: int = FIREWALL_NONCE_WINDOW,
+    ):
+        self.size = size
+        self.nonce_window = nonce_window
+
+        self._lock = threading.Lock()
+        self._verified = OrderedDict()
+        self._nonces = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.replays = 0
+
+    def verify(
+        self,
+        hotkey: str,
+        nonce: int,
+        message: str,
+        signature: str,
+        request_id: str,
+        verifier: Callable[[], bool],
+    ):
+        """
+        Verify the signature of the message, return a tuple (valid, replay)
+        The verifier is only called for signatures not verified yet
+        """
+        key = (message, signature)
+
+        with self._lock:
+            owner = self._verified.get(key)
+            if owner is not None:
+                if owner != request_id:
+                    self.replays += 1
+                    return (False, True)
+
+                self._verified.move_to_end(key)
+                self.hits += 1
+                return (True, False)
+
+            newest = self._nonces.get(hotkey)
+            if newest is not None and (nonce or 0) < newest - self.nonce_window:
+                self.replays += 1
+                return (False, True)
+
+            self.misses += 1
+
+        if not verifier():
+            return (False, False)
+
+        with self._lock:
+            self._verified[key] = request_id
+            self._verified.move_to_end(key)
+            while len(self._verified) > self.size:
+                self._verified.popitem(last=False)
+
+            # The newest nonces of the hotkeys seen least recently are forgotten first
+            self._nonces[hotkey] = max(nonce or 0, self._nonces.get(hotkey, 0))
+            self._nonces.move_to_end(hotkey)
+            while len(self._nonces) > self.size:
+                self._nonces.popitem(last=False)
+
+        return (True, False)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "size": len(self._verified),
+                "hits": self.hits,
+                "misses": self.misses,
+                "replays": self.replays,
+            }
@@ -55,3 +55,11 @@ class FirewallTool(ABC):
         self, ip=None, sport=None, dport=None, protocol="tcp", allow=True, queue=None
     ):
         pass
+
+    @abstractmethod
+    def apply_rules(self, rules, policy=None):
+        pass
+
+    @abstractmethod
+    def update_set(self, name, add=None, remove=None, timeout=None, type="hash:ip"):
+        pass
@@ -15,7 +15,9 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 import re
-from collections import defaultdict
+
+# Regular expression to match key-value pairs
+HEADER_REGEX = re.compile(r"^(.*?):\s*(.*)$")
 
 
 def get(data, key: str, default=None):
@@ -44,20 +46,22 @@ def decode(payload, encoding: str = "utf-8"):
         return ""
 
 
-def extract_and_transform_headers(payload):
-    # Split the request into lines
-    lines = payload.split("\n")
+def extract_and_transform_headers(payload, keys=None):
+    """
+    Extract the headers of the http request in the payload
+    The parsing stops at the end of the headers or as soon as all the keys are found
+    """
+    # Split the headers into lines
+    lines = payload.split("\r\n\r\n", 1)[0].split("\n")
 
     # Initialize a dictionary to store the headers
     headers = {}
-
-    # Regular expression to match key-value pairs
-    header_regex = re.compile(r"^(.*?):\s*(.*)$")
+    missing = set(keys) if keys is not None else None
 
     for line in lines:
         # Skip empty lines and the first request line (e.g., POST /Synapse HTTP/1.1)
         if line and not line.startswith(("POST", "GET", "HTTP")):
-            match = header_regex.match(line)
+            match = HEADER_REGEX.match(line)
             if match:
                 key, value = match.groups()
                 # Remove "bt_header_" prefix if it exists
@@ -72,80 +76,79 @@ def extract_and_transform_headers(payload):
                 else:
                     headers[key] = value.strip()
 
+                if missing is not None:
+                    missing.discard(key)
+                    if not missing:
+                        break
+
     return headers
 
 
-def clean_sources_2(id, sources, current_time, max_time):
-    changed = False
-    new_sources = defaultdict(list)
-    sources_outdated = defaultdict(list)
-
-    sources_dumped = dict.copy(sources)
-    for id, source in sources_dumped.items():
-        for request in source:
-            if current_time - request.current_time <= max_time:
-                new_sources[id].append(request)
-            else:
-                sources_outdated[id].append(request)
-                changed = True
-
-        if not any(x.is_denied() or x.is_allowed() for x in new_sources[id]):
-            found = next(
-                (
-                    x
-                    for x in sources_outdated[id][::-1]
-                    if x.is_denied() or x.is_allowed()
-                ),
-                None,
-            )
-            if found:
-                new_sources[id] = [found] + new_sources[id]
-
-    return new_sources, changed
-
-
-def clean_sources(sources, current_time):
-    new_sources = defaultdict(list)
-    old_sources = defaultdict(list)
+def clean_source(requests, current_time, retention=None):
+    """
+    Split the requests of a source into the expired ones and the ones to keep.
+    The most recent expired request with a verdict is kept when no request to keep has one,
+    to remember the last state of the source, until it has been expired for retention seconds.
+    Return a tuple (old requests, new requests)
+    """
+    new_requests = []
+    old_requests = []
     found = None
 
-    for id, source in sources.items():
-        found = None
-        for request in source:
-            if current_time - request.current_time <= request.max_time:
-                new_sources[id].append(request)
-            else:
-                old_sources[id].append(request)
-                if request.is_denied() or request.is_allowed():
-                    found = request
-
-        if not any(x.is_denied() or x.is_allowed() for x in new_sources[id]) and found:
-            new_sources[id].insert(0, found)
-            old_sources[id].remove(found)
-            if len(old_sources[id]) == 0:
-                del old_sources[id]
-
-        if len(old_sources[id]) == 0:
-            del old_sources[id]
-
-        if len(new_sources[id]) == 0:
-            del new_sources[id]
-
-        # Update the previous links
-        previous_id = None
-        for index, request in enumerate(new_sources[id]):
-            if index == 0:
-                # First request as no previous request
-                request.previous_id = None
-                continue
-
-            if index == 1 or request.previous_id == previous_id:
-                # Second request or any request that has the same previous
-                # as the second request have to change it to the new first request
-                previous_id = request.previous_id
-                request.previous_id = new_sources[id][0].id
-                continue
-
-            break
-
-    return old_sources, new_sources
+    for request in requests:
+        if current_time - request.current_time <= request.max_time:
+            new_requests.append(request)
+        else:
+            old_requests.append(request)
+            if request.is_denied() or request.is_allowed():
+                found = request
+
+    is_retained = (
+        found is not None
+        and (
+            retention is None
+            or current_time - found.current_time - found.max_time <= retention
+        )
+        and not any(x.is_denied() or x.is_allowed() for x in new_requests)
+    )
+    if is_retained:
+        new_requests.insert(0, found)
+        old_requests.remove(found)
+
+    # Update the previous links
+    previous_id = None
+    for index, request in enumerate(new_requests):
+        if index == 0:
+            # First request as no previous request
+            request.previous_id = None
+            continue
+
+        if index == 1 or request.previous_id == previous_id:
+            # Second request or any request that has the same previous
+            # as the second request have to change it to the new first request
+            previous_id = request.previous_id
+            request.previous_id = new_requests[0].id
+            continue
+
+        break
+
+    return old_requests, new_requests
+
+
+def get_expiration(requests, current_time, retention=None):
+    """
+    Time the requests of the source have to be cleaned next, None if never
+    """
+    expirations = [
+        request.current_time + request.max_time
+        for request in requests
+        if current_time - request.current_time <= request.max_time
+    ]
+    if len(expirations) > 0:
+        return min(expirations)
+
+    if len(requests) > 0 and retention is not None:
+        # Only the request remembering the last state of the source is left
+        return requests[0].current_time + requests[0].max_time + retention
+
+    return None
@@ -41,6 +41,20 @@ class MetagraphChecker:
         )
         btul.logging.info(f"✅ Metagraph synced at block {last_updated}.")
 
+        # Resolve the countries of all the neurons in one batch
+        countries = {}
+        if self.with_country:
+            countries, errors = sccc.get_countries(
+                [
+                    neuron.axon_info.ip
+                    for neuron in self.metagraph.neurons
+                    if neuron.axon_info.ip != "0.0.0.0"
+                    and (self.uid is None or self.uid == neuron.uid)
+                ]
+            )
+            for ip, error in errors.items():
+                btul.logging.warning(f"⚠️ Could not get the country of {ip}: {error}")
+
         successfull_neurons = 0
         for neuron in self.metagraph.neurons:
             if self.uid is not None and self.uid != neuron.uid:
@@ -57,11 +71,7 @@ class MetagraphChecker:
             expected_neuron = scmm.Neuron.from_proto(neuron)
 
             if self.with_country:
-                expected_neuron.country = (
-                    sccc.get_country(expected_neuron.ip)
-                    if expected_neuron.ip != "0.0.0.0"
-                    else None
-                )
+                expected_neuron.country = countries.get(expected_neuron.ip)
 
             mismatches = []
             for key, expected_value in expected_neuron.__dict__.items():
@@ -30,8 +30,10 @@ class NeuronReadOnlyDatabase(BaseDatabase):
         super().__init__(settings=settings)
 
         # Register neuron models keyed by their version
+        prefix = settings.key_prefix
         self.models["neuron"] = {
-            x.version: x for x in [NeuronModel210(), NeuronModel211()]
+            x.version: x
+            for x in [NeuronModel210(prefix=prefix), NeuronModel211(prefix=prefix)]
         }
 
     async def get_neuron(self, hotkey: str) -> scmm.Neuron:
@@ -14,6 +14,43 @@ import subvortex.core.metagraph.settings as scms
 import subvortex.core.utils as scsu
 
 
+async def _wait_for_block(
+    subtensor: btcas.AsyncSubtensor, should_exit: asyncio.Event
+) -> int | None:
+    """
+    Waits for a new block or the shutdown signal, whichever comes first.
+    Returns the current block, None if there is no block to process.
+    """
+    done, _ = await asyncio.wait(
+        [
+            asyncio.create_task(subtensor.wait_for_block()),
+            asyncio.create_task(should_exit.wait()),
+        ],
+        timeout=24,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+
+    # Timeout, no tasks completed
+    if not done:
+        btul.logging.warning(
+            "⏲️ No new block retrieved within 24 seconds. Retrying..."
+        )
+        return None
+
+    # If shutdown signal is received, there is no block to process
+    if should_exit.is_set():
+        return None
+
+    # If no new block was produced (e.g., shutdown happened or something failed), skip this round
+    # This guards against the case where wait_for_block() returned None or False
+    if not any(
+        task.result() for task in done if not task.cancelled() and not task.exception()
+    ):
+        return None
+
+    return await subtensor.get_current_block()
+
+
 class MetagraphObserver:
     """
     Periodically observes the metagraph and updates local neuron storage in Redis
@@ -26,6 +63,7 @@ class MetagraphObserver:
         database: scmd.NeuronDatabase,
         subtensor: btcas.AsyncSubtensor,
         metagraph: btcm.AsyncMetagraph,
+        geo_lookup: scgl.UltraFastGeoLookup = None,
     ):
         self.settings = settings
         self.database = database
@@ -35,27 +73,55 @@ class MetagraphObserver:
         self.should_exit = asyncio.Event()
         self.run_complete = asyncio.Event()
 
+        # A geo lookup provided by the caller is shared, so the caller starts/stops it
+        self._owns_geo_lookup = geo_lookup is None
+
         # Initialize ultra-fast geo lookup service if license key provided
-        self.geo_lookup = (
+        self.geo_lookup = geo_lookup or (
             scgl.UltraFastGeoLookup(
                 output_dir=settings.geo_output_dir,
                 license_key=settings.geo_license_key,
+                cache_size=settings.geo_cache_size,
+                reload_check_interval=settings.geo_reload_check_interval,
             )
             if settings.geo_license_key
             else None
         )
 
+        # State kept from one block to the next
+        self._registration_count = 0
+        self._axons = {}
+        self._last_synced_block = 0
+        self._has_missing_country = False
+
     async def start(self):
         """
         Starts the metagraph observer loop.
         Continuously checks for neuron changes and updates local storage accordingly.
         """
-        registration_count = 0
-        axons = {}
-        last_synced_block = 0
-        sync_interval = self.settings.sync_interval
-        has_missing_country = False
+        await self.setup()
+
+        try:
+            while not self.should_exit.is_set():
+                try:
+                    block = await _wait_for_block(self.subtensor, self.should_exit)
+
+                except Exception as e:
+                    await self._handle_loop_error(e)
+                    continue
+
+                if block is None:
+                    continue
+
+                await self.process_block(block)
+
+        finally:
+            await self.teardown()
 
+    async def setup(self):
+        """
+        Prepares the observer before the first block is processed.
+        """
         btul.logging.info(
             "🚀 MetagraphObserver service starting...",
             prefix=self.settings.logging_name,
@@ -65,7 +131,7 @@ class MetagraphObserver:
         )
 
         # Start the geo lookup service if available
-        if self.geo_lookup:
+        if self.geo_lookup and self._owns_geo_lookup:
             await self.geo_lookup.start()
             # Wait for geo data to be ready before proceeding
             btul.logging.info(
@@ -83,7 +149,7 @@ class MetagraphObserver:
                     "⚠️ GeoLite2 data not ready - will use API fallback for country lookups",
                     prefix=self.settings.logging_name,
                 )
-        else:
+        elif not self.geo_lookup:
             btul.logging.info(
                 "💡 No geo license key provided - using API fallback for country lookups",
                 prefix=self.settings.logging_name,
@@ -93,154 +159,115 @@ class MetagraphObserver:
         neurons = await self.database.get_neurons()
 
         # Build the current axons
-        axons = {x.hotkey: x.ip for x in neurons.values()}
+        self._axons = {x.hotkey: x.ip for x in neurons.values()}
 
+    async def process_block(self, block: int):
+        """
+        Detects any neuron changes at the given block and resyncs the storage if needed.
+        Errors are logged and the metagraph marked as unready, so the next block can retry.
+        """
         try:
-            while not self.should_exit.is_set():
-                try:
-
-                    # Wait for either a new block OR a shutdown signal, whichever comes first.
-                    done, _ = await asyncio.wait(
-                        [
-                            asyncio.create_task(self.subtensor.wait_for_block()),
-                            asyncio.create_task(self.should_exit.wait()),
-                        ],
-                        timeout=24,
-                        return_when=asyncio.FIRST_COMPLETED,
-                    )
-
-                    # Timeout, no tasks completed
-                    if not done:
-                        btul.logging.warning(
-                            "⏲️ No new block retrieved within 24 seconds. Retrying..."
-                        )
-                        continue
-
-                    # If shutdown signal is received, break the loop immediately
-                    if self.should_exit.is_set():
-                        break
-
-                    # If no new block was produced (e.g., shutdown happened or something failed), skip this round
-                    # This guards against the case where wait_for_block() returned None or False
-                    if not any(
-                        task.result()
-                        for task in done
-                        if not task.cancelled() and not task.exception()
-                    ):
-                        continue
-
-                    block = await self.subtensor.get_current_block()
-                    btul.logging.info(
-                        f"📦 Block #{block}", prefix=self.settings.logging_name
-                    )
-
-                    # Detect any new neuron registration
-                    has_new_registration, registration_count = (
-                        await self._has_new_neuron_registered(registration_count)
-                    )
+            btul.logging.info(f"📦 Block #{block}", prefix=self.settings.logging_name)
 
-                    # Detect if any neuron IP has changed
-                    has_axons_changed, new_axons = await self._has_neuron_ip_changed(
-                        axons
-                    )
+            # Detect any new neuron registration
+            has_new_registration, self._registration_count = (
+                await self._has_new_neuron_registered(self._registration_count)
+            )
 
-                    # Get the last udpate
-                    last_update = await self.database.get_neuron_last_updated()
+            # Detect if any neuron IP has changed
+            has_axons_changed, new_axons = await self._has_neuron_ip_changed(
+                self._axons
+            )
 
-                    # Get the current state of the metagraph
-                    state = await self.database.get_state()
+            # Get the last udpate
+            last_update = await self.database.get_neuron_last_updated()
 
-                    # Determine whether a resync is needed
-                    time_to_resync = block - last_synced_block >= sync_interval
-                    must_resync = (
-                        has_new_registration
-                        or has_axons_changed
-                        or has_missing_country
-                        or time_to_resync
-                        or last_update is None
-                    )
+            # Get the current state of the metagraph
+            state = await self.database.get_state()
 
-                    if not must_resync:
-                        btul.logging.debug(
-                            "No changes detected; skipping sync.",
-                            prefix=self.settings.logging_name,
-                        )
+            # Determine whether a resync is needed
+            time_to_resync = (
+                block - self._last_synced_block >= self.settings.sync_interval
+            )
+            must_resync = (
+                has_new_registration
+                or has_axons_changed
+                or self._has_missing_country
+                or time_to_resync
+                or last_update is None
+            )
 
-                        # Notify listener the metagraph is ready with retry logic
-                        notification_success = await self._notify_with_retry(
-                            state == "ready"
-                        )
+            if not must_resync:
+                btul.logging.debug(
+                    "No changes detected; skipping sync.",
+                    prefix=self.settings.logging_name,
+                )
 
-                        # If notification failed after retries, force a resync
-                        if not notification_success and state != "ready":
-                            btul.logging.warning(
-                                "🔄 Forcing resync due to persistent data consistency failure",
-                                prefix=self.settings.logging_name,
-                            )
-                            # Don't continue - let it fall through to resync logic
-                        else:
-                            continue
-
-                    if has_axons_changed:
-                        reason = "hotkey/IP changes detected"
-                    elif has_missing_country:
-                        reason = "missing country"
-                    elif time_to_resync:
-                        reason = "periodic sync interval reached"
-                    elif has_new_registration:
-                        reason = "new neuron registration detected"
-                    else:
-                        reason = "no relevant changes"
+                # Notify listener the metagraph is ready with retry logic
+                notification_success = await self._notify_with_retry(
+                    state == "ready"
+                )
 
-                    btul.logging.info(
-                        f"🔄 Syncing neurons due to {reason}.",
+                # If notification failed after retries, force a resync
+                if not notification_success and state != "ready":
+                    btul.logging.warning(
+                        "🔄 Forcing resync due to persistent data consistency failure",
                         prefix=self.settings.logging_name,
                     )
+                    # Don't return - let it fall through to resync logic
+                else:
+                    return
+
+            if has_axons_changed:
+                reason = "hotkey/IP changes detected"
+            elif self._has_missing_country:
+                reason = "missing country"
+            elif time_to_resync:
+                reason = "periodic sync interval reached"
+            elif has_new_registration:
+                reason = "new neuron registration detected"
+            else:
+                reason = "no relevant changes"
 
-                    # Sync from chain and update Redis
-                    try:
-                        axons, has_missing_country = await self._resync(
-                            last_update=last_update
-                        )
+            btul.logging.info(
+                f"🔄 Syncing neurons due to {reason}.",
+                prefix=self.settings.logging_name,
+            )
 
-                        # Store the sync block
-                        last_synced_block = block
+            # Sync from chain and update Redis
+            try:
+                self._axons, self._has_missing_country = await self._resync(
+                    last_update=last_update
+                )
 
-                        # Notify listener the metagraph is ready with retry logic
-                        await self._notify_with_retry(state == "ready")
-                        
-                    except Exception as resync_error:
-                        btul.logging.error(
-                            f"❌ Resync failed: {resync_error}",
-                            prefix=self.settings.logging_name,
-                        )
-                        # Mark metagraph as unready due to resync failure
-                        await self._mark_unready_on_error(f"Resync failed: {resync_error}")
-                        # Continue loop to retry
+                # Store the sync block
+                self._last_synced_block = block
 
-                    # Store the new axons
-                    axons = new_axons
+                # Notify listener the metagraph is ready with retry logic
+                await self._notify_with_retry(state == "ready")
 
-                except ConnectionRefusedError as e:
-                    btul.logging.error(f"Connection refused: {e}")
-                    # Mark metagraph as unready due to connection issues
-                    await self._mark_unready_on_error("Connection refused")
-                    await asyncio.sleep(1)
+            except Exception as resync_error:
+                btul.logging.error(
+                    f"❌ Resync failed: {resync_error}",
+                    prefix=self.settings.logging_name,
+                )
+                # Mark metagraph as unready due to resync failure
+                await self._mark_unready_on_error(f"Resync failed: {resync_error}")
+                # Continue loop to retry
 
-                except Exception as e:
-                    btul.logging.error(
-                        f"❌ Unhandled error in loop: {e}",
-                        prefix=self.settings.logging_name,
-                    )
-                    btul.logging.debug(
-                        traceback.format_exc(), prefix=self.settings.logging_name
-                    )
-                    # Mark metagraph as unready due to unhandled error
-                    await self._mark_unready_on_error(f"Unhandled error: {e}")
+            # Store the new axons
+            self._axons = new_axons
 
-        finally:
+        except Exception as e:
+            await self._handle_loop_error(e)
+
+    async def teardown(self):
+        """
+        Releases the resources and marks the metagraph as unready.
+        """
+        try:
             # Stop the geo lookup service if it was started
-            if self.geo_lookup:
+            if self.geo_lookup and self._owns_geo_lookup:
                 await self.geo_lookup.stop()
 
             # Clean up country API rate limit data
@@ -254,6 +281,7 @@ class MetagraphObserver:
                 await self.database.mark_as_unready()
                 await self.database.notify_state()
 
+        finally:
             # Signal the run is completed
             self.run_complete.set()
 
@@ -307,21 +335,35 @@ class MetagraphObserver:
 
         mhotkeys = set()
 
+        # Index the stored neurons by uid, keeping the first one found
+        stored_neurons_by_uid: dict[int, scmm.Neuron] = {}
+        for neuron in stored_neurons.values():
+            stored_neurons_by_uid.setdefault(neuron.uid, neuron)
+
+        # Resolve the countries of all the new ips in one batch
+        countries = await self._get_countries_for_ips(
+            [
+                mneuron.axon_info.ip
+                for mneuron in self.metagraph.neurons
+                if self._needs_country(
+                    mneuron.axon_info.ip, stored_neurons_by_uid.get(mneuron.uid)
+                )
+            ]
+        )
+
         # Process neurons with retry logic for country API
         for mneuron in self.metagraph.neurons:
             new_axons[mneuron.hotkey] = mneuron.axon_info.ip
 
             # Get the current neuron
-            current_neuron = next(
-                (n for n in stored_neurons.values() if n.uid == mneuron.uid), None
-            )
+            current_neuron = stored_neurons_by_uid.get(mneuron.uid)
 
             # Create the new neuron from the metagraph
             new_neuron = scmm.Neuron.from_proto(mneuron)
 
             # Country resolution with infinite retry for API failures
             country = None
-            if new_neuron.ip != "0.0.0.0" and scsu.is_valid_ipv4(new_neuron.ip):
+            if new_neuron.ip != "0.0.0.0" and scsu.is_valid_ip(new_neuron.ip):
                 # Check if we can reuse existing country data
                 if (
                     current_neuron
@@ -333,8 +375,10 @@ class MetagraphObserver:
                         f"🌍 Reusing country for {new_neuron.hotkey[:8]}... IP {new_neuron.ip}: {country}",
                         prefix=self.settings.logging_name,
                     )
+                elif new_neuron.ip in countries:
+                    country = countries[new_neuron.ip]
                 else:
-                    # Need to get country - retry until successful
+                    # The batch could not resolve it - retry until successful
                     country = await self._get_country_with_infinite_retry(
                         new_neuron.ip, new_neuron.hotkey
                     )
@@ -349,7 +393,7 @@ class MetagraphObserver:
                 current_neuron
                 and current_neuron.country is None
                 and current_neuron.ip != "0.0.0.0"
-                and scsu.is_valid_ipv4(new_neuron.ip)
+                and scsu.is_valid_ip(new_neuron.ip)
             )
 
             if new_neuron == current_neuron and not has_country_none:
@@ -825,6 +869,60 @@ class MetagraphObserver:
         # If we exit the loop due to should_exit being set
         return None
 
+    def _needs_country(self, ip: str, current_neuron: scmm.Neuron) -> bool:
+        """
+        True if the country of the ip has to be resolved, False if there is none
+        or the one of the stored neuron can be reused.
+        """
+        if ip == "0.0.0.0" or not scsu.is_valid_ip(ip):
+            return False
+
+        return not (
+            current_neuron
+            and current_neuron.ip == ip
+            and current_neuron.country is not None
+        )
+
+    async def _get_countries_for_ips(self, ips: list[str]) -> dict[str, str | None]:
+        """
+        Resolve the countries of a batch of ips.
+        Local hits are served in one vectorised lookup, only the distinct misses
+        are sent to the APIs. Ips the APIs could not resolve are left out.
+        """
+        ips = list(dict.fromkeys(ips))
+        if not ips:
+            return {}
+
+        countries: dict[str, str | None] = {}
+        if self.geo_lookup and self.geo_lookup.is_ready():
+            try:
+                local = self.geo_lookup.lookup_countries(ips)
+                countries = {ip: x for ip, x in local.items() if x is not None}
+
+            except Exception as e:
+                btul.logging.warning(
+                    f"⚠️ Ultra-fast geo batch lookup failed: {e}",
+                    prefix=self.settings.logging_name,
+                )
+
+        misses = [ip for ip in ips if ip not in countries]
+        if misses:
+            resolved, errors = await asyncio.to_thread(sccc.get_countries, misses)
+            countries.update(resolved)
+
+            if errors:
+                btul.logging.debug(
+                    f"🌍 {len(errors)} ips could not be resolved in batch, they will be retried one by one",
+                    prefix=self.settings.logging_name,
+                )
+
+        btul.logging.debug(
+            f"🌍 Countries resolved for {len(countries)}/{len(ips)} ips ({len(ips) - len(misses)} local)",
+            prefix=self.settings.logging_name,
+        )
+
+        return countries
+
     def _get_country_for_ip(self, ip: str) -> str:
         """
         Get country for IP address with proper fallback logic.
@@ -846,6 +944,25 @@ class MetagraphObserver:
         # Fall back to API lookup
         return sccc.get_country(ip)
 
+    async def _handle_loop_error(self, error: Exception):
+        """
+        Log an error raised while observing and mark the metagraph as unready.
+        """
+        if isinstance(error, ConnectionRefusedError):
+            btul.logging.error(f"Connection refused: {error}")
+            # Mark metagraph as unready due to connection issues
+            await self._mark_unready_on_error("Connection refused")
+            await asyncio.sleep(1)
+            return
+
+        btul.logging.error(
+            f"❌ Unhandled error in loop: {error}",
+            prefix=self.settings.logging_name,
+        )
+        btul.logging.debug(traceback.format_exc(), prefix=self.settings.logging_name)
+        # Mark metagraph as unready due to unhandled error
+        await self._mark_unready_on_error(f"Unhandled error: {error}")
+
     async def _mark_unready_on_error(self, error_reason: str):
         """
         Mark metagraph as unready when errors occur and notify listeners.
@@ -865,3 +982,99 @@ class MetagraphObserver:
                 f"❌ Failed to mark metagraph as unready (reason: {error_reason}): {notify_error}",
                 prefix=self.settings.logging_name,
             )
+
+
+class MetagraphObserverGroup:
+    """
+    Observes several netuids from a single process.
+    All observers share the same subtensor, block subscription and geo lookup,
+    each one keeping its own metagraph and storage key prefix.
+    """
+
+    def __init__(
+        self,
+        settings: scms.Settings,
+        observers: list[MetagraphObserver],
+        subtensor: btcas.AsyncSubtensor,
+        geo_lookup: scgl.UltraFastGeoLookup = None,
+    ):
+        self.settings = settings
+        self.observers = observers
+        self.subtensor = subtensor
+        self.geo_lookup = geo_lookup
+
+        self.should_exit = asyncio.Event()
+        self.run_complete = asyncio.Event()
+
+    async def start(self):
+        """
+        Starts the shared block loop and dispatches every new block to all observers.
+        """
+        netuids = [x.settings.netuid for x in self.observers]
+        btul.logging.info(
+            f"🚀 Observing netuids {netuids} on a shared block subscription",
+            prefix=self.settings.logging_name,
+        )
+
+        try:
+            if self.geo_lookup:
+                await self.geo_lookup.start()
+                await self.geo_lookup.wait_for_ready(timeout=60.0)
+
+            await asyncio.gather(*(x.setup() for x in self.observers))
+
+            while not self.should_exit.is_set():
+                try:
+                    block = await _wait_for_block(self.subtensor, self.should_exit)
+
+                except Exception as e:
+                    btul.logging.error(
+                        f"❌ Failed to get the next block: {e}",
+                        prefix=self.settings.logging_name,
+                    )
+                    btul.logging.debug(
+                        traceback.format_exc(), prefix=self.settings.logging_name
+                    )
+                    await asyncio.sleep(1)
+                    continue
+
+                if block is None:
+                    continue
+
+                # Each observer handles its own errors, so one netuid cannot block the others
+                await asyncio.gather(*(x.process_block(block) for x in self.observers))
+
+        finally:
+            await asyncio.gather(
+                *(x.teardown() for x in self.observers), return_exceptions=True
+            )
+
+            if self.geo_lookup:
+                await self.geo_lookup.stop()
+
+            self.run_complete.set()
+
+            btul.logging.info(
+                "🛑 MetagraphObserverGroup exiting...",
+                prefix=self.settings.logging_name,
+            )
+
+    async def stop(self):
+        """
+        Signals all the observers to stop and waits for the loop to exit cleanly.
+        """
+        btul.logging.info(
+            "MetagraphObserverGroup stopping...", prefix=self.settings.logging_name
+        )
+
+        # Observers check their own event while retrying country lookups
+        for observer in self.observers:
+            observer.should_exit.set()
+
+        self.should_exit.set()
+
+        await self.run_complete.wait()
+
+        btul.logging.info(
+            "✅ MetagraphObserverGroup stopped", prefix=self.settings.logging_name
+        )
@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 
 import subvortex.core.settings_utils as scsu
 
@@ -20,6 +20,12 @@ class Settings:
     UID of the subnet
     """
 
+    netuids: str = None
+    """
+    Comma-separated list of extra netuids to observe in the same process (e.g. "7,92").
+    Every netuid shares the block subscription but gets its own storage key prefix
+    """
+
     sync_interval: int = 100
     """
     Force resync every X blocks to keep neuron data fresh
@@ -40,6 +46,48 @@ class Settings:
     Output directory for geo database files storage
     """
 
+    geo_cache_size: int = 10000
+    """
+    Maximum number of IP to country results kept in the geo lookup LRU cache
+    """
+
+    geo_reload_check_interval: int = 60
+    """
+    Interval in seconds between two checks of the geo database files for hot reloading
+    """
+
+    def get_netuids(self) -> list[int]:
+        """
+        Return the netuids to observe, the main netuid always being the first one
+        """
+        netuids = [self.netuid]
+        for value in (self.netuids or "").split(","):
+            value = value.strip()
+            if not value:
+                continue
+
+            netuid = int(value)
+            if netuid not in netuids:
+                netuids.append(netuid)
+
+        return netuids
+
+    def for_netuid(self, netuid: int) -> "Settings":
+        """
+        Return a copy of the settings scoped to the netuid.
+        The main netuid keeps the default key prefix so existing consumers keep working
+        """
+        if netuid == self.netuid:
+            return replace(self, netuids=None)
+
+        return replace(
+            self,
+            netuid=netuid,
+            netuids=None,
+            key_prefix=f"{self.key_prefix}:{netuid}",
+            logging_name=f"{self.logging_name}:{netuid}",
+        )
+
     @classmethod
     def create(cls) -> "Settings":
         return scsu.create_settings_instance(cls)
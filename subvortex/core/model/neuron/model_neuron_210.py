@@ -12,8 +12,11 @@ class NeuronModel:
 
     version = "2.1.0"
 
+    def __init__(self, prefix: str = "sv"):
+        self.prefix = prefix
+
     def _key(self, hotkey: str) -> str:
-        return f"sv:neuron:{hotkey}"
+        return f"{self.prefix}:neuron:{hotkey}"
 
     async def read(self, redis: Redis, hotkey: str) -> Neuron | None:
         key = self._key(hotkey)
@@ -32,7 +35,7 @@ class NeuronModel:
             if not raw:
                 continue
 
-            ss58_address = decoded_key.split("sv:neuron:")[1]
+            ss58_address = decoded_key.split(f"{self.prefix}:neuron:")[1]
             data = decode_hash(raw)
             miners[ss58_address] = Neuron.from_dict(data)
 
@@ -84,8 +84,10 @@ class SSEHandler(BaseHTTPRequestHandler):
             self._remove_client()
 
     def send_event(self, event):
+        # The event can be serialised already, so it is serialised once for all the clients
+        data = event if isinstance(event, str) else json.dumps(event)
         try:
-            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
             self.no_events_sent = False
             self.wfile.flush()
         except (
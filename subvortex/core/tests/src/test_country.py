@@ -0,0 +1,279 @@
+import json
+import time
+import threading
+import pytest
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import subvortex.core.country.country as sccc
+
+
+@pytest.fixture(autouse=True)
+def clean_rate_limits():
+    sccc.cleanup_all_rate_limits()
+    yield
+    sccc.cleanup_all_rate_limits()
+
+
+def test_get_countries_deduplicates_ips():
+    calls = []
+
+    def get_country(ip):
+        calls.append(ip)
+        return {"1.1.1.1": "AU", "8.8.8.8": "US"}.get(ip)
+
+    with patch("subvortex.core.country.country.get_country", side_effect=get_country):
+        countries, errors = sccc.get_countries(
+            ["1.1.1.1", "8.8.8.8", "1.1.1.1", "::ffff:8.8.8.8", "9.9.9.9"]
+        )
+
+    assert sorted(calls) == ["1.1.1.1", "8.8.8.8", "9.9.9.9"]
+    assert countries == {
+        "1.1.1.1": "AU",
+        "8.8.8.8": "US",
+        "::ffff:8.8.8.8": "US",
+        "9.9.9.9": None,
+    }
+    assert errors == {}
+
+
+def test_get_countries_reports_failed_ips():
+    def get_country(ip):
+        if ip == "2.2.2.2":
+            raise sccc.CountryApiException("All APIs failed", {"ipinfo": 10})
+        return "FR"
+
+    with patch("subvortex.core.country.country.get_country", side_effect=get_country):
+        countries, errors = sccc.get_countries(["1.1.1.1", "2.2.2.2"])
+
+    assert countries == {"1.1.1.1": "FR"}
+    assert list(errors.keys()) == ["2.2.2.2"]
+    assert errors["2.2.2.2"].rate_limited == {"ipinfo": 10}
+
+
+def test_get_countries_empty():
+    assert sccc.get_countries([]) == ({}, {})
+
+
+def test_get_countries_bounds_concurrency_per_api():
+    lock = threading.Lock()
+    running = {"value": 0, "max": 0}
+
+    def ipinfo(ip):
+        with lock:
+            running["value"] += 1
+            running["max"] = max(running["max"], running["value"])
+
+        threading.Event().wait(0.02)
+
+        with lock:
+            running["value"] -= 1
+
+        return "US", None
+
+    with patch(
+        "subvortex.core.country.country._get_country_by_ipinfo_io", side_effect=ipinfo
+    ):
+        countries, errors = sccc.get_countries([f"10.0.0.{i}" for i in range(12)])
+
+    assert len(countries) == 12
+    assert errors == {}
+    assert running["max"] <= sccc.API_MAX_CONCURRENCY["ipinfo"]
+
+
+class StubApi:
+    """
+    Local HTTP server standing for a country API.
+    Answers {"country": ..., "countryCode": ...} after `delay` seconds, or `status` if not 200.
+    """
+
+    def __init__(self, country="US", delay=0.0, status=200):
+        self.country = country
+        self.delay = delay
+        self.status = status
+        self.calls = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.calls += 1
+                time.sleep(stub.delay)
+                body = json.dumps(
+                    {"country": stub.country, "countryCode": stub.country}
+                ).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_apis(monkeypatch):
+    sccc.reset_circuit_breakers()
+    monkeypatch.setattr(sccc, "API_HEDGE_DELAY", 0.05)
+
+    apis = {
+        "ipinfo": StubApi("US"),
+        "ip_api": StubApi("FR"),
+        "country_is": StubApi("DE"),
+    }
+    monkeypatch.setattr(sccc, "IPINFO_IO_BASE_URL", apis["ipinfo"].url)
+    monkeypatch.setattr(sccc, "IP_API_BASE_URL", apis["ip_api"].url)
+    monkeypatch.setattr(sccc, "COUNTRY_IS_BASE_URL", apis["country_is"].url)
+
+    yield apis
+
+    for api in apis.values():
+        api.close()
+    sccc.reset_circuit_breakers()
+
+
+def test_get_country_uses_first_api(stub_apis):
+    assert sccc.get_country("1.1.1.1") == "US"
+    assert stub_apis["ip_api"].calls == 0
+    assert stub_apis["country_is"].calls == 0
+
+
+def test_get_country_hedges_slow_api(stub_apis):
+    stub_apis["ipinfo"].delay = 1
+
+    start = time.perf_counter()
+    country = sccc.get_country("1.1.1.1")
+    duration = time.perf_counter() - start
+
+    assert country == "FR"
+    assert duration < 0.5
+
+
+def test_get_country_starts_next_api_on_failure(stub_apis, monkeypatch):
+    monkeypatch.setattr(sccc, "API_HEDGE_DELAY", 10)
+    stub_apis["ipinfo"].status = 500
+
+    start = time.perf_counter()
+    country = sccc.get_country("1.1.1.1")
+
+    assert country == "FR"
+    assert time.perf_counter() - start < 1
+
+
+def test_get_country_opens_circuit_of_failing_api(stub_apis):
+    for api in stub_apis.values():
+        api.status = 500
+
+    for i in range(sccc.API_FAILURE_THRESHOLD):
+        with pytest.raises(sccc.CountryApiException):
+            sccc.get_country(f"1.1.1.{i}")
+
+    assert sccc.get_api_stats()["ipinfo"]["state"] == "open"
+
+    # Open circuits are skipped and reported with the time before the next probe
+    calls = stub_apis["ipinfo"].calls
+    with pytest.raises(sccc.CountryApiException) as e:
+        sccc.get_country("1.1.1.100")
+
+    assert stub_apis["ipinfo"].calls == calls
+    assert 0 < e.value.rate_limited["ipinfo"] <= sccc.API_RESET_TIMEOUT
+
+
+def test_get_country_prefers_fastest_api(stub_apis, monkeypatch):
+    stub_apis["ipinfo"].delay = 0.2
+
+    # The race measures both APIs
+    assert sccc.get_country("1.1.1.1") == "FR"
+    time.sleep(0.3)
+
+    stats = sccc.get_api_stats()
+    assert stats["ip_api"]["latency"] < stats["ipinfo"]["latency"]
+
+    # Then the fastest one is called first, and answers before the next one is started
+    monkeypatch.setattr(sccc, "API_HEDGE_DELAY", 10)
+    stub_apis["ipinfo"].delay = 0
+    calls = {name: api.calls for name, api in stub_apis.items()}
+
+    assert sccc.get_country("1.1.1.2") == "FR"
+    assert stub_apis["ip_api"].calls == calls["ip_api"] + 1
+    assert stub_apis["ipinfo"].calls == calls["ipinfo"]
+
+
+def test_get_country_raises_when_all_apis_fail(stub_apis):
+    for api in stub_apis.values():
+        api.status = 500
+
+    with pytest.raises(sccc.CountryApiException):
+        sccc.get_country("1.1.1.1")
+
+
+def half_open_breaker():
+    breaker = sccc.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    return breaker
+
+
+def test_get_country_does_not_take_probe_of_api_not_called(stub_apis, monkeypatch):
+    monkeypatch.setattr(sccc, "API_HEDGE_DELAY", 10)
+    breaker = sccc._circuit_breakers["ipinfo"] = half_open_breaker()
+    # The fastest API answers before the half-open one is started
+    sccc._circuit_breakers["ip_api"].record_success(0.01)
+
+    assert sccc.get_country("1.1.1.1") == "FR"
+
+    assert stub_apis["ipinfo"].calls == 0
+    assert breaker.state == "half-open"
+    assert breaker.allow() == (True, True)
+
+
+def test_get_country_releases_probe_of_rate_limited_api(stub_apis):
+    breaker = sccc._circuit_breakers["ipinfo"] = half_open_breaker()
+    stub_apis["ipinfo"].status = 429
+
+    assert sccc.get_country("1.1.1.1") == "FR"
+
+    assert stub_apis["ipinfo"].calls == 1
+    assert breaker.state == "half-open"
+    assert breaker.allow() == (True, True)
+
+
+def test_call_without_probe_does_not_release_probe(stub_apis):
+    breaker = sccc._circuit_breakers["ipinfo"] = half_open_breaker()
+    assert breaker.allow() == (True, True)
+    stub_apis["ipinfo"].status = 429
+
+    # A call started before the circuit opened ends while another one is probing
+    sccc._call_api(
+        sccc._get_country_by_ipinfo_io, "ipinfo", "1.1.1.1", [], {}, probe=False
+    )
+
+    assert breaker.allow() == (False, False)
+
+
+def test_circuit_breaker_half_open_probe():
+    breaker = sccc.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow() == (False, False)
+
+    time.sleep(0.06)
+    assert breaker.allow() == (True, True)
+    # Only one probe at a time
+    assert breaker.allow() == (False, False)
+
+    breaker.record_success(0.01)
+    assert breaker.state == "closed"
+    assert breaker.allow() == (True, False)
@@ -0,0 +1,35 @@
+import pytest
+
+from subvortex.core.country.benchmark import generate_dataset, run_benchmark
+
+
+def test_generate_dataset_is_reproducible(tmp_path):
+    generate_dataset(str(tmp_path / "a"), ipv4_ranges=100, ipv6_ranges=50, seed=1)
+    generate_dataset(str(tmp_path / "b"), ipv4_ranges=100, ipv6_ranges=50, seed=1)
+
+    for name in (
+        "GeoLite2-Country-Locations-en.csv",
+        "GeoLite2-Country-Blocks-IPv4.csv",
+        "GeoLite2-Country-Blocks-IPv6.csv",
+    ):
+        assert (tmp_path / "a" / name).read_text() == (tmp_path / "b" / name).read_text()
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark(tmp_path):
+    generate_dataset(str(tmp_path), ipv4_ranges=1000, ipv6_ranges=100)
+
+    results = await run_benchmark(str(tmp_path), lookups=200, batch_size=50)
+
+    assert results["ipv4_ranges"] == 1000
+    assert results["ipv6_ranges"] == 100
+    assert results["index_bytes"] > 0
+    for key in (
+        "csv_load_s",
+        "index_load_s",
+        "lookup_ipv4_p99_us",
+        "lookup_ipv6_p99_us",
+        "lookup_cached_p50_us",
+        "batch_lookups_per_s",
+    ):
+        assert results[key] > 0
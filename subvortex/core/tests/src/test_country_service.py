@@ -0,0 +1,95 @@
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+
+import subvortex.core.country.country as sccc
+from subvortex.core.country.country_service import CountryService
+
+DATA = {
+    "last-modified": "2025-01-01",
+    "enable_custom_api": False,
+    "localisations": {
+        "DE": {"country": "Germany", "latitude": 51.165691, "longitude": 10.451526},
+        "FR": {"country": "France", "latitude": "46.227638", "longitude": 2.213749},
+        "XX": {"country": "Unknown"},
+    },
+    "overrides": {
+        "1.1.1.1": "DE",
+        "::ffff:2.2.2.2": "FR",
+    },
+}
+
+
+@pytest.fixture
+def service():
+    service = CountryService(netuid=7)
+    service.run(DATA)
+    return service
+
+
+def test_get_locations_is_read_only_and_not_copied(service):
+    locations = service.get_locations()
+
+    assert locations["DE"]["latitude"] == 51.165691
+    assert service.get_locations() is locations
+
+    with pytest.raises(TypeError):
+        locations["DE"] = {}
+
+    with pytest.raises(TypeError):
+        locations["DE"]["latitude"] = 0
+
+
+def test_get_coordinates(service):
+    assert service.get_coordinates("DE") == (51.165691, 10.451526)
+    assert service.get_coordinates("FR") == (46.227638, 2.213749)
+    assert service.get_coordinates("XX") is None
+    assert service.get_coordinates("US") is None
+
+
+def test_get_country_uses_overrides(service):
+    with patch("subvortex.core.country.country_service.call_api") as api:
+        assert service.get_country("1.1.1.1") == "DE"
+        assert service.get_country("::ffff:1.1.1.1") == "DE"
+        assert service.get_country("2.2.2.2") == "FR"
+
+    api.assert_not_called()
+
+
+def test_refresh_swaps_snapshot(service):
+    snapshot = service.get_snapshot()
+
+    service.run({"localisations": {"US": {"latitude": 1, "longitude": 2}}})
+
+    assert snapshot.locations["DE"]["country"] == "Germany"
+    assert "DE" not in service.get_locations()
+    assert service.get_coordinates("US") == (1.0, 2.0)
+    assert service.get_last_modified() is None
+    assert service._is_custom_api_enabled() is True
+
+
+def test_get_countries_skips_rate_limited_api_for_the_batch(service, monkeypatch):
+    sccc.reset_circuit_breakers()
+    sccc.cleanup_all_rate_limits()
+    monkeypatch.setattr(
+        "subvortex.core.country.country_service.COUNTRY_BATCH_MAX_WORKERS", 1
+    )
+    calls = {"country_is": 0, "ip_api": 0}
+
+    def country_is(ip):
+        calls["country_is"] += 1
+        response = MagicMock(status_code=429, headers={})
+        raise requests.HTTPError(response=response)
+
+    def ip_api(ip):
+        calls["ip_api"] += 1
+        return "US", None
+
+    monkeypatch.setattr(sccc, "_get_country_by_country_is", country_is)
+    monkeypatch.setattr(sccc, "_get_country_by_ip_api", ip_api)
+
+    countries = service.get_countries(["3.3.3.1", "3.3.3.2", "3.3.3.3"])
+
+    assert countries == {"3.3.3.1": "US", "3.3.3.2": "US", "3.3.3.3": "US"}
+    assert calls == {"country_is": 1, "ip_api": 3}
+    sccc.cleanup_all_rate_limits()
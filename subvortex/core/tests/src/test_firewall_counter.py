@@ -0,0 +1,137 @@
+import json
+import pytest
+import numpy as np
+
+from subvortex.core.firewall.firewall_counter import (
+    SlidingWindowCounter,
+    QuantileSketch,
+    RateStatistics,
+)
+
+
+def test_count_events_in_window():
+    counter = SlidingWindowCounter(window=10, buckets=10)
+
+    for t in range(5):
+        counter.add(100 + t)
+
+    assert counter.count(104) == 5
+
+
+def test_count_expires_events_out_of_window():
+    counter = SlidingWindowCounter(window=10, buckets=10)
+
+    counter.add(100)
+    counter.add(105)
+    counter.add(109)
+
+    assert counter.count(109.5) == 3
+    assert counter.count(110) == 2
+    assert counter.count(115) == 1
+    assert counter.count(119) == 0
+
+
+def test_count_resets_after_long_idle_period():
+    counter = SlidingWindowCounter(window=10, buckets=10)
+
+    for _ in range(1000):
+        counter.add(100)
+
+    assert counter.count(100) == 1000
+    assert counter.count(10_000) == 0
+
+    counter.add(10_000)
+    assert counter.count(10_000) == 1
+
+
+def test_late_events_are_counted_in_newest_bucket():
+    counter = SlidingWindowCounter(window=10, buckets=10)
+
+    counter.add(105)
+    counter.add(101)
+
+    assert counter.count(105) == 2
+    assert counter.count(115) == 0
+
+
+def test_counter_state_is_bounded():
+    counter = SlidingWindowCounter(window=60, buckets=60)
+
+    for i in range(100_000):
+        counter.add(i / 100)
+
+    assert len(counter._counts) == 60
+    # Events of the last 59 seconds plus the current one
+    assert counter.count(999.99) == 5_999 + 1
+
+
+def test_counter_state_round_trip():
+    counter = SlidingWindowCounter(window=10, buckets=10)
+    for t in (100, 103, 103, 108):
+        counter.add(t)
+
+    restored = SlidingWindowCounter.from_state(json.loads(json.dumps(counter.to_state())))
+
+    assert restored.count(108) == 4
+    assert restored.count(112) == 3
+    assert restored.count(113) == 1
+    assert restored.count(200) == 0
+
+
+def test_quantile_sketch_matches_numpy_percentile_for_small_values():
+    rng = np.random.default_rng(42)
+    values = rng.integers(0, 100, size=1000).tolist()
+
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+
+    for q in (0, 0.25, 0.5, 0.75, 0.99, 1):
+        assert sketch.quantile(q) == pytest.approx(np.percentile(values, q * 100))
+
+
+def test_quantile_sketch_relative_error_for_large_values():
+    rng = np.random.default_rng(42)
+    values = rng.integers(1_000, 1_000_000, size=1000).tolist()
+
+    sketch = QuantileSketch(relative_accuracy=0.02)
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.quantile(0.75) == pytest.approx(np.percentile(values, 75), rel=0.05)
+
+
+def test_quantile_sketch_remove():
+    sketch = QuantileSketch()
+    for value in (1, 2, 3, 50):
+        sketch.add(value)
+
+    sketch.remove(50)
+    sketch.remove(7)
+
+    assert len(sketch) == 3
+    assert sketch.quantile(1) == 3
+
+
+def test_quantile_sketch_summary():
+    sketch = QuantileSketch()
+    for value in (1, 1, 2, 3, 50):
+        sketch.add(value)
+
+    assert sketch.summary(2.5) == (3, 4, 2)
+    assert sketch.summary(0) == (0, 0, 0)
+
+
+def test_rate_statistics_update_replaces_source_rate():
+    stats = RateStatistics(window=10)
+
+    stats.update("a", 1)
+    stats.update("b", 2)
+    stats.update("a", 5)
+
+    assert len(stats.rates) == 2
+    assert stats.rates.quantile(1) == 5
+
+    stats.remove("a")
+    assert "a" not in stats
+    assert stats.rates.quantile(1) == 2
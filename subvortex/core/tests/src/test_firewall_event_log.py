@@ -0,0 +1,160 @@
+import os
+import json
+import pytest
+
+from subvortex.core.firewall.firewall_event_log import FirewallEventLog
+
+
+def create_events(request_id, count=1):
+    return [
+        (request_id, json.dumps({"request_id": request_id, "index": i}))
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def event_log(tmp_path):
+    log = FirewallEventLog(directory=str(tmp_path / "events"), segment_size=200)
+    log.open()
+    yield log
+    log.close()
+
+
+def test_read_returns_appended_events(event_log):
+    event_log.append(create_events("a", 2) + create_events("b"))
+
+    events, cursor = event_log.read()
+
+    assert [(x["request_id"], x["index"]) for x in events] == [
+        ("a", 0),
+        ("a", 1),
+        ("b", 0),
+    ]
+    assert cursor == 3
+
+
+def test_read_from_cursor(event_log):
+    event_log.append(create_events("a", 3))
+    _, cursor = event_log.read()
+
+    event_log.append(create_events("b", 2))
+    events, cursor = event_log.read(cursor)
+
+    assert [x["request_id"] for x in events] == ["b", "b"]
+    assert cursor == 5
+
+
+def test_segments_are_rotated_by_size(event_log):
+    for i in range(20):
+        event_log.append(create_events(f"request-{i}"))
+
+    assert event_log.get_stats()["segments"] > 1
+    assert all(
+        os.path.getsize(os.path.join(event_log.directory, x)) < 300
+        for x in os.listdir(event_log.directory)
+    )
+    assert len(event_log.read()[0]) == 20
+
+
+def test_removed_events_are_not_read(event_log):
+    event_log.append(create_events("a", 2) + create_events("b"))
+
+    event_log.remove(["a"])
+    event_log.append(create_events("a"))
+
+    events, _ = event_log.read()
+    assert [x["request_id"] for x in events] == ["b"]
+    assert event_log.get_stats()["live_events"] == 1
+
+
+def test_remove_does_not_rewrite_segments(event_log):
+    event_log.append(create_events("a", 2))
+    path = event_log._get_path(0)
+    content = open(path).read()
+
+    event_log.remove(["a"])
+
+    assert open(path).read() == content
+
+
+def test_compact_deletes_removed_segments(event_log):
+    for i in range(20):
+        event_log.append(create_events(f"request-{i}"))
+    segments = event_log.get_stats()["segments"]
+
+    event_log.remove([f"request-{i}" for i in range(20)])
+    event_log.compact()
+
+    stats = event_log.get_stats()
+    # Only the active segment is kept
+    assert stats["segments"] == 1 < segments
+    assert stats["removed_requests"] <= 2
+
+
+def test_compact_rewrites_sparse_segments(tmp_path):
+    log = FirewallEventLog(directory=str(tmp_path), segment_size=1000)
+    log.open()
+    log.append(create_events("a", 6) + create_events("b", 4))
+    log._rotate()
+    log.append(create_events("c"))
+
+    log.remove(["a", "c"])
+    log.compact()
+
+    stats = log.get_stats()
+    assert stats["events"] == 5 and stats["live_events"] == 4
+    assert stats["removed_requests"] == 1
+    assert [x["request_id"] for x in log.read()[0]] == ["b"] * 4
+    # The cursor is still valid after the compaction
+    assert [x["index"] for x in log.read(8)[0]] == [2, 3]
+    log.close()
+
+
+def test_compact_does_nothing_once_closed(tmp_path):
+    log = FirewallEventLog(directory=str(tmp_path), segment_size=200)
+    log.open()
+    for i in range(20):
+        log.append(create_events(f"request-{i}"))
+    log.remove([f"request-{i}" for i in range(20)])
+    log.close()
+    files = sorted(os.listdir(tmp_path))
+
+    log.compact()
+
+    assert sorted(os.listdir(tmp_path)) == files
+    assert not log.is_open
+
+
+def test_open_rebuilds_the_index(tmp_path):
+    log = FirewallEventLog(directory=str(tmp_path), segment_size=200)
+    log.open()
+    for i in range(10):
+        log.append(create_events(f"request-{i}"))
+    log.remove(["request-0", "request-5"])
+    log.close()
+
+    log = FirewallEventLog(directory=str(tmp_path), segment_size=200)
+    log.open()
+    log.append(create_events("request-5") + create_events("request-10"))
+
+    events, cursor = log.read()
+    assert len(events) == 9 and "request-5" not in [x["request_id"] for x in events]
+    assert cursor == 11
+    log.close()
+
+
+def test_open_ignores_partially_written_line(tmp_path):
+    log = FirewallEventLog(directory=str(tmp_path))
+    log.open()
+    log.append(create_events("a"))
+    log.close()
+
+    path = log._get_path(0)
+    with open(path, "a") as file:
+        file.write(json.dumps({"seq": 1, "event": {"request_id": "b"}})[:10])
+
+    log.open()
+    log.append(create_events("c"))
+
+    assert [x["request_id"] for x in log.read()[0]] == ["a", "c"]
+    log.close()
@@ -0,0 +1,161 @@
+import pytest
+from unittest.mock import MagicMock
+
+import subvortex.core.firewall.firewall_linux_tool as scflt
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    calls = []
+
+    def run(commands, **kwargs):
+        calls.append(commands)
+        # Rules do not exist yet
+        return MagicMock(returncode=1 if "-C" in commands else 0)
+
+    monkeypatch.setattr(scflt.subprocess, "run", run)
+    return calls
+
+
+def test_create_queue_rule(commands):
+    scflt.FirewallLinuxTool().create_allow_rule(dport=8091, protocol="tcp", queue=1)
+
+    assert commands[-1] == [
+        "iptables", "-A", "INPUT", "-p", "tcp", "--dport", "8091",
+        "-j", "NFQUEUE", "--queue-num", "1",
+    ]
+
+
+@pytest.fixture
+def ruleset(monkeypatch):
+    state = {"listing": "-P INPUT ACCEPT\n", "calls": []}
+
+    def run(commands, **kwargs):
+        state["calls"].append((commands, kwargs.get("input")))
+        stdout = state["listing"] if commands[:2] == ["iptables", "-S"] else ""
+        return MagicMock(returncode=0, stdout=stdout, stderr="")
+
+    monkeypatch.setattr(scflt.subprocess, "run", run)
+    return state
+
+
+def test_apply_rules_in_one_transaction(ruleset):
+    tool = scflt.FirewallLinuxTool()
+
+    assert tool.apply_rules(
+        [
+            {"interface": "lo"},
+            {"dport": 22, "protocol": "tcp"},
+            {"dport": 8091, "protocol": "tcp", "queue": 1},
+            {"ip": "10.0.0.1", "allow": False},
+        ],
+        policy="DROP",
+    )
+
+    # One listing and one restore, whatever the number of rules
+    assert [c[0][0] for c in ruleset["calls"]] == ["iptables", "iptables-restore"]
+    assert ruleset["calls"][-1][1].splitlines() == [
+        "*filter",
+        ":INPUT DROP [0:0]",
+        "-A INPUT -i lo -j ACCEPT",
+        "-A INPUT -p tcp -m tcp --dport 22 -j ACCEPT",
+        "-A INPUT -p tcp -m tcp --dport 8091 -j NFQUEUE --queue-num 1",
+        "-I INPUT -s 10.0.0.1/32 -j DROP",
+        "COMMIT",
+    ]
+
+
+def test_apply_rules_only_applies_the_diff(ruleset):
+    tool = scflt.FirewallLinuxTool()
+    tool.apply_rules([{"dport": 22}, {"dport": 8091, "queue": 1}])
+
+    ruleset["listing"] = (
+        "-P INPUT DROP\n"
+        "-A INPUT -p tcp -m tcp --dport 22 -j ACCEPT\n"
+        "-A INPUT -p tcp -m tcp --dport 8091 -j NFQUEUE --queue-num 1\n"
+        "-A INPUT -p tcp -m tcp --dport 25 -j ACCEPT\n"
+    )
+    assert tool.apply_rules([{"dport": 22}, {"dport": 443}], policy="DROP")
+
+    # The rule not managed by the tool is kept
+    assert ruleset["calls"][-1][1].splitlines() == [
+        "*filter",
+        "-D INPUT -p tcp -m tcp --dport 8091 -j NFQUEUE --queue-num 1",
+        "-A INPUT -p tcp -m tcp --dport 443 -j ACCEPT",
+        "COMMIT",
+    ]
+
+
+def test_apply_rules_removes_the_queue_rules_of_a_previous_run(ruleset):
+    # Rules left by a previous run with other queue numbers
+    ruleset["listing"] = (
+        "-P INPUT DROP\n"
+        "-A INPUT -p tcp -m tcp --dport 22 -j ACCEPT\n"
+        "-A INPUT -p tcp -m tcp --dport 8091 -j NFQUEUE --queue-num 5\n"
+        "-A INPUT -p tcp -m tcp --dport 9944 -j NFQUEUE --queue-num 6\n"
+    )
+
+    assert scflt.FirewallLinuxTool().apply_rules(
+        [
+            {"dport": 22},
+            {"dport": 8091, "queue": 1},
+            {"dport": 9944, "queue": 2},
+        ],
+        policy="DROP",
+    )
+
+    assert ruleset["calls"][-1][1].splitlines() == [
+        "*filter",
+        "-D INPUT -p tcp -m tcp --dport 8091 -j NFQUEUE --queue-num 5",
+        "-D INPUT -p tcp -m tcp --dport 9944 -j NFQUEUE --queue-num 6",
+        "-A INPUT -p tcp -m tcp --dport 8091 -j NFQUEUE --queue-num 1",
+        "-A INPUT -p tcp -m tcp --dport 9944 -j NFQUEUE --queue-num 2",
+        "COMMIT",
+    ]
+
+
+def test_apply_rules_without_changes(ruleset):
+    ruleset["listing"] = "-P INPUT DROP\n-A INPUT -i lo -j ACCEPT\n"
+
+    assert not scflt.FirewallLinuxTool().apply_rules(
+        [{"interface": "lo"}], policy="DROP"
+    )
+    assert [c[0][0] for c in ruleset["calls"]] == ["iptables"]
+
+
+def test_apply_rules_failure_keeps_previous_rules(monkeypatch):
+    def run(commands, **kwargs):
+        return MagicMock(
+            returncode=1 if commands[0] == "iptables-restore" else 0,
+            stdout="-P INPUT ACCEPT\n",
+            stderr="error",
+        )
+
+    monkeypatch.setattr(scflt.subprocess, "run", run)
+    tool = scflt.FirewallLinuxTool()
+
+    assert not tool.apply_rules([{"dport": 22}])
+    assert tool._applied == []
+
+
+def test_update_set_in_one_transaction(ruleset):
+    assert scflt.FirewallLinuxTool().update_set(
+        "blocklist", add=["10.0.0.1", "10.0.0.2"], remove=["10.0.0.3"], timeout=60
+    )
+
+    commands, content = ruleset["calls"][-1]
+    assert commands == ["ipset", "-exist", "restore"]
+    assert content.splitlines() == [
+        "create blocklist hash:ip timeout 60",
+        "add blocklist 10.0.0.1 timeout 60",
+        "add blocklist 10.0.0.2 timeout 60",
+        "del blocklist 10.0.0.3",
+    ]
+
+
+def test_rule_spec_matching_a_set():
+    spec = scflt.get_rule_spec(
+        match_set="subvortex-drop", match_set_flags="src,dst", allow=False
+    )
+
+    assert spec == "-m set --match-set subvortex-drop src,dst -j DROP"
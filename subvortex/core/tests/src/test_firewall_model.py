@@ -0,0 +1,75 @@
+import pytest
+
+from subvortex.core.firewall.firewall_model import (
+    RuleIndex,
+    RuleType,
+    create_rule,
+    is_valid_ip,
+    is_valid_port,
+    is_valid_number,
+)
+
+
+def create_index(*configs):
+    return RuleIndex([create_rule(x) for x in configs])
+
+
+def test_validators():
+    assert is_valid_ip("192.168.0.1")
+    assert not is_valid_ip("192.168.0.256")
+    assert not is_valid_ip("192.168.0")
+    assert is_valid_port(8091)
+    assert not is_valid_port(70000)
+    assert is_valid_number("10")
+    assert not is_valid_number("010")
+
+
+def test_create_rule_rejects_invalid_ip():
+    with pytest.raises(ValueError):
+        create_rule({"type": "deny", "ip": "1.2.3"})
+
+
+def test_get_ip_port_rule_first():
+    index = create_index(
+        {"type": "deny", "dport": 8091, "protocol": "tcp"},
+        {"type": "deny", "ip": "1.1.1.1"},
+        {"type": "deny", "ip": "1.1.1.1", "dport": 8091, "protocol": "tcp"},
+    )
+
+    rule = index.get(RuleType.DENY, "1.1.1.1", 8091, "tcp")
+
+    assert (rule.ip, rule.dport, rule.protocol) == ("1.1.1.1", 8091, "tcp")
+
+
+def test_get_ip_rule_before_port_rule():
+    index = create_index(
+        {"type": "deny", "dport": 8091, "protocol": "tcp"},
+        {"type": "deny", "ip": "1.1.1.1"},
+    )
+
+    rule = index.get(RuleType.DENY, "1.1.1.1", 8091, "tcp")
+
+    assert (rule.ip, rule.dport) == ("1.1.1.1", None)
+
+
+def test_get_port_rule():
+    index = create_index(
+        {"type": "deny", "ip": "2.2.2.2"},
+        {"type": "allow", "dport": 8091, "protocol": "tcp"},
+        {"type": "detect-dos", "dport": 8091, "protocol": "tcp", "configuration": {"time_window": 10, "packet_threshold": 5}},
+    )
+
+    assert index.get(RuleType.ALLOW, "1.1.1.1", 8091, "tcp").dport == 8091
+    assert index.get(RuleType.DETECT_DOS, "1.1.1.1", 8091, "tcp").time_window == 10
+    assert index.get(RuleType.DENY, "1.1.1.1", 8091, "tcp") is None
+    assert index.get(RuleType.ALLOW, "1.1.1.1", 9944, "tcp") is None
+
+
+def test_get_keeps_first_duplicate_rule():
+    index = create_index(
+        {"type": "detect-dos", "dport": 8091, "protocol": "tcp", "configuration": {"time_window": 10, "packet_threshold": 5}},
+        {"type": "detect-dos", "dport": 8091, "protocol": "tcp", "configuration": {"time_window": 20, "packet_threshold": 5}},
+    )
+
+    assert len(index) == 2
+    assert index.get(RuleType.DETECT_DOS, "1.1.1.1", 8091, "tcp").time_window == 10
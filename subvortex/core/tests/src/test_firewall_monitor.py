@@ -0,0 +1,131 @@
+import json
+import time
+import pytest
+import threading
+from unittest.mock import MagicMock
+
+from subvortex.core.firewall.firewall_monitor import (
+    FirewallMonitor,
+    FILENAME,
+    encode_event,
+)
+
+
+def log(request_id):
+    return encode_event({"type": "log", "data": {"request_id": request_id}})
+
+
+def clean(request_ids):
+    return encode_event({"type": "clean", "data": request_ids})
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    instance = FirewallMonitor(sse=MagicMock())
+    instance.open()
+    return instance
+
+
+def test_encode_event_serialises_once():
+    event = log("a")
+
+    assert json.loads(event["json"]) == {"request_id": "a"}
+    assert json.loads(event["message"]) == {"type": "log", "data": {"request_id": "a"}}
+    assert json.loads(clean(["a"])["message"]) == {"type": "clean", "data": ["a"]}
+
+
+def test_process_events_removes_cleaned_requests(monitor):
+    monitor._process_events([log("a"), log("b"), clean(["a"]), log("c")])
+
+    events, _ = monitor.read_events()
+    assert [x["request_id"] for x in events] == ["b", "c"]
+
+
+def test_open_imports_previous_events_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(FILENAME, "w") as file:
+        file.write(json.dumps({"request_id": "a"}) + "\n")
+
+    monitor = FirewallMonitor(sse=MagicMock())
+    events, _ = monitor.read_events()
+
+    assert [x["request_id"] for x in events] == ["a"]
+    assert not (tmp_path / FILENAME).exists()
+
+
+def test_broadcast_sends_the_serialised_event(monitor):
+    monitor._sse.has_new_subscribers.return_value = False
+    event = log("a")
+
+    monitor._broadcast(event)
+
+    monitor._sse.broadcast.assert_called_once_with("firewall", event["message"])
+
+
+def test_new_subscriber_gets_recent_events_without_reading_the_log(monitor):
+    monitor._broadcast(log("a"))
+    monitor._broadcast(log("b"))
+    monitor._broadcast(clean(["a"]))
+
+    monitor._log = MagicMock()
+    monitor._sse.has_new_subscribers.return_value = True
+    monitor._broadcast(log("c"))
+
+    monitor._log.read.assert_not_called()
+    name, message, restore = monitor._sse.broadcast.call_args_list[-2].args
+    assert (name, restore) == ("firewall", True)
+    assert json.loads(message) == {"type": "log", "data": [{"request_id": "b"}]}
+
+
+def test_recent_events_are_bounded(monitor):
+    monitor.replay_size = 3
+
+    for i in range(5):
+        monitor._broadcast(log(f"r{i}"))
+    monitor._broadcast(clean(["r0", "r3"]))
+
+    events = [json.loads(x)["request_id"] for x in monitor.get_recent_events()]
+    assert events == ["r2", "r4"]
+
+    monitor._broadcast(log("r5"))
+    monitor._broadcast(log("r6"))
+
+    # The evicted requests are forgotten
+    assert monitor._recent_removed == set()
+    assert len(monitor._recent_counts) == 3
+
+
+def test_recent_events_are_seeded_from_the_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monitor = FirewallMonitor(sse=MagicMock())
+    monitor.open()
+    monitor._process_events([log("a")])
+    monitor._log.close()
+
+    monitor = FirewallMonitor(sse=MagicMock())
+    monitor.open()
+
+    assert [json.loads(x) for x in monitor.get_recent_events()] == [{"request_id": "a"}]
+
+
+def test_stop_waits_for_the_compaction_before_closing_the_log(monitor):
+    started, closed = threading.Event(), []
+    compact = monitor._log.compact
+
+    def slow_compact():
+        started.set()
+        time.sleep(0.2)
+        closed.append(not monitor._log.is_open)
+        compact()
+
+    monitor._log.compact = slow_compact
+    monitor._compactor = threading.Thread(target=monitor._log.compact)
+    monitor._compactor.start()
+    started.wait()
+    monitor.join = MagicMock()
+
+    monitor.stop()
+
+    assert closed == [False]
+    assert not monitor._log.is_open
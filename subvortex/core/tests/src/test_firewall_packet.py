@@ -0,0 +1,163 @@
+import socket
+import struct
+
+from subvortex.core.firewall.firewall_utils import extract_and_transform_headers
+from subvortex.core.firewall.firewall_packet import (
+    FirewallPacket,
+    TCP_ACK,
+    TCP_PSH,
+    TCP_SYN,
+)
+
+
+class FakeNetfilterPacket:
+    def __init__(self, payload: bytes):
+        self._payload = payload
+
+    def get_payload(self):
+        return self._payload
+
+
+def create_raw_packet(flags, payload=b"", sip="10.0.0.1", dport=8091, seq=1000, ack=0):
+    ip_header = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0,
+        40 + len(payload),
+        0,
+        0,
+        64,
+        6,
+        0,
+        socket.inet_aton(sip),
+        socket.inet_aton("10.0.0.254"),
+    )
+    tcp_header = struct.pack("!HHLLBBHHH", 40000, dport, seq, ack, 5 << 4, flags, 65535, 0, 0)
+    return FakeNetfilterPacket(ip_header + tcp_header + payload)
+
+
+def test_from_packet_decodes_headers():
+    packet = FirewallPacket.from_packet(
+        create_raw_packet(TCP_PSH | TCP_ACK, b"hello", seq=42, ack=7), 100, queue_num=2
+    )
+
+    assert packet.sip == "10.0.0.1"
+    assert packet.dip == "10.0.0.254"
+    assert packet.sport == 40000
+    assert packet.dport == 8091
+    assert packet.protocol == "tcp"
+    assert (packet.seq, packet.ack) == (42, 7)
+    assert packet.flags == "PA"
+    assert packet.flag_bits == TCP_PSH | TCP_ACK
+    assert packet.payload == b"hello"
+    assert packet.queue_num == 2
+    assert packet.current_time == 100
+
+
+def test_flags_ignore_ece_and_cwr():
+    packet = FirewallPacket.from_packet(create_raw_packet(TCP_SYN | 0xC0), 0)
+
+    assert packet.flags == "S"
+    assert packet.flag_bits == TCP_SYN
+
+
+def test_ids_are_computed_once():
+    packet = FirewallPacket.from_packet(create_raw_packet(TCP_SYN, seq=5), 0)
+
+    assert packet.id == "10.0.0.1:8091:tcp"
+    assert packet.internal_id == "10.0.0.1:8091:5:0:S"
+    assert packet.id is packet.id
+    assert packet.internal_id is packet.internal_id
+
+
+def test_payload_headers_are_decoded_when_accessed():
+    packet = FirewallPacket.from_packet(
+        create_raw_packet(TCP_PSH | TCP_ACK, b'{"name": "Score"}'), 0
+    )
+
+    assert packet._payload is None
+    assert packet._headers is None
+    assert packet.headers.synapse_name == "Score"
+
+
+def test_packet_is_slotted():
+    packet = FirewallPacket()
+
+    assert not hasattr(packet, "__dict__")
+
+
+def test_to_dict_from_dict_round_trip():
+    packet = FirewallPacket.from_packet(
+        create_raw_packet(TCP_PSH | TCP_ACK, b'{"name": "Score"}', seq=9, ack=3), 100
+    )
+    packet.status = "allow"
+
+    restored = FirewallPacket.from_dict(packet.to_dict())
+
+    assert restored.to_dict() == packet.to_dict()
+    assert restored.flag_bits == TCP_PSH | TCP_ACK
+    assert restored.internal_id == packet.internal_id
+
+
+def test_to_dict_payload_policy():
+    packet = FirewallPacket.from_packet(
+        create_raw_packet(TCP_PSH | TCP_ACK, b"0123456789"), 100
+    )
+
+    assert packet.to_dict()["payload"] == "MDEyMzQ1Njc4OQ=="
+    assert packet.to_dict(payload_size=4)["payload"] == "MDEyMw=="
+    assert packet.to_dict(payload_size=0)["payload"] is None
+    assert list(packet.to_dict(payload_size=0)) == list(packet.to_dict())
+
+
+HTTP_REQUEST = (
+    b"POST /Score HTTP/1.1\r\n"
+    b"Host: 10.0.0.254:8091\r\n"
+    b"name: Score\r\n"
+    b"bt_header_axon_port: 8091\r\n"
+    b"bt_header_dendrite_hotkey: 5Hotkey\r\n"
+    b"bt_header_dendrite_nonce: 42\r\n"
+    b"computed_body_hash: abc\r\n"
+    b"\r\n"
+    b"body: not a header"
+)
+
+
+def test_headers_are_extracted_from_http_request():
+    packet = FirewallPacket.from_packet(create_raw_packet(TCP_PSH | TCP_ACK, HTTP_REQUEST), 0)
+
+    assert packet.headers.synapse_name == "Score"
+    assert packet.headers.axon_port == 8091
+    assert packet.headers.dendrite_hotkey == "5Hotkey"
+    assert packet.headers.dendrite_nonce == 42
+    assert packet.headers.computed_body_hash == "abc"
+
+
+def test_headers_are_not_parsed_for_queues_without_synapses():
+    packet = FirewallPacket.from_packet(
+        create_raw_packet(TCP_PSH | TCP_ACK, HTTP_REQUEST, dport=9944),
+        0,
+        parse_headers=False,
+    )
+
+    assert not packet.can_carry_headers
+    assert packet.headers.synapse_name is None
+    assert packet._payload is None
+
+
+def test_headers_are_not_parsed_without_push_flag():
+    packet = FirewallPacket.from_packet(create_raw_packet(TCP_ACK, HTTP_REQUEST), 0)
+
+    assert not packet.can_carry_headers
+    assert packet.headers.synapse_name is None
+
+
+def test_extract_headers_stops_once_keys_are_found():
+    content = "POST / HTTP/1.1\r\nname: Score\r\nbt_header_dendrite_port: 1\r\nextra: value\r\n\r\nbody: ignored"
+
+    assert extract_and_transform_headers(content) == {
+        "name": "Score",
+        "dendrite_port": 1,
+        "extra": "value",
+    }
+    assert extract_and_transform_headers(content, ["name"]) == {"name": "Score"}
@@ -0,0 +1,159 @@
+import json
+
+from subvortex.core.firewall.firewall_model import RuleType
+from subvortex.core.firewall.firewall_packet import FirewallPacket
+from subvortex.core.firewall.firewall_request import (
+    FirewallRequest,
+    FirewallRequestIndex,
+    seq_space,
+    window_size,
+)
+
+
+def create_packet(flags, seq=1000, ack=0, current_time=0, status=None, max_time=0):
+    return FirewallPacket.from_dict(
+        {
+            "sip": "10.0.0.1",
+            "dport": 8091,
+            "protocol": "tcp",
+            "flags": flags,
+            "seq": seq,
+            "ack": ack,
+            "current_time": current_time,
+            "status": status,
+            "max_time": max_time,
+        }
+    )
+
+
+def create_request(seq=1000, current_time=100):
+    request = FirewallRequest()
+    request.add_packet(create_packet("S", seq=seq, current_time=current_time))
+    return request
+
+
+def test_request_aggregates_follow_packet_verdicts():
+    request = FirewallRequest()
+
+    sync = create_packet("S", current_time=100)
+    request.add_packet(sync)
+    sync.accept()
+    sync.max_time = 60
+
+    assert request.current_time == 100
+    assert request.max_time == 60
+    assert not request.is_allowed()
+    assert not request.is_denied()
+
+    data = create_packet("PA", seq=1001, ack=1, current_time=101)
+    request.add_packet(data)
+    data.accept()
+
+    assert request.is_allowed()
+    assert request.is_sync_allowed() and request.is_data_allowed()
+
+    fin = create_packet("FA", seq=1002, ack=2, current_time=102)
+    request.add_packet(fin)
+    fin.drop(type=None, reason="denied")
+    fin.max_time = 120
+
+    assert request.is_denied()
+    assert request.status == "deny"
+    assert request.max_time == 120
+
+
+def test_get_packet_by_internal_id():
+    request = create_request()
+    data = create_packet("PA", seq=1001, ack=1)
+    request.add_packet(data)
+
+    assert request.get_packet_by_internal_id(data.internal_id) is data
+    assert request.get_packet_by_internal_id("unknown") is None
+
+
+def test_from_dict_restores_aggregates():
+    request = FirewallRequest.from_dict(
+        {
+            "request_id": "id",
+            "previous_id": None,
+            "packets": [
+                {"sip": "10.0.0.1", "flags": "S", "seq": 1, "current_time": 10, "status": "deny", "max_time": 60},
+                {"sip": "10.0.0.1", "flags": "PA", "seq": 2, "ack": 1, "current_time": 11, "status": "allow"},
+            ],
+        }
+    )
+
+    assert request.is_denied()
+    assert request.is_sync_denied()
+    assert request.current_time == 10
+    assert request.max_time == 60
+
+
+def test_state_round_trip_restores_decisions():
+    request = create_request()
+    request.previous_id = "previous"
+    request._packets[0].drop(type=RuleType.DETECT_DOS, reason="DoS")
+    request._packets[0].max_time = 60
+    data = create_packet("PA", seq=1001, ack=1, current_time=101)
+    request.add_packet(data)
+    data.accept()
+
+    restored = FirewallRequest.from_state(json.loads(json.dumps(request.to_state())))
+
+    assert restored.id == request.id and restored.previous_id == "previous"
+    assert restored.group_id == "10.0.0.1:8091:tcp"
+    assert restored.is_sync_denied() and restored.is_data_allowed()
+    assert restored.max_time == 60
+    assert restored._packets[0].type == RuleType.DETECT_DOS
+    assert restored._packets[0].reason == "DoS"
+    assert restored.get_packet_by_internal_id(data.internal_id) is not None
+
+
+def test_index_finds_request_by_sequence_window():
+    first = create_request(seq=1000)
+    second = create_request(seq=1000 + 2 * window_size)
+    index = FirewallRequestIndex([first, second])
+
+    assert index.find(1000) == [first]
+    assert index.find(1000 + window_size - 1) == [first]
+    assert index.find(1000 + window_size) == []
+    assert index.find(1000 + 2 * window_size + 5) == [second]
+    assert index.get(first.id) is first
+
+
+def test_index_finds_most_recent_request_first():
+    first = create_request(seq=1000)
+    second = create_request(seq=1500)
+    index = FirewallRequestIndex([first, second])
+
+    assert index.find(2000) == [second, first]
+
+
+def test_index_handles_sequence_wrap_around():
+    request = create_request(seq=seq_space - 100)
+    index = FirewallRequestIndex([request])
+
+    assert index.find(seq_space - 1) == [request]
+    assert index.find(10) == [request]
+    assert index.find(window_size - 100) == []
+
+
+def test_index_remove():
+    request = create_request(seq=seq_space - 100)
+    index = FirewallRequestIndex([request])
+
+    index.remove(request)
+
+    assert len(index) == 0
+    assert index.find(10) == []
+    assert index._buckets == {}
+
+
+def test_index_add_request_before_its_sync_packet():
+    request = FirewallRequest()
+    index = FirewallRequestIndex()
+
+    index.add(request, 5000)
+    request.add_packet(create_packet("S", seq=5000))
+
+    assert index.find(5001) == [request]
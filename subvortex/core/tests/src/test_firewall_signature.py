@@ -0,0 +1,76 @@
+from subvortex.core.firewall.firewall_signature import SignatureCache
+
+NONCE = 1_700_000_000_000_000_000
+
+
+class Verifier:
+    def __init__(self, result=True):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def test_verified_signature_is_cached_for_the_request():
+    cache = SignatureCache()
+    verifier = Verifier()
+
+    for _ in range(3):
+        assert cache.verify("hk", NONCE, "msg", "sig", "req-1", verifier) == (True, False)
+
+    assert verifier.calls == 1
+    assert cache.get_stats() == {"size": 1, "hits": 2, "misses": 1, "replays": 0}
+
+
+def test_invalid_signature_is_not_cached():
+    cache = SignatureCache()
+    verifier = Verifier(result=False)
+
+    assert cache.verify("hk", NONCE, "msg", "sig", "req-1", verifier) == (False, False)
+    assert cache.verify("hk", NONCE, "msg", "sig", "req-1", verifier) == (False, False)
+
+    assert verifier.calls == 2
+
+
+def test_signature_reused_by_another_request_is_a_replay():
+    cache = SignatureCache()
+    verifier = Verifier()
+
+    cache.verify("hk", NONCE, "msg", "sig", "req-1", verifier)
+
+    assert cache.verify("hk", NONCE, "msg", "sig", "req-2", verifier) == (False, True)
+    assert verifier.calls == 1
+
+
+def test_nonce_out_of_window_is_a_replay():
+    cache = SignatureCache(nonce_window=10)
+    verifier = Verifier()
+
+    cache.verify("hk", NONCE, "msg-1", "sig-1", "req-1", verifier)
+
+    assert cache.verify("hk", NONCE - 5, "msg-2", "sig-2", "req-2", verifier) == (True, False)
+    assert cache.verify("hk", NONCE - 11, "msg-3", "sig-3", "req-3", verifier) == (False, True)
+    # Nonces of other hotkeys are not affected
+    assert cache.verify("hk2", NONCE - 11, "msg-3", "sig-3", "req-3", verifier) == (True, False)
+
+
+def test_cache_is_bounded():
+    cache = SignatureCache(size=2)
+    verifier = Verifier()
+
+    for i in range(5):
+        cache.verify("hk", NONCE + i, f"msg-{i}", f"sig-{i}", f"req-{i}", verifier)
+
+    assert cache.get_stats()["size"] == 2
+
+
+def test_nonces_are_bounded():
+    cache = SignatureCache(size=2)
+    verifier = Verifier()
+
+    for i in range(5):
+        cache.verify(f"hk-{i}", NONCE, f"msg-{i}", f"sig-{i}", f"req-{i}", verifier)
+
+    assert list(cache._nonces) == ["hk-3", "hk-4"]
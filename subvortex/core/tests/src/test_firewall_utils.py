@@ -0,0 +1,70 @@
+from subvortex.core.firewall.firewall_packet import FirewallPacket
+from subvortex.core.firewall.firewall_request import FirewallRequest
+from subvortex.core.firewall.firewall_utils import (
+    clean_source,
+    get_expiration,
+    extract_and_transform_headers,
+)
+
+
+def create_request(current_time, status=None, previous_id=None, max_time=60):
+    request = FirewallRequest(previous_id)
+    for flags in ("S", "PA"):
+        request.add_packet(
+            FirewallPacket.from_dict(
+                {
+                    "sip": "10.0.0.1",
+                    "flags": flags,
+                    "current_time": current_time,
+                    "status": status,
+                    "max_time": max_time,
+                }
+            )
+        )
+    return request
+
+
+def test_clean_source_splits_expired_requests():
+    old = create_request(100)
+    recent = create_request(150, previous_id=old.id)
+
+    old_requests, new_requests = clean_source([old, recent], 170)
+
+    assert old_requests == [old]
+    assert new_requests == [recent]
+    assert recent.previous_id is None
+
+
+def test_clean_source_keeps_last_verdict():
+    denied = create_request(100, status="deny")
+    pending = create_request(150, previous_id=denied.id)
+
+    old_requests, new_requests = clean_source([denied, pending], 170)
+
+    assert old_requests == []
+    assert new_requests == [denied, pending]
+
+
+def test_clean_source_forgets_last_verdict_after_retention():
+    denied = create_request(100, status="deny")
+
+    assert clean_source([denied], 200, retention=100) == ([], [denied])
+    assert clean_source([denied], 261, retention=100) == ([denied], [])
+
+
+def test_get_expiration():
+    denied = create_request(100, status="deny")
+    recent = create_request(150)
+
+    assert get_expiration([denied, recent], 170) == 210
+    assert get_expiration([denied], 170) is None
+    assert get_expiration([denied], 170, retention=100) == 260
+    assert get_expiration([], 170, retention=100) is None
+
+
+def test_extract_headers_converts_numbers():
+    headers = extract_and_transform_headers(
+        "POST / HTTP/1.1\r\nbt_header_axon_port: 8091\r\nbt_header_dendrite_nonce: \r\n"
+    )
+
+    assert headers == {"axon_port": 8091, "dendrite_nonce": 0}
@@ -0,0 +1,310 @@
+import mmap
+import os
+import time
+import threading
+import asyncio
+import pytest
+import numpy as np
+
+from subvortex.core.country.geolookup import (
+    GeoRangeIndex,
+    GeoRange6Index,
+    UltraFastGeoLookup,
+)
+
+LOCATIONS = """geoname_id,locale_code,continent_code,continent_name,country_iso_code,country_name,is_in_european_union
+2635167,en,EU,Europe,GB,"United Kingdom",0
+3017382,en,EU,Europe,FR,France,1
+6252001,en,NA,"North America",US,"United States",0
+6255148,en,EU,Europe,,Europe,0
+"""
+
+BLOCKS = """network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,is_anonymous_proxy,is_satellite_provider,is_anycast
+8.8.8.0/24,6252001,6252001,,0,0,
+2.0.0.0/16,3017382,3017382,,0,0,
+1.0.0.0/24,2635167,2635167,,0,0,
+5.0.0.0/8,6255148,6255148,,0,0,
+"""
+
+BLOCKS6 = """network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,is_anonymous_proxy,is_satellite_provider,is_anycast
+2001:4860::/32,6252001,6252001,,0,0,
+2a01:e00::/120,3017382,3017382,,0,0,
+2a01:e00::1234/126,2635167,2635167,,0,0,
+2a01:e40::/26,3017382,3017382,,0,0,
+"""
+
+
+def is_memory_mapped(array):
+    base = array
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, "base", None)
+
+    return False
+
+
+@pytest.fixture
+def geo_lookup(tmp_path):
+    (tmp_path / "GeoLite2-Country-Locations-en.csv").write_text(LOCATIONS)
+    (tmp_path / "GeoLite2-Country-Blocks-IPv4.csv").write_text(BLOCKS)
+    (tmp_path / "GeoLite2-Country-Blocks-IPv6.csv").write_text(BLOCKS6)
+
+    lookup = UltraFastGeoLookup(output_dir=str(tmp_path))
+    lookup._load_data_internal()
+    lookup._ready = asyncio.Event()
+    lookup._ready.set()
+    return lookup
+
+
+def test_index_is_sorted_and_compact(geo_lookup):
+    index = geo_lookup._snapshot.ipv4
+
+    assert len(index) == 4
+    assert index.starts.dtype == np.uint32
+    assert np.all(np.diff(index.starts.astype(np.int64)) > 0)
+
+
+def test_lookup_country(geo_lookup):
+    assert geo_lookup.lookup_country("8.8.8.8") == "US"
+    assert geo_lookup.lookup_country("2.0.255.255") == "FR"
+    assert geo_lookup.lookup_country("1.0.0.1") == "GB"
+
+
+def test_lookup_country_not_found(geo_lookup):
+    assert geo_lookup.lookup_country("0.0.0.1") is None
+    assert geo_lookup.lookup_country("2.1.0.0") is None
+    assert geo_lookup.lookup_country("255.255.255.255") is None
+    assert geo_lookup.lookup_country("not-an-ip") is None
+
+
+def test_lookup_country_without_country_code(geo_lookup):
+    assert geo_lookup.lookup_country("5.1.2.3") is None
+
+
+def test_lookup_country_ipv6(geo_lookup):
+    assert geo_lookup.lookup_country("2001:4860:4860::8888") == "US"
+    assert geo_lookup.lookup_country("2a01:e00::1") == "FR"
+    assert geo_lookup.lookup_country("2a01:e7f:ffff::1") == "FR"
+    # Ranges sharing the same high 64 bits
+    assert geo_lookup.lookup_country("2a01:e00::1235") == "GB"
+    assert geo_lookup.lookup_country("2a01:e00::1238") is None
+
+
+def test_lookup_country_ipv6_not_found(geo_lookup):
+    assert geo_lookup.lookup_country("::1") is None
+    assert geo_lookup.lookup_country("2001:4861::1") is None
+    assert geo_lookup.lookup_country("ffff::1") is None
+
+
+def test_lookup_country_ipv4_mapped_ipv6(geo_lookup):
+    assert geo_lookup.lookup_country("::ffff:8.8.8.8") == "US"
+
+
+def test_lookup_countries_matches_single_lookups(geo_lookup):
+    ips = [
+        "8.8.8.8",
+        "1.0.0.255",
+        "2a01:e00::1235",
+        "2.0.1.1",
+        "9.9.9.9",
+        "8.8.8.8",
+        "2001:4860::1",
+        "bad",
+    ]
+
+    result = geo_lookup.lookup_countries(ips)
+
+    assert result == {
+        "8.8.8.8": "US",
+        "1.0.0.255": "GB",
+        "2a01:e00::1235": "GB",
+        "2.0.1.1": "FR",
+        "9.9.9.9": None,
+        "2001:4860::1": "US",
+        "bad": None,
+    }
+
+
+def test_empty_index_lookup():
+    index = GeoRangeIndex.empty()
+
+    assert index.lookup(1) is None
+    assert index.lookup_many(np.array([1, 2], dtype=np.uint32)) == [None, None]
+    assert GeoRange6Index.empty().lookup(1 << 100) is None
+    assert GeoRange6Index.empty().lookup_many([1 << 100]) == [None]
+
+
+def test_ipv6_lookup_many_matches_single_lookups():
+    # Ranges sharing their high 64 bits, spanning several of them and ending on a boundary
+    ranges = [
+        (1 << 64, (1 << 64) + 9, 1),
+        ((1 << 64) + 20, (1 << 64) + 29, 2),
+        ((1 << 64) + 30, (3 << 64) + 5, 3),
+        ((5 << 64) - 1, 5 << 64, 1),
+        ((7 << 64) + 100, (8 << 64) - 1, 2),
+    ]
+    index = GeoRange6Index.from_ranges(
+        [x[0] for x in ranges],
+        [x[1] for x in ranges],
+        [x[2] for x in ranges],
+        {1: "US", 2: "FR", 3: "GB"},
+    )
+    ips = [0, 1 << 64, (1 << 64) + 9, (1 << 64) + 10, (1 << 64) + 25]
+    ips += [2 << 64, (3 << 64) + 5, (3 << 64) + 6, (5 << 64) - 2, (5 << 64) - 1]
+    ips += [5 << 64, (5 << 64) + 1, (7 << 64) + 99, (8 << 64) - 1, 8 << 64]
+
+    assert index.lookup_many(ips) == [index.lookup(ip) for ip in ips]
+    assert index.lookup_many(ips)[:5] == [None, "US", "US", None, "FR"]
+
+
+def test_load_writes_precompiled_index(geo_lookup):
+    index = GeoRangeIndex.load(geo_lookup.index_file)
+
+    assert index is not None
+    assert index.countries == geo_lookup._snapshot.ipv4.countries
+    assert np.array_equal(index.starts, geo_lookup._snapshot.ipv4.starts)
+    assert np.array_equal(index.ends, geo_lookup._snapshot.ipv4.ends)
+    assert index.lookup(int.from_bytes(bytes([8, 8, 8, 8]), "big")) == "US"
+
+
+def test_load_uses_precompiled_index_without_parsing_csv(geo_lookup, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV should not be parsed")
+
+    monkeypatch.setattr(geo_lookup, "_compile_indexes", fail)
+
+    geo_lookup._load_data_internal()
+
+    assert is_memory_mapped(geo_lookup._snapshot.ipv4.starts)
+    assert is_memory_mapped(geo_lookup._snapshot.ipv6.starts_hi)
+    assert geo_lookup.lookup_country("2.0.1.1") == "FR"
+    assert geo_lookup.lookup_country("2001:4860::8888") == "US"
+
+
+def test_load_recompiles_when_csv_changes(geo_lookup, tmp_path):
+    (tmp_path / "GeoLite2-Country-Blocks-IPv4.csv").write_text(
+        BLOCKS + "9.9.9.0/24,3017382,3017382,,0,0,\n"
+    )
+
+    geo_lookup._load_data_internal()
+
+    assert len(geo_lookup._snapshot.ipv4) == 5
+    assert geo_lookup.lookup_country("9.9.9.9") == "FR"
+
+
+def test_load_rejects_corrupted_index(geo_lookup):
+    with open(geo_lookup.index_file, "r+b") as f:
+        f.seek(-1, 2)
+        last = f.read(1)
+        f.seek(-1, 2)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    assert GeoRangeIndex.load(geo_lookup.index_file) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    (tmp_path / "GeoLite2-Country-Locations-en.csv").write_text(LOCATIONS)
+    (tmp_path / "GeoLite2-Country-Blocks-IPv4.csv").write_text(BLOCKS)
+
+    lookup = UltraFastGeoLookup(output_dir=str(tmp_path), cache_size=2)
+    lookup._load_data_internal()
+    lookup._ready = asyncio.Event()
+    lookup._ready.set()
+
+    lookup.lookup_country("8.8.8.8")
+    lookup.lookup_country("1.0.0.1")
+    # Touch the first ip so the second one becomes the least recently used
+    lookup.lookup_country("8.8.8.8")
+    lookup.lookup_country("2.0.1.1")
+
+    assert list(lookup._snapshot.cache.keys()) == ["8.8.8.8", "2.0.1.1"]
+
+    stats = lookup.get_stats()
+    assert stats["cache_hits"] == 1
+    assert stats["cache_misses"] == 3
+    assert stats["cache_evictions"] == 1
+    assert stats["cache_hit_rate"] == 0.25
+
+
+def test_lookup_does_not_check_files(geo_lookup, monkeypatch):
+    def fail():
+        raise AssertionError("Files should be checked by the reload timer only")
+
+    monkeypatch.setattr(geo_lookup, "_check_file_changes", fail)
+
+    assert geo_lookup.lookup_country("8.8.8.8") == "US"
+    assert geo_lookup.lookup_countries(["1.0.0.1"]) == {"1.0.0.1": "GB"}
+
+
+@pytest.mark.asyncio
+async def test_reload_check_loop_reloads_changed_files(geo_lookup, tmp_path):
+    geo_lookup.reload_check_interval = 0.01
+    geo_lookup._running = True
+    task = asyncio.create_task(geo_lookup._reload_check_loop())
+
+    blocks = tmp_path / "GeoLite2-Country-Blocks-IPv4.csv"
+    blocks.write_text(BLOCKS + "9.9.9.0/24,3017382,3017382,,0,0,\n")
+    os.utime(blocks, (time.time() + 10, time.time() + 10))
+
+    for _ in range(100):
+        if len(geo_lookup._snapshot.ipv4) == 5:
+            break
+        await asyncio.sleep(0.01)
+
+    geo_lookup._running = False
+    task.cancel()
+
+    assert geo_lookup.lookup_country("9.9.9.9") == "FR"
+
+
+def test_reload_waits_for_the_updater_to_replace_all_files(geo_lookup, tmp_path):
+    previous = geo_lookup._snapshot
+
+    with geo_lookup._updater.lock:
+        # The updater has replaced the blocks but not the locations yet
+        blocks = tmp_path / "GeoLite2-Country-Blocks-IPv4.csv"
+        blocks.write_text(BLOCKS + "9.9.9.0/24,3017382,3017382,,0,0,\n")
+        os.utime(blocks, (time.time() + 10, time.time() + 10))
+
+        reload = threading.Thread(target=geo_lookup._reload_if_changed)
+        reload.start()
+        reload.join(0.1)
+        assert reload.is_alive()
+        assert geo_lookup._snapshot is previous
+
+    reload.join(5)
+    assert geo_lookup.lookup_country("9.9.9.9") == "FR"
+
+
+@pytest.mark.asyncio
+async def test_reload_keeps_serving_previous_snapshot(geo_lookup, tmp_path):
+    previous = geo_lookup._snapshot
+    building = threading.Event()
+    release = threading.Event()
+    build_indexes = geo_lookup._build_indexes
+
+    def slow_build_indexes():
+        building.set()
+        release.wait(5)
+        return build_indexes()
+
+    geo_lookup._build_indexes = slow_build_indexes
+    (tmp_path / "GeoLite2-Country-Blocks-IPv4.csv").write_text(
+        BLOCKS + "9.9.9.0/24,3017382,3017382,,0,0,\n"
+    )
+
+    reload = asyncio.create_task(asyncio.to_thread(geo_lookup._load_data_internal))
+    await asyncio.to_thread(building.wait, 5)
+
+    # The reload is in progress: lookups are still answered from the previous index
+    assert geo_lookup._ready.is_set()
+    assert geo_lookup._snapshot is previous
+    assert geo_lookup.lookup_country("8.8.8.8") == "US"
+    assert geo_lookup.lookup_country("9.9.9.9") is None
+
+    release.set()
+    await reload
+
+    assert geo_lookup._snapshot is not previous
+    assert geo_lookup.lookup_country("9.9.9.9") == "FR"
@@ -216,7 +216,7 @@ async def test_resync_updates_neurons(observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value="US"),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
         assert "hotkey123" in axons
         observer.database.update_neurons.assert_called_once_with([new_neuron])
         assert axons["hotkey123"] == "1.2.3.4"
@@ -286,7 +286,7 @@ async def test_resync_no_neuron_change(observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value="FR"),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
 
         observer.database.remove_neurons.assert_not_called()
         observer.database.update_neurons.assert_not_called()
@@ -317,7 +317,7 @@ async def test_resync_neuron_ip_changed(observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value="FR"),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
         observer.database.remove_neurons.assert_called_once_with([old_neuron])
         observer.database.update_neurons.assert_called_once_with([new_neuron])
         assert axons["hotkey123"] == "9.9.9.9"
@@ -347,7 +347,7 @@ async def test_resync_hotkey_changed(observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value="US"),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
         observer.database.remove_neurons.assert_called_once_with([old_neuron])
         observer.database.update_neurons.assert_called_once_with([new_neuron])
         assert axons["new_hotkey"] == "1.1.1.1"
@@ -374,7 +374,7 @@ async def test_resync_neuron_not_in_database(observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value="FR"),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
         observer.database.remove_neurons.assert_not_called()
         observer.database.update_neurons.assert_called_once_with([new_neuron])
         assert axons["new_hotkey"] == "5.5.5.5"
@@ -401,7 +401,7 @@ async def test_resync_neuron_with_no_country_not_in_database(observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value=None),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
         observer.database.remove_neurons.assert_not_called()
         observer.database.update_neurons.assert_called_once_with([new_neuron])
         assert axons["new_hotkey"] == "5.5.5.5"
@@ -427,7 +427,7 @@ async def test_resync_country_not_updated_if_ip_is_same(observer):
         "subvortex.core.model.neuron.neuron.Neuron.from_proto",
         return_value=stored_neuron,
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
 
     observer.database.remove_neurons.assert_not_called()
     observer.database.update_neurons.assert_not_called()
@@ -460,7 +460,7 @@ async def test_resync_removes_old_hotkey(mock_debug, observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value="US"),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
 
     observer.database.remove_neurons.assert_called_once_with([old_neuron])
     observer.database.update_neurons.assert_called_once_with([new_neuron])
@@ -498,7 +498,7 @@ async def test_resync_removes_stale_hotkey(mock_debug, observer):
         ),
         patch("subvortex.core.country.country.get_country", return_value="US"),
     ):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
 
     observer.database.remove_neurons.assert_called_once_with([old_neuron])
     observer.database.update_neurons.assert_called_once_with([new_neuron])
@@ -540,7 +540,7 @@ async def test_resync_triggers_on_missing_country(observer):
         "subvortex.core.country.country.get_country",
         return_value=new_neuron.country,
     ):
-        axons, has_missing_country = await observer._resync()
+        axons, has_missing_country = await observer._resync(last_update=1)
 
     assert has_missing_country is False
     observer.database.remove_neurons.assert_not_called()
@@ -578,7 +578,7 @@ async def test_resync_triggers_on_keep_missing_country(observer):
         "subvortex.core.country.country.get_country",
         return_value=new_neuron.country,
     ):
-        axons, has_missing_country = await observer._resync()
+        axons, has_missing_country = await observer._resync(last_update=1)
 
     assert has_missing_country is True
     observer.database.remove_neurons.assert_not_called()
@@ -606,7 +606,7 @@ async def test_ip_change_same_hotkey_no_delete(observer):
         "subvortex.core.model.neuron.neuron.Neuron.from_proto",
         return_value=updated,
     ), patch("subvortex.core.country.country.get_country", return_value="FR"):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
 
     observer.database.remove_neurons.assert_not_called()
     observer.database.update_neurons.assert_called_once_with([updated])
@@ -634,21 +634,22 @@ async def test_resync_removes_stale_neuron(observer):
         "subvortex.core.model.neuron.neuron.Neuron.from_proto",
         return_value=new,
     ), patch("subvortex.core.country.country.get_country", return_value="FR"):
-        axons, _ = await observer._resync()
+        axons, _ = await observer._resync(last_update=1)
 
     observer.database.remove_neurons.assert_called_once_with([stored])
     observer.database.update_neurons.assert_called_once_with([new])
 
 
 @pytest.mark.asyncio
-async def test_non_ipv4_address_not_considered_change(observer):
+async def test_ipv6_address_missing_country_is_resolved(observer):
     fake_proto = MagicMock()
     fake_proto.uid = 10
-    fake_proto.axon_info.ip = "::1"  # Not an IPv4
+    fake_proto.axon_info.ip = "2001:db8::1"
     fake_proto.hotkey = "ipv6_hotkey"
 
     # Original neuron had the same IP and no country
-    stored = scmm.Neuron(uid=10, ip="::1", hotkey="ipv6_hotkey", country=None)
+    stored = scmm.Neuron(uid=10, ip="2001:db8::1", hotkey="ipv6_hotkey", country=None)
+    new = scmm.Neuron(uid=10, ip="2001:db8::1", hotkey="ipv6_hotkey", country=None)
     observer.metagraph = AsyncMock()
     observer.metagraph.neurons = [fake_proto]
     observer.database.get_neurons = AsyncMock(return_value={"ipv6_hotkey": stored})
@@ -656,16 +657,31 @@ async def test_non_ipv4_address_not_considered_change(observer):
     observer.database.remove_neurons = AsyncMock()
 
     with patch(
-        "subvortex.core.model.neuron.neuron.Neuron.from_proto", return_value=stored
-    ), patch("subvortex.core.country.country.get_country", return_value=None):
-        axons, has_missing_country = await observer._resync()
+        "subvortex.core.model.neuron.neuron.Neuron.from_proto", return_value=new
+    ), patch("subvortex.core.country.country.get_country", return_value="US"):
+        axons, has_missing_country = await observer._resync(last_update=1)
 
-    observer.database.update_neurons.assert_not_called()
+    observer.database.update_neurons.assert_called_once_with([new])
     observer.database.remove_neurons.assert_not_called()
-    assert axons["ipv6_hotkey"] == "::1"
+    assert new.country == "US"
+    assert axons["ipv6_hotkey"] == "2001:db8::1"
     assert has_missing_country is False
 
 
+@pytest.mark.asyncio
+async def test_ipv6_address_country_is_resolved_locally(observer):
+    observer.geo_lookup = MagicMock()
+    observer.geo_lookup.is_ready.return_value = True
+    observer.geo_lookup.lookup_countries.return_value = {"2001:db8::1": "DE"}
+
+    with patch("subvortex.core.country.country.get_countries") as get_countries:
+        countries = await observer._get_countries_for_ips(["2001:db8::1"])
+
+    assert countries == {"2001:db8::1": "DE"}
+    get_countries.assert_not_called()
+    assert observer._needs_country("2001:db8::1", None)
+
+
 @pytest.mark.asyncio
 async def test_non_ipv4_address_but_other_change_triggers_update(observer):
     fake_proto = MagicMock()
@@ -687,7 +703,7 @@ async def test_non_ipv4_address_but_other_change_triggers_update(observer):
     with patch(
         "subvortex.core.model.neuron.neuron.Neuron.from_proto", return_value=updated
     ), patch("subvortex.core.country.country.get_country", return_value=None):
-        axons, has_missing_country = await observer._resync()
+        axons, has_missing_country = await observer._resync(last_update=1)
 
     observer.database.update_neurons.assert_called_once_with([updated])
     observer.database.remove_neurons.assert_not_called()
@@ -714,7 +730,7 @@ async def test_change_from_non_ipv4_to_ipv4(observer):
     with patch(
         "subvortex.core.model.neuron.neuron.Neuron.from_proto", return_value=new
     ), patch("subvortex.core.country.country.get_country", return_value="US"):
-        axons, has_missing_country = await observer._resync()
+        axons, has_missing_country = await observer._resync(last_update=1)
 
     observer.database.remove_neurons.assert_not_called()
     observer.database.update_neurons.assert_called_once_with([new])
@@ -739,8 +755,67 @@ async def test_zero_ip_and_non_ipv4_not_considered_missing_country(observer):
     with patch(
         "subvortex.core.model.neuron.neuron.Neuron.from_proto", return_value=stored
     ):
-        axons, has_missing_country = await observer._resync()
+        axons, has_missing_country = await observer._resync(last_update=1)
 
     observer.database.remove_neurons.assert_not_called()
     observer.database.update_neurons.assert_not_called()
     assert has_missing_country is False
+
+
+def test_settings_netuids_keep_main_netuid_first():
+    settings = scms.Settings(netuid=7, netuids="92, 7,18")
+
+    assert settings.get_netuids() == [7, 92, 18]
+
+
+def test_settings_for_netuid_scopes_key_prefix():
+    settings = scms.Settings(netuid=7, netuids="92")
+
+    main = settings.for_netuid(7)
+    other = settings.for_netuid(92)
+
+    assert main.key_prefix == "sv"
+    assert other.netuid == 92
+    assert other.key_prefix == "sv:92"
+    assert other.netuids is None
+
+
+@pytest.mark.asyncio
+async def test_group_dispatches_each_block_to_all_observers(mock_subtensor):
+    from subvortex.core.metagraph.metagraph import MetagraphObserverGroup
+
+    observers = []
+    for _ in range(2):
+        observer = MagicMock()
+        observer.settings = scms.Settings.create()
+        observer.should_exit = asyncio.Event()
+        observer.setup = AsyncMock()
+        observer.process_block = AsyncMock()
+        observer.teardown = AsyncMock()
+        observers.append(observer)
+
+    async def wait_for_block_mock(*args, **kwargs):
+        await asyncio.sleep(0.1)
+        return True
+
+    mock_subtensor.wait_for_block = AsyncMock(side_effect=wait_for_block_mock)
+    mock_subtensor.get_current_block = AsyncMock(return_value=123)
+
+    group = MetagraphObserverGroup(
+        settings=scms.Settings.create(),
+        observers=observers,
+        subtensor=mock_subtensor,
+    )
+
+    task = asyncio.create_task(group.start())
+    await asyncio.sleep(0.15)
+    await group.stop()
+    await asyncio.wait_for(task, timeout=1.0)
+
+    # A single subscription feeds every observer
+    assert mock_subtensor.wait_for_block.await_count <= 2
+    for observer in observers:
+        observer.setup.assert_awaited_once()
+        observer.process_block.assert_awaited_with(123)
+        observer.teardown.assert_awaited_once()
+        assert observer.should_exit.is_set()
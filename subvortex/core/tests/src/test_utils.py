@@ -1,6 +1,6 @@
 import pytest
 
-from subvortex.core.utils import is_valid_ipv4
+from subvortex.core.utils import is_valid_ip, is_valid_ipv4
 
 
 @pytest.mark.parametrize(
@@ -54,3 +54,13 @@ def test_is_valid_ipv4_type_safety():
     assert not is_valid_ipv4(None)
     assert not is_valid_ipv4(1234)
     assert not is_valid_ipv4(["192.168.1.1"])
+
+
+@pytest.mark.parametrize("ip", ["8.8.8.8", "2001:db8::1", "::ffff:192.0.2.128"])
+def test_valid_ip_addresses(ip):
+    assert is_valid_ip(ip)
+
+
+@pytest.mark.parametrize("ip", ["", "not.an.ip", "256.256.256.256", "abcd", None])
+def test_invalid_ip_addresses(ip):
+    assert not is_valid_ip(ip)
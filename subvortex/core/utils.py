@@ -9,3 +9,14 @@ def is_valid_ipv4(ip: str):
         return isinstance(ipaddress.ip_address(ip), ipaddress.IPv4Address)
     except ValueError:
         return False
+
+
+def is_valid_ip(ip: str):
+    if not isinstance(ip, str):
+        return False
+
+    try:
+        ipaddress.ip_address(ip)
+        return True
+    except ValueError:
+        return False
@@ -11,6 +11,7 @@ import bittensor.core.async_subtensor as btcas
 import bittensor.core.metagraph as btcm
 
 import subvortex.core.core_bittensor.config.config_utils as scccu
+import subvortex.core.country.geolookup as scgl
 import subvortex.core.metagraph.metagraph as scmm
 import subvortex.core.metagraph.database as scmms
 import subvortex.core.version as scv
@@ -24,7 +25,9 @@ shutdown_complete = asyncio.Event()
 
 class Runner:
     def __init__(self):
-        self.metagraph_observer: Optional[scmm.MetagraphObserver] = None
+        self.metagraph_observer: Optional[
+            scmm.MetagraphObserver | scmm.MetagraphObserverGroup
+        ] = None
         self.subtensor: Optional[btcas.AsyncSubtensor] = None
 
     async def wait_for_database_connection(self, settings, database):
@@ -66,12 +69,6 @@ class Runner:
         btul.logging.debug(f"Version: {version}")
 
         try:
-            # Create the storage
-            database = scmms.NeuronDatabase(settings=settings)
-            await self.wait_for_database_connection(
-                settings=settings, database=database
-            )
-
             # Initialize the subtensor
             self.subtensor = btcas.AsyncSubtensor(config=config, retry_forever=True)
             await self.subtensor.initialize()
@@ -79,19 +76,57 @@ class Runner:
 
             settings.dry_run and btul.logging.info("Dry run mode enabled")
 
-            # Initialize the metagraph
-            # TODO: Tell OTF if I provide the subtensor the network will be finney even if the subtensor is in test!
-            metagraph = btcm.AsyncMetagraph(
-                netuid=settings.netuid, network=self.subtensor.network, sync=False
+            netuids = settings.get_netuids()
+
+            # A geo lookup shared by all the observers when several netuids are observed
+            geo_lookup = (
+                scgl.UltraFastGeoLookup(
+                    output_dir=settings.geo_output_dir,
+                    license_key=settings.geo_license_key,
+                    cache_size=settings.geo_cache_size,
+                    reload_check_interval=settings.geo_reload_check_interval,
+                )
+                if len(netuids) > 1 and settings.geo_license_key
+                else None
             )
-            btul.logging.info(str(metagraph))
+
+            observers = []
+            for netuid in netuids:
+                netuid_settings = settings.for_netuid(netuid)
+
+                # Create the storage
+                database = scmms.NeuronDatabase(settings=netuid_settings)
+                await self.wait_for_database_connection(
+                    settings=netuid_settings, database=database
+                )
+
+                # Initialize the metagraph
+                # TODO: Tell OTF if I provide the subtensor the network will be finney even if the subtensor is in test!
+                metagraph = btcm.AsyncMetagraph(
+                    netuid=netuid, network=self.subtensor.network, sync=False
+                )
+                btul.logging.info(str(metagraph))
+
+                observers.append(
+                    scmm.MetagraphObserver(
+                        settings=netuid_settings,
+                        subtensor=self.subtensor,
+                        metagraph=metagraph,
+                        database=database,
+                        geo_lookup=geo_lookup,
+                    )
+                )
 
             # Create and run the metagraph observer
-            self.metagraph_observer = scmm.MetagraphObserver(
-                settings=settings,
-                subtensor=self.subtensor,
-                metagraph=metagraph,
-                database=database,
+            self.metagraph_observer = (
+                observers[0]
+                if len(observers) == 1
+                else scmm.MetagraphObserverGroup(
+                    settings=settings,
+                    observers=observers,
+                    subtensor=self.subtensor,
+                    geo_lookup=geo_lookup,
+                )
             )
             await self.metagraph_observer.start()
 
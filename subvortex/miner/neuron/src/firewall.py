@@ -14,29 +14,40 @@
 # THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
+import os
 import copy
+import json
 import time
+import heapq
+import itertools
 import threading
 import traceback
-import numpy as np
 import bittensor.utils.btlogging as btul
 from datetime import datetime
 from typing import List
 from collections import defaultdict
 from substrateinterface import Keypair
 
-from subvortex.core.shared.file import load_njson_file
+from subvortex.core.shared.file import load_json_file
 from subvortex.core.sse.sse_server import SSEServer
 from subvortex.core.file.file_local_monitor import FileLocalMonitor
+from subvortex.core.firewall.firewall_counter import (
+    SlidingWindowCounter,
+    RateStatistics,
+)
 from subvortex.core.firewall.firewall_packet import FirewallPacket
-from subvortex.core.firewall.firewall_request import FirewallRequest
+from subvortex.core.firewall.firewall_signature import SignatureCache
+from subvortex.core.firewall.firewall_request import (
+    FirewallRequest,
+    FirewallRequestIndex,
+)
 from subvortex.core.firewall.firewall_observer import FirewallObserver
 from subvortex.core.firewall.firewall_monitor import FirewallMonitor
 from subvortex.core.firewall.firewall_tool import FirewallTool
-from subvortex.core.firewall.firewall_utils import clean_sources
+from subvortex.core.firewall.firewall_utils import clean_source, get_expiration
 from subvortex.core.firewall.firewall_model import (
     create_rule,
-    Rule,
+    RuleIndex,
     RuleType,
     DetectDoSRule,
     DetectDDoSRule,
@@ -46,6 +57,17 @@ from subvortex.core.firewall.firewall_constants import (
     FIREWALL_ATTEMPTS,
     FIREWALL_SLEEP,
     FIREWALL_REQUEST_HISTORY_DURATION,
+    FIREWALL_SOURCE_RETENTION,
+    FIREWALL_SWEEP_INTERVAL,
+    FIREWALL_SWEEP_BATCH,
+    FIREWALL_QUEUED_PORTS,
+    FIREWALL_DROP_SET,
+    FIREWALL_DROP_THRESHOLD,
+    FIREWALL_DROP_WINDOW,
+    FIREWALL_DROP_TIMEOUT,
+    FIREWALL_SNAPSHOT_FILE,
+    FIREWALL_SNAPSHOT_INTERVAL,
+    FIREWALL_EVENTS_PAYLOAD_SIZE,
 )
 
 
@@ -76,13 +98,62 @@ class Firewall(threading.Thread):
         The key of a source is ip:dport:protocol, the value is a list of requests that contains packets
         """
 
-        self._rules = []
+        self._queue_locks = defaultdict(threading.Lock)
+        """
+        List all the locks of the queues, held while processing a packet or sweeping the queue
+        """
+
+        self._expirations = defaultdict(list)
+        """
+        List all the times sources have to be cleaned, as a heap of (time, source) for each queue
+        """
+
+        self._indexes = defaultdict(dict)
+        """
+        List all the indexes of requests used to find the request of a packet
+        The key of a source is ip:dport:protocol, the value is the index of the requests of the source
+        """
+
+        self._counters = defaultdict(dict)
+        """
+        List all the sliding window counters of requests used to detect DoS and DDoS attacks
+        The key of a source is ip:dport:protocol, the value is the counters of the source by time window
+        """
+
+        self._statistics = defaultdict(dict)
+        """
+        List all the streaming statistics of requests used to detect DDoS attacks
+        The key is the port, the value is the statistics of the sources of the port
+        """
+
+        self._offences = defaultdict(dict)
+        """
+        List all the sliding window counters of the connections denied by a DoS, DDoS or deny rule
+        The key of a source is ip:dport:protocol, the value is the counter of the source
+        """
+
+        self._drops = []
+        """
+        List all the sources to drop in the kernel at the next sweep, as ip,protocol:port entries
+        """
+
+        self._rules = RuleIndex()
         """
-        List all the active rules       
+        Index of all the active rules
+        """
+
+        self._signatures = SignatureCache()
+        """
+        Cache of the verified signatures, used to skip verifying them again and detect replays
         """
 
         self.monitor = FirewallMonitor(sse=sse)
 
+        self._stop_event = threading.Event()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop, name="FirewallSweeper", daemon=True
+        )
+
         self.provider = FileLocalMonitor(
             logger_name=FIREWALL_LOGGING_NAME,
             file_path=config_file,
@@ -91,21 +162,25 @@ class Firewall(threading.Thread):
         )
 
     @property
-    def rules(self):
+    def rules(self) -> RuleIndex:
         """
-        List of rules to apply
+        Index of rules to apply
         """
         with self._lock:
-            return list(self._rules)
+            return self._rules
 
     def start(self):
         self.monitor.start()
+        self._sweeper.start()
         super().start()
         btul.logging.debug(f"{FIREWALL_LOGGING_NAME} started")
 
     def stop(self):
+        self._stop_event.set()
         self.observer.stop()
+        self.save_snapshot()
         self.monitor.stop()
+        self._sweeper.join()
         super().join()
         btul.logging.debug(f"{FIREWALL_LOGGING_NAME} stopped")
 
@@ -172,17 +247,32 @@ class Firewall(threading.Thread):
 
         return (False, None, None)
 
-    def is_signed(self, hotkey, nonce, uuid, signature, computed_body_hash):
+    def is_signed(
+        self, hotkey, nonce, uuid, signature, computed_body_hash, request_id=None
+    ):
         # Get the validator hotkey
         validator_hotkey = self.get_specification("hotkey") or ""
 
-        # Build the keypair
-        keypair = Keypair(ss58_address=hotkey)
-
         # Build the signature messages.
         message = f"{nonce}.{hotkey}.{validator_hotkey}.{uuid}.{computed_body_hash}"
 
-        if not keypair.verify(message, signature):
+        is_valid, is_replay = self._signatures.verify(
+            hotkey=hotkey,
+            nonce=nonce,
+            message=message,
+            signature=signature,
+            request_id=request_id,
+            verifier=lambda: Keypair(ss58_address=hotkey).verify(message, signature),
+        )
+
+        if is_replay:
+            return (
+                True,
+                RuleType.DENY,
+                f"Signature replayed with {message} and {signature}",
+            )
+
+        if not is_valid:
             return (
                 True,
                 RuleType.DENY,
@@ -191,23 +281,6 @@ class Firewall(threading.Thread):
 
         return (False, None, None)
 
-    def cleanup_old_packets(self, current_time, requests: dict):
-        """Remove packets older than the PACKET_HISTORY_DURATION."""
-        keys_to_delete = [
-            key
-            for key, packets in requests.items()
-            if len(packets) > 0
-            and current_time - packets[-1].current_time
-            > FIREWALL_REQUEST_HISTORY_DURATION
-        ]
-
-        if len(keys_to_delete) == 0:
-            return
-
-        # Delete the keys in a separate loop
-        for key in keys_to_delete:
-            del requests[key]
-
     def update(self, specifications={}, whitelist_hotkeys=[]):
         """
         Update some informations coming from the miner
@@ -217,8 +290,11 @@ class Firewall(threading.Thread):
             self.whitelist_hotkeys = list(whitelist_hotkeys)
 
     def update_config(self, data):
+        # Build the new index before swapping it, so packets never see a partial set of rules
+        rules = RuleIndex([create_rule(x) for x in data])
+
         with self._lock:
-            self._rules = [create_rule(x) for x in data]
+            self._rules = rules
 
         self.first_try = False
 
@@ -250,9 +326,96 @@ class Firewall(threading.Thread):
 
         return packets[index] if index >= 0 else None
 
+    def get_counter(
+        self,
+        counters: dict,
+        id,
+        requests: List[FirewallRequest],
+        window,
+        skip_last=False,
+    ) -> SlidingWindowCounter:
+        """
+        Get the sliding window counter of the source for the time window.
+        The counter is seeded from the requests in memory, without the last one if skip_last is true,
+        when the source has no counter yet (restart) or when the time window of the rule has changed.
+        """
+        source_counters = counters.setdefault(id, {})
+
+        counter = source_counters.get(window)
+        if counter is None:
+            counter = SlidingWindowCounter(window=window)
+            count = len(requests) - 1 if skip_last else len(requests)
+            for request in itertools.islice(requests, max(count, 0)):
+                if request.current_time:
+                    counter.add(request.current_time)
+
+            source_counters[window] = counter
+
+        return counter
+
+    def count_request(
+        self,
+        counters: dict,
+        id,
+        requests: List[FirewallRequest],
+        current_time,
+        windows,
+    ):
+        """
+        Count the new request of the source in its sliding window counters
+        """
+        for window in windows:
+            counter = self.get_counter(counters, id, requests, window, skip_last=True)
+            counter.add(current_time)
+
+    def update_statistics(
+        self,
+        statistics: dict,
+        counters: dict,
+        sources: dict,
+        id,
+        port,
+        current_time,
+        rule: DetectDDoSRule,
+    ):
+        """
+        Update the streaming statistics of the port with the new request of the source.
+        The statistics are seeded from the requests in memory when the port has no statistics yet (restart)
+        or when the time window of the rule has changed.
+        """
+        stats = statistics.get(port)
+        if stats is None or stats.window != rule.time_window:
+            stats = RateStatistics(window=rule.time_window)
+
+            suffix = f":{port}:"
+            for source_id, requests in sources.items():
+                if suffix not in source_id or source_id == id:
+                    continue
+
+                counter = self.get_counter(
+                    counters, source_id, requests, rule.time_window
+                )
+                stats.update(source_id, counter.count(current_time))
+
+                for request in requests:
+                    if request.current_time:
+                        stats.requests.add(request.current_time)
+
+            # Requests of the source received before the new one
+            for request in sources[id][:-1]:
+                if request.current_time:
+                    stats.requests.add(request.current_time)
+
+            statistics[port] = stats
+
+        counter = self.get_counter(counters, id, sources[id], rule.time_window)
+
+        stats.requests.add(current_time)
+        stats.update(id, counter.count(current_time))
+
     def detect_dos(
         self,
-        vps: dict,
+        counters: dict,
         id,
         current_time,
         rule: DetectDoSRule,
@@ -260,57 +423,46 @@ class Firewall(threading.Thread):
         """
         Detect Denial of Service attack which is an attack from a single source that overwhelms a target with requests,
         """
-        recent_packets = [
-            request
-            for request in vps[id]
-            if current_time - request.current_time < rule.time_window
-        ]
+        counter = counters.get(id, {}).get(rule.time_window)
+        recent_requests = counter.count(current_time) if counter else 0
 
-        if len(recent_packets) > rule.packet_threshold:
+        if recent_requests > rule.packet_threshold:
             return (
                 True,
                 RuleType.DETECT_DOS,
-                f"DoS attack detected: {len(recent_packets)} requests in {rule.time_window} seconds",
+                f"DoS attack detected: {recent_requests} requests in {rule.time_window} seconds",
             )
 
         return (False, None, None)
 
-    def detect_ddos(self, vps, id, port, current_time, rule: DetectDDoSRule):
+    def detect_ddos(
+        self,
+        statistics: dict,
+        counters: dict,
+        id,
+        port,
+        current_time,
+        rule: DetectDDoSRule,
+    ):
         """
         Detect Distributed Denial of Service which is an attack from multiple sources that overwhelms a target with requests,
         """
-        # Get the index of the packet id
-        index = next((i for i, x in enumerate(vps.keys()) if x == id), -1)
-
-        # Get all the recent SYNC packet that will be used to detect any DoS attack
-        recent_requests = [
-            request
-            for id, requests in vps.items()
-            for request in requests
-            if id.split(":")[1] == str(port)
-            and current_time - request.current_time < rule.time_window
-        ]
-
-        # Create an array with the number of recent timestamps for each vps
-        packets_count = [
-            sum(
-                1
-                for request in requests
-                if current_time - request.current_time < rule.time_window
-            )
-            for requests in vps.values()
-        ]
+        stats = statistics.get(port)
+        if stats is None or stats.window != rule.time_window:
+            return (False, None, None)
 
-        if len(recent_requests) <= rule.packet_threshold:
+        # Get the number of recent requests received by the port
+        if stats.requests.count(current_time) <= rule.packet_threshold:
             return (False, None, None)
 
-        t = np.percentile(packets_count, 75)
+        # Get the distribution of the number of recent requests per source
+        t = stats.rates.quantile(0.75)
 
-        legit = [x for x in packets_count if x <= t]
-        max_legit = np.max(legit) if len(legit) > 0 else 0
-        mean_legit = np.mean(legit) if len(legit) > 0 else 0
+        legit, legit_sum, max_legit = stats.rates.summary(t)
+        mean_legit = legit_sum / legit if legit > 0 else 0
 
-        ip_count = packets_count[index]
+        counter = counters.get(id, {}).get(rule.time_window)
+        ip_count = counter.count(current_time) if counter else 0
 
         if ip_count > max_legit + mean_legit:
             return (
@@ -321,46 +473,8 @@ class Firewall(threading.Thread):
 
         return (False, None, None)
 
-    def get_rule(self, rules: List[Rule], type: RuleType, ip, port, protocol):
-        filtered_rules = [r for r in rules if r.rule_type == type]
-
-        # Ip/Port rule
-        rule = next(
-            (
-                r
-                for r in filtered_rules
-                if r.ip == ip and r.dport == port and r.protocol == protocol
-            ),
-            None,
-        )
-
-        # Ip rule
-        rule = rule or next(
-            (
-                r
-                for r in filtered_rules
-                if ip is not None
-                and r.ip == ip
-                and r.dport is None
-                and r.protocol is None
-            ),
-            None,
-        )
-
-        # Port rule
-        rule = rule or next(
-            (
-                r
-                for r in filtered_rules
-                if port is not None
-                and r.dport == port
-                and r.protocol == protocol
-                and r.ip is None
-            ),
-            None,
-        )
-
-        return rule
+    def get_rule(self, rules: RuleIndex, type: RuleType, ip, port, protocol):
+        return rules.get(type=type, ip=ip, port=port, protocol=protocol)
 
     def get_last_deny(requests):
         pass
@@ -372,7 +486,7 @@ class Firewall(threading.Thread):
             "request_id": current_request.id,
             "previous_id": current_request.previous_id if current_request else "",
             "notified": notified,
-            **packet.to_dict(),
+            **packet.to_dict(payload_size=FIREWALL_EVENTS_PAYLOAD_SIZE),
         }
         self.monitor.emit(packet_event)
 
@@ -421,7 +535,243 @@ class Firewall(threading.Thread):
 
         return True
 
+    def get_queue_lock(self, queue_num):
+        with self._lock:
+            return self._queue_locks[queue_num]
+
+    def schedule_expiration(self, queue_num, id, expiration):
+        """
+        Schedule the cleaning of the source, the caller has to hold the lock of the queue
+        """
+        if expiration is None:
+            return
+
+        heapq.heappush(self._expirations[queue_num], (expiration, id))
+
+    def sweep(self, current_time):
+        """
+        Remove the expired requests of the sources that are due to be cleaned
+        """
+        self.drop_offenders()
+
+        with self._lock:
+            queues = list(self._expirations.keys())
+
+        for queue_num in queues:
+            with self.get_queue_lock(queue_num):
+                self._sweep_queue(queue_num, current_time)
+
+    def _sweep_queue(self, queue_num, current_time):
+        expirations = self._expirations[queue_num]
+
+        # Get the sources due to be cleaned, a bounded number per sweep
+        ids = set()
+        while (
+            len(expirations) > 0
+            and expirations[0][0] <= current_time
+            and len(ids) < FIREWALL_SWEEP_BATCH
+        ):
+            ids.add(heapq.heappop(expirations)[1])
+
+        if len(ids) == 0:
+            return
+
+        with self._lock:
+            sources = self._sources[queue_num]
+            indexes = self._indexes[queue_num]
+            counters = self._counters[queue_num]
+            offences = self._offences[queue_num]
+            statistics = self._statistics[queue_num]
+
+        requests_id = []
+        for id in ids:
+            requests = sources.get(id)
+            if not requests:
+                continue
+
+            # Remove old requests
+            old_requests, new_requests = clean_source(
+                requests, current_time, FIREWALL_SOURCE_RETENTION
+            )
+
+            requests_id.extend(x.id for x in old_requests)
+
+            # Remove the old requests from the index
+            index = indexes.get(id)
+            for request in old_requests if index else []:
+                index.remove(request)
+
+            if len(new_requests) == 0:
+                # Remove the source as it has no requests anymore
+                del sources[id]
+                indexes.pop(id, None)
+                counters.pop(id, None)
+                offences.pop(id, None)
+                for stats in statistics.values():
+                    stats.remove(id)
+                continue
+
+            sources[id] = new_requests
+
+            # Refresh the rate of the source which may not have sent any request lately
+            for stats in statistics.values():
+                counter = counters.get(id, {}).get(stats.window)
+                if id in stats and counter:
+                    stats.update(id, counter.count(current_time))
+
+            self.schedule_expiration(
+                queue_num,
+                id,
+                get_expiration(new_requests, current_time, FIREWALL_SOURCE_RETENTION),
+            )
+
+        # Clean the firewall file
+        if len(requests_id) > 0:
+            self.monitor.clean(requests_id)
+
+    def count_offence(self, offences: dict, packet: FirewallPacket, current_time):
+        """
+        Count a connection of the source denied by a DoS, DDoS or deny rule,
+        the source is dropped in the kernel once it reaches the threshold
+        """
+        counter = offences.get(packet.id)
+        if counter is None:
+            counter = SlidingWindowCounter(window=FIREWALL_DROP_WINDOW)
+            offences[packet.id] = counter
+
+        counter.add(current_time)
+        if counter.count(current_time) < FIREWALL_DROP_THRESHOLD:
+            return False
+
+        del offences[packet.id]
+
+        with self._lock:
+            self._drops.append(f"{packet.sip},{packet.protocol}:{packet.dport}")
+
+        return True
+
+    def drop_offenders(self):
+        """
+        Add the sources to drop to the kernel drop set in one transaction
+        The kernel removes them from the set once their timeout expires
+        """
+        with self._lock:
+            drops, self._drops = self._drops, []
+
+        if len(drops) == 0:
+            return
+
+        self.tool.update_set(
+            FIREWALL_DROP_SET,
+            add=drops,
+            timeout=FIREWALL_DROP_TIMEOUT,
+            type="hash:ip,port",
+        )
+
+        btul.logging.warning(
+            f"[{FIREWALL_LOGGING_NAME}] Dropping {', '.join(drops)} in the kernel for {FIREWALL_DROP_TIMEOUT}s"
+        )
+
+    def save_snapshot(self):
+        """
+        Save the state needed to take the next decisions: the requests of the active sources,
+        their window counters, the offences of the sources and the ones to drop in the kernel.
+        The events stored from the cursor of the snapshot are replayed on restart.
+        """
+        try:
+            # Get the cursor first, so the events emitted while saving are replayed
+            cursor = self.monitor.get_cursor()
+
+            with self._lock:
+                queues = list(self._sources.keys())
+                drops = list(self._drops)
+
+            state = {"cursor": cursor, "drops": drops, "queues": {}}
+            for queue_num in queues:
+                with self.get_queue_lock(queue_num):
+                    with self._lock:
+                        sources = self._sources[queue_num]
+                        counters = self._counters[queue_num]
+                        offences = self._offences[queue_num]
+
+                    state["queues"][queue_num] = {
+                        "sources": {
+                            id: [x.to_state() for x in requests]
+                            for id, requests in sources.items()
+                        },
+                        "counters": {
+                            id: [x.to_state() for x in windows.values()]
+                            for id, windows in counters.items()
+                        },
+                        "offences": {
+                            id: counter.to_state() for id, counter in offences.items()
+                        },
+                    }
+
+            # Replace the previous snapshot only once the new one is complete
+            with open(f"{FIREWALL_SNAPSHOT_FILE}.tmp", "w") as file:
+                json.dump(state, file)
+            os.replace(f"{FIREWALL_SNAPSHOT_FILE}.tmp", FIREWALL_SNAPSHOT_FILE)
+        except Exception as ex:
+            btul.logging.warning(
+                f"[{FIREWALL_LOGGING_NAME}] Failed to save the snapshot: {ex}"
+            )
+            btul.logging.debug(traceback.format_exc())
+
+    def load_snapshot(self):
+        """
+        Restore the state of the last snapshot and return the cursor of the events stored after it
+        """
+        state = load_json_file(FIREWALL_SNAPSHOT_FILE)
+        if not state:
+            return 0
+
+        sources = defaultdict(lambda: defaultdict(list))
+        counters = defaultdict(dict)
+        offences = defaultdict(dict)
+        for queue_num, queue_state in state["queues"].items():
+            queue_num = int(queue_num)
+
+            for id, requests in queue_state["sources"].items():
+                sources[queue_num][id] = [
+                    FirewallRequest.from_state(x) for x in requests
+                ]
+
+            for id, windows in queue_state["counters"].items():
+                windows = [SlidingWindowCounter.from_state(x) for x in windows]
+                counters[queue_num][id] = {x.window: x for x in windows}
+
+            for id, counter in queue_state["offences"].items():
+                offences[queue_num][id] = SlidingWindowCounter.from_state(counter)
+
+        with self._lock:
+            self._sources = sources
+            self._counters = counters
+            self._offences = offences
+            self._drops = state["drops"] + self._drops
+
+        return state["cursor"]
+
+    def _sweep_loop(self):
+        last_snapshot = time.time()
+        while not self._stop_event.wait(FIREWALL_SWEEP_INTERVAL):
+            try:
+                self.sweep(time.time())
+            except Exception as ex:
+                btul.logging.warning(
+                    f"[{FIREWALL_LOGGING_NAME}] Failed to sweep sources: {ex}"
+                )
+                btul.logging.debug(traceback.format_exc())
+
+            if time.time() - last_snapshot >= FIREWALL_SNAPSHOT_INTERVAL:
+                self.save_snapshot()
+                last_snapshot = time.time()
+
     def packet_callback(self, packet: FirewallPacket):
+        with self.get_queue_lock(packet.queue_num):
+            self.process_packet(packet)
+
+    def process_packet(self, packet: FirewallPacket):
         metadata = {}
         has_state_changed = False
         packet_already_processed = None
@@ -434,10 +784,8 @@ class Firewall(threading.Thread):
             # Get the current time
             current_time = packet.current_time
 
-            # Get all rules related to the ip/port
-            rules = [
-                r for r in self.rules if r.ip == packet.sip or r.dport == packet.dport
-            ]
+            # Get the rules to apply
+            rules = self.rules
 
             # Set metadata for logs purpose on exception
             metadata = {"ip": packet.sip, "dport": packet.dport}
@@ -466,10 +814,13 @@ class Firewall(threading.Thread):
                 is not None
             )
 
-            # Work with a copy of the requests
-            sources = defaultdict(list)
+            # Get the requests of the queue
             with self._lock:
-                sources = self._sources.get(packet.queue_num, sources)
+                sources = self._sources[packet.queue_num]
+                indexes = self._indexes[packet.queue_num]
+                counters = self._counters[packet.queue_num]
+                offences = self._offences[packet.queue_num]
+                statistics = self._statistics[packet.queue_num]
 
             # Initialise variables
             seq = 0
@@ -481,6 +832,12 @@ class Firewall(threading.Thread):
 
                 seq = last_packet.seq
 
+            # Get the index of the requests of the source
+            index = indexes.get(packet.id)
+            if index is None:
+                index = FirewallRequestIndex(requests)
+                indexes[packet.id] = index
+
             # If no rule, by default we allow packets
             must_allow = match_allow_rule
             must_deny = match_deny_rule
@@ -502,7 +859,7 @@ class Firewall(threading.Thread):
 
             # Get a packet with the same internal id than the current one
             # Due to the TCP protocol's inherent behavior of re-transmitting packets when it doesn't receive an acknowledgment from the recipient
-            for request in sources.get(packet.id, []):
+            for request in index.find(packet.seq):
                 packet_already_processed = request.get_packet_by_internal_id(
                     packet.internal_id
                 )
@@ -530,17 +887,53 @@ class Firewall(threading.Thread):
                 )
                 current_request = FirewallRequest(previous_id)
                 sources[packet.id].append(current_request)
+                index.add(current_request, packet.seq)
 
-            # Get the current request
-            current_request = next(
-                (
-                    request
-                    for request in reversed(sources[packet.id])
-                    if is_sync_packet or request.is_part_of(packet.seq)
-                ),
-                None,
+            # Get the DoS rule
+            dos_rule = self.get_rule(
+                rules=rules,
+                type=RuleType.DETECT_DOS,
+                ip=packet.sip,
+                port=packet.dport,
+                protocol=packet.protocol,
+            )
+
+            # Get the DDoS rule
+            ddos_rule = self.get_rule(
+                rules=rules,
+                type=RuleType.DETECT_DDOS,
+                ip=packet.sip,
+                port=packet.dport,
+                protocol=packet.protocol,
             )
 
+            # Count the new request
+            if is_sync_packet:
+                windows = {r.time_window for r in (dos_rule, ddos_rule) if r}
+                self.count_request(
+                    counters,
+                    packet.id,
+                    sources[packet.id],
+                    current_time,
+                    windows,
+                )
+
+            if is_sync_packet and ddos_rule:
+                self.update_statistics(
+                    statistics,
+                    counters,
+                    sources,
+                    packet.id,
+                    packet.dport,
+                    current_time,
+                    ddos_rule,
+                )
+
+            # Get the current request
+            if not is_sync_packet:
+                candidates = index.find(packet.seq)
+                current_request = candidates[0] if len(candidates) > 0 else None
+
             # Check if it is a lost packet due to restarting miner and removing firewall-events.json
             is_lost_packet = current_request is None and not is_sync_packet
             if is_lost_packet:
@@ -551,10 +944,7 @@ class Firewall(threading.Thread):
             previous_request = None
             previous_id = current_request.previous_id
             while previous_request is None or previous_id is None:
-                previous_request = next(
-                    (x for x in sources[packet.id] if x.id == previous_id),
-                    None,
-                )
+                previous_request = index.get(previous_id)
 
                 if previous_request is None:
                     break
@@ -641,6 +1031,7 @@ class Firewall(threading.Thread):
                         packet.headers.dendrite_uuid,
                         packet.headers.dendrite_signature,
                         packet.headers.computed_body_hash,
+                        current_request.id,
                     )
                     if not must_deny
                     else (must_deny, rule_type, reason)
@@ -666,16 +1057,9 @@ class Firewall(threading.Thread):
                     )
 
             # Check if a DoS attack is found
-            dos_rule = self.get_rule(
-                rules=rules,
-                type=RuleType.DETECT_DOS,
-                ip=packet.sip,
-                port=packet.dport,
-                protocol=packet.protocol,
-            )
             must_deny, rule_type, reason = (
                 self.detect_dos(
-                    sources,
+                    counters,
                     packet.id,
                     current_time,
                     dos_rule,
@@ -688,16 +1072,10 @@ class Firewall(threading.Thread):
             )
 
             # Check if a DDoS attack is found
-            ddos_rule = self.get_rule(
-                rules=rules,
-                type=RuleType.DETECT_DDOS,
-                ip=packet.sip,
-                port=packet.dport,
-                protocol=packet.protocol,
-            )
             must_deny, rule_type, reason = (
                 self.detect_ddos(
-                    sources,
+                    statistics,
+                    counters,
                     packet.id,
                     packet.dport,
                     current_time,
@@ -725,6 +1103,15 @@ class Firewall(threading.Thread):
                     f"[{packet.id}][{packet.protocol}][{packet.flags}][{current_request.id}][{packet.current_time}] {copyright} dropped"
                 )
 
+                # Count the new connections the rules keep denying, so repeat offenders
+                # are dropped by the kernel instead of being queued
+                is_offence = is_sync_packet and (
+                    match_deny_rule
+                    or rule_type in (RuleType.DETECT_DOS, RuleType.DETECT_DDOS)
+                )
+                if is_offence:
+                    self.count_offence(offences, packet, current_time)
+
                 has_state_changed = previous_request is None or (
                     previous_request.is_allowed() and not current_request.notified
                 )
@@ -769,20 +1156,11 @@ class Firewall(threading.Thread):
             )
             packet.max_time = max_time
 
-            # Remove old requests
-            old_sources, sources2 = clean_sources(
-                sources=sources,
-                current_time=current_time,
-            )
-
-            # Clean the firewall file
-            requests_id = [x.id for requests in old_sources.values() for x in requests]
-            if len(requests_id) > 0:
-                self.monitor.clean(requests_id)
-
-            # Update the memory cache
-            with self._lock:
-                self._sources[packet.queue_num] = sources2
+            # Schedule the cleaning of the new request
+            if is_sync_packet:
+                self.schedule_expiration(
+                    packet.queue_num, packet.id, current_time + max_time
+                )
 
         except Exception as ex:
             btul.logging.warning(
@@ -816,18 +1194,39 @@ class Firewall(threading.Thread):
                 raise err
 
     def run(self):
-        # Reload the previous ips blocked
+        # Restore the state of the last snapshot
+        btul.logging.debug(f"[{FIREWALL_LOGGING_NAME}] Loading snapshot")
+        cursor = self.load_snapshot()
+
+        # Reload the events stored after the snapshot
         btul.logging.debug(f"[{FIREWALL_LOGGING_NAME}] Loading events")
-        packets = load_njson_file("firewall-events.json") or []
+        packets, _ = self.monitor.read_events(cursor)
 
         # Group by request id
         grouped_packets = defaultdict(list)
         for packet in packets:
             grouped_packets[packet["request_id"]].append(packet)
 
-        # Lost all the requests with their packets
-        sources = defaultdict(lambda: defaultdict(list))
+        with self._lock:
+            sources = self._sources
+            counters = self._counters
+
+        requests = {
+            x.id: x
+            for queue_sources in sources.values()
+            for source_requests in queue_sources.values()
+            for x in source_requests
+        }
+
+        # Add the requests and packets the snapshot does not have
         for request_id, packets in grouped_packets.items():
+            request = requests.get(request_id)
+            if request is not None:
+                for packet in map(FirewallPacket.from_dict, packets):
+                    if request.get_packet_by_internal_id(packet.internal_id) is None:
+                        request.add_packet(packet)
+                continue
+
             previous_id = packets[0].get("previous_id") if len(packets) > 0 else ""
             request = FirewallRequest.from_dict(
                 {
@@ -839,6 +1238,11 @@ class Firewall(threading.Thread):
 
             sources[request.queue_num][request.group_id].append(request)
 
+            # Count the request in the window counters restored for its source
+            source_counters = counters[request.queue_num].get(request.group_id, {})
+            for counter in source_counters.values() if request.current_time else []:
+                counter.add(request.current_time)
+
         # Get the total of requests
         total_requests = sum(
             len(request_list)
@@ -851,42 +1255,55 @@ class Firewall(threading.Thread):
         with self._lock:
             self._sources = sources
 
-        btul.logging.debug(f"[{FIREWALL_LOGGING_NAME}] Creating allow rule for loopback")
-        self.tool.create_allow_loopback_rule()
-
-        # Create Allow rules
-        btul.logging.debug(f"[{FIREWALL_LOGGING_NAME}] Creating allow rules")
-        self.tool.create_allow_rule(dport=22, protocol="tcp")
-        self.tool.create_allow_rule(dport=443, protocol="tcp")
-        self.tool.create_allow_rule(sport=443, protocol="tcp")
-        self.tool.create_allow_rule(sport=80, protocol="tcp")
-        self.tool.create_allow_rule(sport=53, protocol="udp")
-
-        # Create queue rules
-        btul.logging.debug(f"[{FIREWALL_LOGGING_NAME}] Creating queue rules")
-        self.tool.create_allow_rule(dport=8091, protocol="tcp", queue=1)
-        self.tool.create_allow_rule(dport=9944, protocol="tcp", queue=2)
-        self.tool.create_allow_rule(dport=9933, protocol="tcp", queue=3)
-        self.tool.create_allow_rule(dport=30333, protocol="tcp", queue=4)
-        self.tool.create_allow_rule(sport=30333, protocol="tcp")
-
-        # Change the policy to deny
-        btul.logging.debug(
-            f"[{FIREWALL_LOGGING_NAME}] Change the INPUT policy to deny by default"
+            # Schedule the cleaning of the sources
+            for queue_num, queue_sources in sources.items():
+                for id, requests in queue_sources.items():
+                    self.schedule_expiration(
+                        queue_num,
+                        id,
+                        get_expiration(
+                            requests, time.time(), FIREWALL_SOURCE_RETENTION
+                        ),
+                    )
+
+        # Create the set of the sources dropped by the kernel
+        self.tool.update_set(
+            FIREWALL_DROP_SET, timeout=FIREWALL_DROP_TIMEOUT, type="hash:ip,port"
         )
-        self.tool.create_deny_policy()
+
+        # Drop the repeat offenders first, then allow the loopback and the services the machine needs
+        rules = [
+            {
+                "match_set": FIREWALL_DROP_SET,
+                "match_set_flags": "src,dst",
+                "allow": False,
+            },
+            {"interface": "lo"},
+            {"dport": 22, "protocol": "tcp"},
+            {"dport": 443, "protocol": "tcp"},
+            {"sport": 443, "protocol": "tcp"},
+            {"sport": 80, "protocol": "tcp"},
+            {"sport": 53, "protocol": "udp"},
+        ]
+
+        # Queue the ports the firewall decides on
+        rules += [
+            {"dport": dport, "protocol": "tcp", "queue": index + 1}
+            for index, (_, dport, _) in enumerate(FIREWALL_QUEUED_PORTS)
+        ]
+        rules.append({"sport": 30333, "protocol": "tcp"})
+
+        # Apply the rules and deny anything else by default in one transaction
+        btul.logging.debug(f"[{FIREWALL_LOGGING_NAME}] Applying {len(rules)} rules")
+        self.tool.apply_rules(rules, policy="DROP")
 
         # Subscribe to the observer
-        self.observer.subscribe(
-            name="Miner", queue_num=1, callback=self.packet_callback
-        )
-        self.observer.subscribe(
-            name="SubtensorWS", queue_num=2, callback=self.packet_callback
-        )
-        self.observer.subscribe(
-            name="SubtensorRPC", queue_num=3, callback=self.packet_callback
-        )
-        self.observer.subscribe(
-            name="SubtensorP2P", queue_num=4, callback=self.packet_callback
-        )
+        # Only the miner receives synapses, subtensor payloads are never parsed
+        for index, (name, _, parse_headers) in enumerate(FIREWALL_QUEUED_PORTS):
+            self.observer.subscribe(
+                name=name,
+                queue_num=index + 1,
+                callback=self.packet_callback,
+                parse_headers=parse_headers,
+            )
         self.observer.start()
@@ -0,0 +1,506 @@
+import socket
+import struct
+import pytest
+from unittest.mock import MagicMock
+from substrateinterface import Keypair
+
+from subvortex.core.firewall.firewall_packet import FirewallPacket
+from subvortex.core.firewall.firewall_model import RuleType
+from subvortex.core.firewall.firewall_constants import (
+    FIREWALL_SOURCE_RETENTION,
+    FIREWALL_DROP_SET,
+    FIREWALL_DROP_THRESHOLD,
+    FIREWALL_DROP_TIMEOUT,
+)
+from subvortex.miner.neuron.src.firewall import Firewall
+
+TCP_FLAGS = {"F": 0x01, "S": 0x02, "R": 0x04, "P": 0x08, "A": 0x10}
+
+
+class FakeNetfilterPacket:
+    def __init__(self, payload: bytes):
+        self._payload = payload
+        self.verdict = None
+
+    def get_payload(self):
+        return self._payload
+
+    def accept(self):
+        self.verdict = "accept"
+
+    def drop(self):
+        self.verdict = "drop"
+
+
+def create_packet(
+    sip="10.0.0.1",
+    dport=8091,
+    seq=1000,
+    ack=0,
+    flags="S",
+    payload=b"",
+    current_time=0,
+    queue_num=1,
+):
+    ip_header = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0,
+        40 + len(payload),
+        0,
+        0,
+        64,
+        6,
+        0,
+        socket.inet_aton(sip),
+        socket.inet_aton("10.0.0.254"),
+    )
+    tcp_header = struct.pack(
+        "!HHLLBBHHH",
+        40000,
+        dport,
+        seq,
+        ack,
+        5 << 4,
+        sum(TCP_FLAGS[x] for x in flags),
+        65535,
+        0,
+        0,
+    )
+    raw = FakeNetfilterPacket(ip_header + tcp_header + payload)
+    return FirewallPacket.from_packet(raw, current_time, queue_num=queue_num)
+
+
+def create_dos_rule(time_window=10, packet_threshold=3, dport=8091):
+    return {
+        "dport": dport,
+        "protocol": "tcp",
+        "type": "detect-dos",
+        "configuration": {
+            "time_window": time_window,
+            "packet_threshold": packet_threshold,
+        },
+    }
+
+
+@pytest.fixture
+def firewall():
+    instance = Firewall(
+        tool=MagicMock(),
+        observer=MagicMock(),
+        sse=MagicMock(),
+        interface="eth0",
+        port=8091,
+    )
+    instance.monitor = MagicMock()
+    return instance
+
+
+def send_syn(firewall, current_time, seq, sip="10.0.0.1"):
+    packet = create_packet(sip=sip, seq=seq, current_time=current_time)
+    firewall.packet_callback(packet)
+    return packet
+
+
+def test_detect_dos_denies_source_over_threshold(firewall):
+    firewall.update_config([create_dos_rule(time_window=10, packet_threshold=3)])
+
+    statuses = [send_syn(firewall, 100 + i, seq=1000 + i).status for i in range(5)]
+
+    assert statuses == ["allow", "allow", "allow", "deny", "deny"]
+
+
+def test_detect_dos_does_not_count_other_sources(firewall):
+    firewall.update_config([create_dos_rule(time_window=10, packet_threshold=3)])
+
+    for i in range(4):
+        send_syn(firewall, 100 + i, seq=1000 + i)
+
+    packet = send_syn(firewall, 105, seq=2000, sip="10.0.0.2")
+
+    assert packet.status == "allow"
+
+
+def test_detect_dos_allows_source_once_window_has_slid(firewall):
+    firewall.update_config([create_dos_rule(time_window=10, packet_threshold=3)])
+
+    for i in range(5):
+        send_syn(firewall, 100 + i, seq=1000 + i)
+
+    packet = send_syn(firewall, 120, seq=2000)
+
+    assert packet.status == "allow"
+
+
+def test_detect_dos_reason(firewall):
+    firewall.update_config([create_dos_rule(time_window=10, packet_threshold=1)])
+
+    send_syn(firewall, 100, seq=1000)
+    packet = send_syn(firewall, 101, seq=1001)
+
+    assert packet.type == RuleType.DETECT_DOS
+    assert packet.reason == "DoS attack detected: 2 requests in 10 seconds"
+
+
+def test_detect_dos_counter_is_seeded_from_existing_requests(firewall):
+    for i in range(3):
+        send_syn(firewall, 100 + i, seq=1000 + i)
+
+    # The rule is loaded after requests have been received (e.g. restart)
+    firewall.update_config([create_dos_rule(time_window=10, packet_threshold=3)])
+    packet = send_syn(firewall, 103, seq=1003)
+
+    assert packet.status == "deny"
+
+
+def test_detect_dos_cost_does_not_depend_on_history(firewall):
+    firewall.update_config([create_dos_rule(time_window=60, packet_threshold=10**6)])
+
+    for i in range(200):
+        send_syn(firewall, 100 + i / 100, seq=1000 + i)
+
+    counter = firewall._counters[1]["10.0.0.1:8091:tcp"][60]
+    assert counter.count(102) == 200
+    assert len(counter._counts) == 60
+
+
+class UnsliceableList(list):
+    def __getitem__(self, index):
+        assert not isinstance(index, slice), "the history of the source is copied"
+        return super().__getitem__(index)
+
+
+def test_count_request_does_not_copy_the_history(firewall):
+    counters = {}
+    requests = UnsliceableList(MagicMock(current_time=100 + i) for i in range(3))
+
+    firewall.count_request(counters, "id", requests, 103, [10])
+    firewall.count_request(counters, "id", requests, 104, [10])
+
+    # Seeded without the new request, which is counted on its own
+    assert counters["id"][10].count(104) == 4
+
+
+def create_ddos_rule(time_window=10, packet_threshold=20, dport=8091):
+    return {
+        "dport": dport,
+        "protocol": "tcp",
+        "type": "detect-ddos",
+        "configuration": {
+            "time_window": time_window,
+            "packet_threshold": packet_threshold,
+        },
+    }
+
+
+def test_detect_ddos_denies_source_above_legit_sources(firewall):
+    firewall.update_config([create_ddos_rule(time_window=10, packet_threshold=20)])
+
+    for i in range(20):
+        send_syn(firewall, 100, seq=1000, sip=f"10.0.1.{i}")
+
+    statuses = [
+        send_syn(firewall, 100 + i / 10, seq=2000 + i, sip="10.0.0.1").status
+        for i in range(5)
+    ]
+
+    # Legit sources sent 1 request each: the attacker is denied once above 1 + 1
+    assert statuses == ["allow", "allow", "deny", "deny", "deny"]
+    assert send_syn(firewall, 101, seq=1001, sip="10.0.1.0").status == "allow"
+
+
+def test_detect_ddos_ignores_port_below_threshold(firewall):
+    firewall.update_config([create_ddos_rule(time_window=10, packet_threshold=100)])
+
+    for i in range(20):
+        send_syn(firewall, 100, seq=1000, sip=f"10.0.1.{i}")
+
+    statuses = [
+        send_syn(firewall, 100 + i / 10, seq=2000 + i, sip="10.0.0.1").status
+        for i in range(5)
+    ]
+
+    assert statuses == ["allow"] * 5
+
+
+def test_detect_ddos_statistics_do_not_depend_on_sources(firewall):
+    firewall.update_config([create_ddos_rule(time_window=10, packet_threshold=20)])
+
+    for i in range(200):
+        send_syn(firewall, 100, seq=1000, sip=f"10.0.{i // 250}.{i % 250}")
+
+    stats = firewall._statistics[1][8091]
+    assert stats.requests.count(100) == 200
+    assert len(stats.rates) == 200
+    assert stats.rates.quantile(0.75) == 1
+
+
+def test_deny_rule_drops_source(firewall):
+    firewall.update_config([{"type": "deny", "ip": "10.0.0.1"}])
+
+    assert send_syn(firewall, 100, seq=1000).status == "deny"
+    assert send_syn(firewall, 100, seq=1000, sip="10.0.0.2").status == "allow"
+
+
+def test_update_config_keeps_rules_when_invalid(firewall):
+    firewall.update_config([{"type": "deny", "ip": "10.0.0.1"}])
+    rules = firewall.rules
+
+    with pytest.raises(ValueError):
+        firewall.update_config([{"type": "deny", "ip": "10.0.0"}])
+
+    assert firewall.rules is rules
+
+
+def test_is_signed_verifies_signature_once_per_request(firewall, monkeypatch):
+    keypair = Keypair.create_from_uri("//Alice")
+    firewall.update(specifications={"hotkey": "miner"})
+
+    nonce = 1_700_000_000_000_000_000
+    message = f"{nonce}.{keypair.ss58_address}.miner.uuid.hash"
+    signature = "0x" + keypair.sign(message).hex()
+
+    calls = []
+    verify = Keypair.verify
+
+    def counting_verify(self, *args, **kwargs):
+        calls.append(args)
+        return verify(self, *args, **kwargs)
+
+    monkeypatch.setattr(Keypair, "verify", counting_verify)
+
+    for _ in range(3):
+        result = firewall.is_signed(
+            keypair.ss58_address, nonce, "uuid", signature, "hash", "req-1"
+        )
+        assert result == (False, None, None)
+
+    assert len(calls) == 1
+
+    must_deny, rule_type, reason = firewall.is_signed(
+        keypair.ss58_address, nonce, "uuid", signature, "hash", "req-2"
+    )
+    assert must_deny and rule_type == RuleType.DENY
+    assert reason.startswith("Signature replayed")
+
+
+def test_is_signed_denies_invalid_signature(firewall):
+    keypair = Keypair.create_from_uri("//Alice")
+    signature = "0x" + keypair.sign("another message").hex()
+
+    must_deny, rule_type, reason = firewall.is_signed(
+        keypair.ss58_address, 1, "uuid", signature, "hash", "req-1"
+    )
+
+    assert must_deny and rule_type == RuleType.DENY
+    assert reason.startswith("Signature mismatch")
+
+
+def test_packets_of_a_connection_share_the_request(firewall):
+    syn = create_packet(dport=9944, seq=1000, flags="S", current_time=100, queue_num=2)
+    ack = create_packet(dport=9944, seq=1001, ack=1, flags="A", current_time=100, queue_num=2)
+    data = create_packet(dport=9944, seq=1001, ack=1, flags="PA", payload=b"{}", current_time=101, queue_num=2)
+
+    for packet in (syn, ack, data):
+        firewall.packet_callback(packet)
+
+    requests = firewall._sources[2]["10.0.0.1:9944:tcp"]
+    assert len(requests) == 1
+    assert [p.flags for p in requests[0]._packets] == ["S", "PA"]
+    assert [p.status for p in (syn, ack, data)] == ["allow"] * 3
+    assert requests[0].is_allowed()
+
+
+def test_retransmitted_packet_gets_the_same_decision(firewall):
+    firewall.update_config([{"type": "deny", "ip": "10.0.0.1"}])
+
+    send_syn(firewall, 100, seq=1000)
+    firewall.update_config([])
+    retransmitted = send_syn(firewall, 101, seq=1000)
+
+    assert retransmitted.status == "deny"
+    assert len(firewall._sources[1]["10.0.0.1:8091:tcp"]) == 1
+
+
+def test_packet_without_request_is_dropped(firewall):
+    packet = create_packet(seq=5000, ack=1, flags="PA", payload=b"{}", current_time=100)
+
+    firewall.packet_callback(packet)
+
+    assert packet.status == "deny"
+    assert packet.reason == "Packet PA lost"
+
+
+def test_packet_path_does_not_clean_sources(firewall):
+    send_syn(firewall, 100, seq=1000)
+    send_syn(firewall, 1000, seq=100_000, sip="10.0.0.2")
+
+    assert "10.0.0.1:8091:tcp" in firewall._sources[1]
+    firewall.monitor.clean.assert_not_called()
+
+
+def test_sweep_removes_expired_sources(firewall):
+    firewall.update_config([create_dos_rule(time_window=10, packet_threshold=100)])
+    packet = send_syn(firewall, 100, seq=1000)
+    request_id = firewall._sources[1]["10.0.0.1:8091:tcp"][0].id
+
+    # Not expired yet
+    firewall.sweep(150)
+    assert "10.0.0.1:8091:tcp" in firewall._sources[1]
+
+    firewall.sweep(100 + packet.max_time + 1)
+
+    assert "10.0.0.1:8091:tcp" not in firewall._sources[1]
+    assert "10.0.0.1:8091:tcp" not in firewall._indexes[1]
+    assert "10.0.0.1:8091:tcp" not in firewall._counters[1]
+    firewall.monitor.clean.assert_called_once_with([request_id])
+
+
+def test_sweep_keeps_sources_with_recent_requests(firewall):
+    send_syn(firewall, 100, seq=1000)
+    send_syn(firewall, 150, seq=100_000)
+
+    firewall.sweep(170)
+
+    requests = firewall._sources[1]["10.0.0.1:8091:tcp"]
+    index = firewall._indexes[1]["10.0.0.1:8091:tcp"]
+    assert [x.current_time for x in requests] == [150]
+    assert len(index) == 1
+    assert index.find(1000) == []
+
+    firewall.sweep(211)
+    assert "10.0.0.1:8091:tcp" not in firewall._sources[1]
+
+
+def test_sweep_retains_last_verdict_of_source(firewall):
+    # A denied request remembers the state of the source after it expired
+    firewall.update_config([{"type": "deny", "ip": "10.0.0.1"}])
+    send_syn(firewall, 100, seq=1000)
+
+    firewall.sweep(200)
+    assert len(firewall._sources[1]["10.0.0.1:8091:tcp"]) == 1
+
+    firewall.sweep(100 + 60 + FIREWALL_SOURCE_RETENTION + 1)
+    assert "10.0.0.1:8091:tcp" not in firewall._sources[1]
+
+
+def test_sweep_is_bounded(firewall, monkeypatch):
+    monkeypatch.setattr(
+        "subvortex.miner.neuron.src.firewall.FIREWALL_SWEEP_BATCH", 10
+    )
+    for i in range(25):
+        send_syn(firewall, 100, seq=1000, sip=f"10.0.1.{i}")
+
+    firewall.sweep(1000)
+    assert len(firewall._sources[1]) == 15
+
+    firewall.sweep(1001)
+    firewall.sweep(1002)
+    assert len(firewall._sources[1]) == 0
+
+
+def test_repeat_offender_is_dropped_by_the_kernel(firewall):
+    firewall.update_config([create_dos_rule(time_window=10, packet_threshold=3)])
+
+    # The first denied connections are decided in userspace
+    for i in range(3 + FIREWALL_DROP_THRESHOLD - 1):
+        send_syn(firewall, 100 + i * 0.1, seq=1000 + i)
+    firewall.sweep(101)
+    firewall.tool.update_set.assert_not_called()
+
+    send_syn(firewall, 101, seq=2000)
+    send_syn(firewall, 101, seq=2001, sip="10.0.0.2")
+    firewall.sweep(101)
+
+    firewall.tool.update_set.assert_called_once_with(
+        FIREWALL_DROP_SET,
+        add=["10.0.0.1,tcp:8091"],
+        timeout=FIREWALL_DROP_TIMEOUT,
+        type="hash:ip,port",
+    )
+
+    # The source is promoted once, the kernel expires it
+    firewall.sweep(102)
+    assert firewall.tool.update_set.call_count == 1
+
+
+def test_allowed_connections_are_not_offences(firewall):
+    for i in range(FIREWALL_DROP_THRESHOLD * 2):
+        send_syn(firewall, 100 + i, seq=1000 + i)
+
+    firewall.sweep(200)
+
+    firewall.tool.update_set.assert_not_called()
+
+
+def test_restart_restores_snapshot_and_replays_the_tail(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rules = [create_dos_rule(time_window=10, packet_threshold=3)]
+
+    first = Firewall(tool=MagicMock(), observer=MagicMock(), sse=MagicMock(), interface="eth0")
+    first.monitor = MagicMock()
+    first.update_config(rules)
+    for i in range(2):
+        send_syn(first, 100 + i, seq=1000 + i)
+
+    # The second event is stored after the cursor of the snapshot
+    first.monitor.get_cursor.return_value = 1
+    first.save_snapshot()
+    send_syn(first, 102, seq=1002)
+    events = [x.args[0] for x in first.monitor.emit.call_args_list]
+
+    second = Firewall(tool=MagicMock(), observer=MagicMock(), sse=MagicMock(), interface="eth0")
+    second.monitor = MagicMock()
+    second.monitor.read_events.side_effect = lambda cursor: (events[cursor:], len(events))
+    second.update_config(rules)
+    second.run()
+
+    second.monitor.read_events.assert_called_once_with(1)
+    assert len(second._sources[1]["10.0.0.1:8091:tcp"]) == 3
+    assert second._counters[1]["10.0.0.1:8091:tcp"][10].count(102) == 3
+    assert send_syn(second, 103, seq=1003).status == "deny"
+
+
+def test_run_without_snapshot_replays_all_events(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    firewall = Firewall(tool=MagicMock(), observer=MagicMock(), sse=MagicMock(), interface="eth0")
+    firewall.monitor = MagicMock()
+    firewall.monitor.read_events.return_value = ([], 0)
+
+    firewall.run()
+
+    firewall.monitor.read_events.assert_called_once_with(0)
+
+
+def test_run_queues_each_port(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tool = MagicMock()
+    observer = MagicMock()
+    firewall = Firewall(tool=tool, observer=observer, sse=MagicMock(), interface="eth0")
+
+    firewall.run()
+
+    rules, policy = tool.apply_rules.call_args.args[0], tool.apply_rules.call_args.kwargs["policy"]
+    queue_rules = [
+        (rule["dport"], rule["queue"])
+        for rule in rules
+        if "queue" in rule
+    ]
+    assert policy == "DROP"
+    assert rules[0] == {
+        "match_set": FIREWALL_DROP_SET,
+        "match_set_flags": "src,dst",
+        "allow": False,
+    }
+    assert queue_rules == [(8091, 1), (9944, 2), (9933, 3), (30333, 4)]
+
+    subscriptions = [
+        (c.kwargs["name"], c.kwargs["queue_num"], c.kwargs["parse_headers"])
+        for c in observer.subscribe.call_args_list
+    ]
+    assert subscriptions == [
+        ("Miner", 1, True),
+        ("SubtensorWS", 2, False),
+        ("SubtensorRPC", 3, False),
+        ("SubtensorP2P", 4, False),
+    ]
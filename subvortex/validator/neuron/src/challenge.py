@@ -319,9 +319,6 @@ async def challenge_data(self, block: int):
     suspicious_uids = self.monitor.get_suspicious_uids()
     btul.logging.debug(f"[{CHALLENGE_NAME}] Suspicious uids {suspicious_uids}")
 
-    # Get the locations
-    locations = self.country_service.get_locations()
-
     # Define the ip occurences
     ip_occurrences = Counter(miner.ip for miner in self.miners)
 
@@ -380,7 +377,11 @@ async def challenge_data(self, block: int):
 
         # Compute score for latency
         miner.latency_score = compute_latency_score(
-            self.country, miner, self.miners, locations, has_ip_conflicts
+            self.country,
+            miner,
+            self.miners,
+            self.country_service.get_coordinates,
+            has_ip_conflicts,
         )
 
         # Compute score for reliability
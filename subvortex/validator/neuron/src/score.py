@@ -15,7 +15,7 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 import bittensor.utils.btlogging as btul
-from typing import List
+from typing import Callable, List, Optional, Tuple
 from collections import Counter
 
 from subvortex.core.constants import (
@@ -113,11 +113,12 @@ def compute_latency_score(
     validator_country: str,
     miner: Miner,
     miners: List[Miner],
-    locations,
+    get_coordinates: Callable[[str], Optional[Tuple[float, float]]],
     has_ip_conflicts: bool,
 ):
     """
     Compute the latency score of the uid based on the process time of all uids
+    The latitude and longitude of a country are given by get_coordinates, None if unknown
     """
     if not can_compute_latency_score(miner, has_ip_conflicts):
         return LATENCY_FAILURE_REWARD
@@ -127,7 +128,7 @@ def compute_latency_score(
     )
 
     # Step 1: Get the localisation of the validator
-    validator_localisation = locations.get(validator_country)
+    validator_localisation = get_coordinates(validator_country)
 
     # Step 2: Compute the miners process times by adding a tolerance
     miner_index = -1
@@ -138,14 +139,9 @@ def compute_latency_score(
             continue
 
         distance = 0
-        location = locations.get(item.country)
+        location = get_coordinates(item.country)
         if location is not None and validator_localisation is not None:
-            distance = compute_localisation_distance(
-                validator_localisation["latitude"],
-                validator_localisation["longitude"],
-                location["latitude"],
-                location["longitude"],
-            )
+            distance = compute_localisation_distance(*validator_localisation, *location)
         else:
             if validator_localisation is None:
                 btul.logging.warning(
@@ -18,9 +18,7 @@ from subvortex.validator.neuron.src.score import compute_latency_score
 
 import subvortex.validator.neuron.tests.mock.mock_miners as mocks
 
-locations = {
-    "DE": {"country": "Germany", "latitude": 51.165691, "longitude": 10.451526},
-}
+coordinates = {"DE": (51.165691, 10.451526)}
 
 
 def test_a_not_verified_miner_should_return_a_score_of_zero():
@@ -28,7 +26,7 @@ def test_a_not_verified_miner_should_return_a_score_of_zero():
     miner = mocks.miner_not_verified_1
 
     # Act
-    result = compute_latency_score(miner.country, miner, [miner], locations, False)
+    result = compute_latency_score(miner.country, miner, [miner], coordinates.get, False)
 
     # Assert
     assert 0.0 == result
@@ -39,7 +37,7 @@ def test_an_ip_conflicts_miner_should_return_a_score_of_zero():
     miner = mocks.miner_with_ip_conflicts_1
 
     # Act
-    result = compute_latency_score(miner.country, miner, [miner], locations, True)
+    result = compute_latency_score(miner.country, miner, [miner], coordinates.get, True)
 
     # Assert
     assert 0.0 == result
@@ -50,7 +48,7 @@ def test_a_not_verified_and_ip_conflicts_miner_should_return_a_score_of_zero():
     miner = mocks.miner_not_verified_and_ip_conflicts_1
 
     # Act
-    result = compute_latency_score(miner.country, miner, [miner], locations, True)
+    result = compute_latency_score(miner.country, miner, [miner], coordinates.get, True)
 
     # Assert
     assert 0.0 == result
@@ -63,7 +61,7 @@ def test_a_verified_miner_when_alone_should_return_a_score_of_one():
     miners = [miner]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 1.0 == result
@@ -80,7 +78,7 @@ def test_a_verified_miner_when_other_miners_are_not_verified_should_return_a_sco
     ]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 1.0 == result
@@ -93,7 +91,7 @@ def test_a_verified_miner_when_other_miners_have_ip_conflicts_should_return_a_sc
     miners = [miner, mocks.miner_with_ip_conflicts_1, mocks.miner_with_ip_conflicts_2]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 1.0 == result
@@ -106,7 +104,7 @@ def test_a_verified_miner_when_other_miners_are_not_verified_and_have_ip_conflic
     miners = [miner, mocks.miner_with_ip_conflicts_1, mocks.miner_with_ip_conflicts_2]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 1.0 == result
@@ -122,7 +120,7 @@ def test_a_verified_miner_when_evaluating_the_best_one_should_return_a_score_of_
     ]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 1.0 == result
@@ -138,7 +136,7 @@ def test_a_verified_miner_when_evaluating_the_worst_one_should_return_a_score_of
     ]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 0.0 == result
@@ -154,7 +152,7 @@ def test_a_verified_miner_when_evaluating_a_middle_one_should_return_a_score_bet
     ]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 0.5 == result
@@ -170,7 +168,7 @@ def test_a_verified_miner_when_evaluating_a_30_percent_close_to_the_best_should_
     ]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert 0.7 == result
@@ -186,7 +184,7 @@ def test_a_verified_miner_when_evaluating_a_30_percent_close_to_the_worst_should
     ]
 
     # Act
-    result = compute_latency_score(miner.country, miner, miners, locations, False)
+    result = compute_latency_score(miner.country, miner, miners, coordinates.get, False)
 
     # Assert
     assert abs(0.3 - result) < 0.000000000000001
\ No newline at end of file